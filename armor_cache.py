@@ -0,0 +1,404 @@
+import mmap
+import os
+import struct
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+from armor_set import RESISTANCES
+
+CACHE_MAGIC = b"MHAC"
+CACHE_VERSION = 3
+MAX_SKILLS = 6
+# The flags of a record, a piece without defense or resistances is stored as zeros.
+HAS_DEFENSE = 1
+HAS_RESISTANCES = 2
+
+# magic, version, max skills, rank count, string count, set count, record count
+HEADER = struct.Struct("<4sHHIIII")
+STRING_ID = struct.Struct("<I")
+# rank id, first record, record count
+RANK = struct.Struct("<III")
+# rank id, set name id, first record, record count
+SET = struct.Struct("<IIII")
+RECORD_KEY = struct.Struct("<III")
+# rank id, set name id, armor type id, slots, skill ids, skill levels,
+# defense, resistances, flags
+RECORD = struct.Struct(f"<III4B{MAX_SKILLS}I{MAX_SKILLS}BH{len(RESISTANCES)}bB2x")
+# The index of the first skill id, skill level, the defense and the resistances
+# in an unpacked record.
+SKILL_IDS_INDEX = 7
+LEVELS_INDEX = SKILL_IDS_INDEX + MAX_SKILLS
+DEFENSE_INDEX = LEVELS_INDEX + MAX_SKILLS
+RESISTANCES_INDEX = DEFENSE_INDEX + 1
+
+
+def write_armor_cache(armor_data: dict[str, Any], path: str) -> bool:
+    """
+    Writes the armor data as a binary cache that can be memory-mapped.
+    The file contains the ranks, a sorted table with every (interned) string,
+    a table of the armor sets sorted by (rank, set name) and a fixed-width record
+    per armor piece. The records keep the order of the armor data, so iterating
+    over the cache gives the same order as the json.
+    Returns False if the data can not be stored in the cache.
+    """
+    try:
+        strings, records = _encode_armor_data(armor_data)
+    except ValueError as exc:
+        print(f"Failed to write armor data cache: {exc}")
+        return False
+
+    string_ids = {string: i for i, string in enumerate(strings)}
+    # The first record and the record count of every rank and armor set,
+    # the records of a rank or a set are consecutive.
+    rank_records = {rank: [0, 0] for rank in armor_data}
+    set_records = {}
+    for index, (rank, set_name, _, _) in enumerate(records):
+        key = (string_ids[rank], string_ids[set_name])
+        for entry in (rank_records[rank], set_records.setdefault(key, [index, 0])):
+            if entry[1] == 0:
+                entry[0] = index
+            entry[1] += 1
+    encoded_strings = [string.encode() for string in strings]
+
+    offsets = [0]
+    for encoded in encoded_strings:
+        offsets.append(offsets[-1] + len(encoded))
+
+    data = bytearray(
+        HEADER.pack(
+            CACHE_MAGIC,
+            CACHE_VERSION,
+            MAX_SKILLS,
+            len(armor_data),
+            len(strings),
+            len(set_records),
+            len(records),
+        )
+    )
+    for rank, (first, count) in rank_records.items():
+        data += RANK.pack(string_ids[rank], first, count)
+    for offset in offsets:
+        data += STRING_ID.pack(offset)
+    data += b"".join(encoded_strings)
+    data += bytes(-len(data) % 8)
+    for key in sorted(set_records):
+        data += SET.pack(*key, *set_records[key])
+
+    for rank, set_name, armor_type, piece in records:
+        skills = piece.get("skills", {})
+        skill_ids = [string_ids[skill] for skill in skills]
+        levels = list(skills.values())
+        padding = MAX_SKILLS - len(skills)
+        flags = (HAS_DEFENSE if "defense" in piece else 0) | (
+            HAS_RESISTANCES if "resistances" in piece else 0
+        )
+        data += RECORD.pack(
+            string_ids[rank],
+            string_ids[set_name],
+            string_ids[armor_type],
+            *piece.get("slots", [0, 0, 0, 0]),
+            *skill_ids,
+            *([0] * padding),
+            *levels,
+            *([0] * padding),
+            piece.get("defense", 0),
+            *piece.get("resistances", [0] * len(RESISTANCES)),
+            flags,
+        )
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(data)
+    os.replace(temp_path, path)
+
+    return True
+
+
+def _encode_armor_data(
+    armor_data: dict[str, Any],
+) -> tuple[list[str], list[tuple[str, str, str, dict[str, Any]]]]:
+    """
+    Collects the strings and the armor pieces of the armor data, in the order
+    of the armor data. The strings are sorted, so comparing string ids is the same
+    as comparing strings.
+    """
+    strings = set()
+    pieces = []
+    if not isinstance(armor_data, dict):
+        raise ValueError("armor data must be a dict")
+
+    for rank, armor_sets in armor_data.items():
+        strings.add(rank)
+        if not isinstance(armor_sets, dict):
+            raise ValueError(f"rank {rank} must be a dict of armor sets")
+
+        for set_name, armor_pieces in armor_sets.items():
+            strings.add(set_name)
+            if not isinstance(armor_pieces, dict):
+                raise ValueError(f"armor set {set_name} must be a dict of pieces")
+
+            for armor_type, piece in armor_pieces.items():
+                strings.add(armor_type)
+                if not isinstance(piece, dict):
+                    raise ValueError(f"{set_name} {armor_type} must be a dict")
+
+                slots = piece.get("slots", [0, 0, 0, 0])
+                skills = piece.get("skills", {})
+                if len(slots) != 4 or not all(0 <= slot <= 255 for slot in slots):
+                    raise ValueError(f"invalid slots for {set_name} {armor_type}")
+                if len(skills) > MAX_SKILLS:
+                    raise ValueError(
+                        f"{set_name} {armor_type} has more than {MAX_SKILLS} skills"
+                    )
+                if not all(1 <= level <= 255 for level in skills.values()):
+                    raise ValueError(f"invalid skills for {set_name} {armor_type}")
+                if not 0 <= piece.get("defense", 0) <= 65535:
+                    raise ValueError(f"invalid defense for {set_name} {armor_type}")
+                resistances = piece.get("resistances", [0] * len(RESISTANCES))
+                if len(resistances) != len(RESISTANCES) or not all(
+                    -128 <= value <= 127 for value in resistances
+                ):
+                    raise ValueError(f"invalid resistances for {set_name} {armor_type}")
+
+                strings.update(skills)
+                pieces.append((rank, set_name, armor_type, piece))
+
+    return sorted(strings, key=lambda string: string.encode()), pieces
+
+
+class ArmorCache:
+    """
+    Read-only view on a binary armor data cache.
+    The file is memory-mapped, so a lookup only reads the pages it needs:
+    a binary search over the sorted string table to find the string ids,
+    and a binary search over the sorted set table to find the pieces.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < HEADER.size:
+            raise ValueError(f"{path} is not an armor data cache")
+
+        magic, version, max_skills, rank_count, string_count, set_count, _ = (
+            HEADER.unpack_from(self._mmap, 0)
+        )
+        if magic != CACHE_MAGIC or version != CACHE_VERSION or max_skills != MAX_SKILLS:
+            raise ValueError(f"{path} is not a compatible armor data cache")
+
+        self._string_count = string_count
+        self._set_count = set_count
+        self._ranks_start = HEADER.size
+        self._offsets_start = self._ranks_start + rank_count * RANK.size
+        self._strings_start = self._offsets_start + (string_count + 1) * STRING_ID.size
+        strings_end = self._strings_start + self._get_string_offset(string_count)
+        self._sets_start = strings_end + (-strings_end % 8)
+        self._records_start = self._sets_start + set_count * SET.size
+        self._strings = {}
+
+        # The first record and the record count of every rank.
+        self._rank_records = {}
+        for offset in range(self._ranks_start, self._offsets_start, RANK.size):
+            rank_id, first, count = RANK.unpack_from(self._mmap, offset)
+            self._rank_records[self.get_string(rank_id)] = (first, count)
+        self.ranks = list(self._rank_records)
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def get_string(self, string_id: int) -> str:
+        if string_id not in self._strings:
+            start = self._strings_start + self._get_string_offset(string_id)
+            end = self._strings_start + self._get_string_offset(string_id + 1)
+            self._strings[string_id] = self._mmap[start:end].decode()
+        return self._strings[string_id]
+
+    def get_string_id(self, string: str) -> int | None:
+        encoded = string.encode()
+        low, high = 0, self._string_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.get_string(middle).encode() < encoded:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low < self._string_count and self.get_string(low) == string:
+            return low
+        return None
+
+    def get_set_names(self, rank: str) -> Iterator[str]:
+        """
+        Yields the names of the armor sets of the given rank in the order of the
+        armor data.
+        """
+        index, count = self._rank_records.get(rank, (0, 0))
+        set_id = None
+        for index in range(index, index + count):
+            record_set_id = self._get_record_key(index)[1]
+            if record_set_id != set_id:
+                set_id = record_set_id
+                yield self.get_string(set_id)
+
+    def get_set(self, rank: str, set_name: str) -> dict[str, Any] | None:
+        """
+        Returns the pieces of an armor set in the same format as the armor data json.
+        """
+        rank_id = self.get_string_id(rank)
+        set_id = self.get_string_id(set_name)
+        if rank_id is None or set_id is None:
+            return None
+
+        index, count = self._find_set(rank_id, set_id)
+        pieces = {}
+        for index in range(index, index + count):
+            armor_type, piece = self._get_record(index)
+            pieces[armor_type] = piece
+
+        return pieces or None
+
+    def iter_sets(self, rank: str) -> Iterator[tuple[str, dict[str, Any]]]:
+        """
+        Yields the names and pieces of all armor sets of the given rank in the
+        order of the armor data, decoded in a single pass over the records of the rank.
+        """
+        index, count = self._rank_records.get(rank, (0, 0))
+        set_id = None
+        pieces = {}
+        for index in range(index, index + count):
+            record_set_id = self._get_record_key(index)[1]
+            if record_set_id != set_id:
+                if pieces:
+                    yield self.get_string(set_id), pieces
+                set_id = record_set_id
+                pieces = {}
+            armor_type, piece = self._get_record(index)
+            pieces[armor_type] = piece
+
+        if pieces:
+            yield self.get_string(set_id), pieces
+
+    def _get_string_offset(self, string_id: int) -> int:
+        offset = self._offsets_start + string_id * STRING_ID.size
+        return STRING_ID.unpack_from(self._mmap, offset)[0]
+
+    def _get_record_key(self, index: int) -> tuple[int, int, int]:
+        return RECORD_KEY.unpack_from(
+            self._mmap, self._records_start + index * RECORD.size
+        )
+
+    def _get_record(self, index: int) -> tuple[str, dict[str, Any]]:
+        values = RECORD.unpack_from(
+            self._mmap, self._records_start + index * RECORD.size
+        )
+        skill_ids = values[SKILL_IDS_INDEX:LEVELS_INDEX]
+        levels = values[LEVELS_INDEX:DEFENSE_INDEX]
+        piece = {
+            "slots": list(values[3:SKILL_IDS_INDEX]),
+            "skills": {
+                self.get_string(skill_id): level
+                for skill_id, level in zip(skill_ids, levels)
+                if level
+            },
+        }
+        flags = values[-1]
+        if flags & HAS_DEFENSE:
+            piece["defense"] = values[DEFENSE_INDEX]
+        if flags & HAS_RESISTANCES:
+            piece["resistances"] = list(values[RESISTANCES_INDEX:-1])
+        return self.get_string(values[2]), piece
+
+    def _find_set(self, rank_id: int, set_id: int) -> tuple[int, int]:
+        """
+        Returns the first record and the record count of an armor set,
+        (0, 0) if the rank has no such set.
+        """
+        low, high = 0, self._set_count
+        while low < high:
+            middle = (low + high) // 2
+            entry = SET.unpack_from(self._mmap, self._sets_start + middle * SET.size)
+            if entry[:2] < (rank_id, set_id):
+                low = middle + 1
+            elif entry[:2] > (rank_id, set_id):
+                high = middle
+            else:
+                return entry[2], entry[3]
+        return 0, 0
+
+
+class CachedArmorData(Mapping):
+    """
+    Armor data backed by an ArmorCache that behaves like the nested armor data dict:
+    armor_data[rank][set_name][armor_type] returns the same values as the json.
+    """
+
+    def __init__(self, cache: ArmorCache) -> None:
+        self.cache = cache
+        self._ranks: dict[str, CachedRank] = {}
+
+    def __getitem__(self, rank: str) -> "CachedRank":
+        if rank not in self.cache.ranks:
+            raise KeyError(rank)
+        if rank not in self._ranks:
+            self._ranks[rank] = CachedRank(self.cache, rank)
+        return self._ranks[rank]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.cache.ranks)
+
+    def __len__(self) -> int:
+        return len(self.cache.ranks)
+
+
+class CachedRank(Mapping):
+    """
+    The armor sets of a single rank. A set is decoded from the cache once
+    and kept, iterating over the items or values decodes the whole rank
+    in a single pass, so full scans like compile_rank do not decode a set
+    for every lookup.
+    """
+
+    def __init__(self, cache: ArmorCache, rank: str) -> None:
+        self.cache = cache
+        self.rank = rank
+        self._sets: dict[str, dict[str, Any]] = {}
+        self._loaded = False
+
+    def __getitem__(self, set_name: str) -> dict[str, Any]:
+        if set_name not in self._sets:
+            if self._loaded:
+                raise KeyError(set_name)
+            armor_set = self.cache.get_set(self.rank, set_name)
+            if armor_set is None:
+                raise KeyError(set_name)
+            self._sets[set_name] = armor_set
+        return self._sets[set_name]
+
+    def __iter__(self) -> Iterator[str]:
+        if self._loaded:
+            return iter(self._sets)
+        return self.cache.get_set_names(self.rank)
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def items(self):
+        return self._load().items()
+
+    def values(self):
+        return self._load().values()
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        if not self._loaded:
+            # Keep the sets that were already looked up, callers may hold them.
+            self._sets = {
+                set_name: self._sets.get(set_name, armor_set)
+                for set_name, armor_set in self.cache.iter_sets(self.rank)
+            }
+            self._loaded = True
+        return self._sets
+
+
+def open_armor_cache(path: str) -> CachedArmorData:
+    return CachedArmorData(ArmorCache(path))
@@ -0,0 +1,185 @@
+import os
+import sqlite3
+from typing import Any, NamedTuple
+
+from armor_set import normalize_name
+
+SCHEMA = """
+CREATE TABLE pieces (
+    id INTEGER PRIMARY KEY,
+    rank TEXT NOT NULL,
+    set_name TEXT NOT NULL,
+    armor_type TEXT NOT NULL,
+    UNIQUE (rank, set_name, armor_type)
+);
+CREATE TABLE piece_skills (
+    piece_id INTEGER NOT NULL REFERENCES pieces (id),
+    skill TEXT NOT NULL,
+    skill_key TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    PRIMARY KEY (piece_id, skill_key)
+) WITHOUT ROWID;
+CREATE TABLE slots (
+    piece_id INTEGER NOT NULL REFERENCES pieces (id),
+    size INTEGER NOT NULL,
+    amount INTEGER NOT NULL,
+    PRIMARY KEY (piece_id, size)
+) WITHOUT ROWID;
+CREATE INDEX pieces_rank_type ON pieces (rank, armor_type);
+CREATE INDEX pieces_type ON pieces (armor_type);
+CREATE INDEX piece_skills_skill ON piece_skills (skill_key, level);
+CREATE INDEX slots_size ON slots (size, amount);
+"""
+
+
+class CataloguePiece(NamedTuple):
+    rank: str
+    set_name: str
+    armor_type: str
+
+
+def write_armor_catalogue(armor_data: dict[str, Any], path: str) -> bool:
+    """
+    Writes the armor data as a normalized SQLite catalogue with a row per piece,
+    a row per skill of a piece and a row per slot size of a piece.
+    Returns False if the armor data could not be stored.
+    """
+    temp_path = f"{path}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+    connection = sqlite3.connect(temp_path)
+    try:
+        with connection:
+            connection.executescript(SCHEMA)
+            _insert_armor_data(connection, armor_data)
+            # Statistics for the query planner to pick the most selective index.
+            connection.execute("ANALYZE")
+    except (sqlite3.Error, AttributeError, TypeError, ValueError) as exc:
+        print(f"Failed to write armor catalogue: {exc}")
+        connection.close()
+        os.remove(temp_path)
+        return False
+
+    connection.close()
+    os.replace(temp_path, path)
+    return True
+
+
+def _insert_armor_data(connection: sqlite3.Connection, armor_data: dict[str, Any]):
+    pieces = []
+    skills = []
+    slots = []
+    for rank, armor_sets in armor_data.items():
+        for set_name, armor_pieces in armor_sets.items():
+            for armor_type, piece in armor_pieces.items():
+                piece_id = len(pieces) + 1
+                pieces.append((piece_id, rank, set_name, armor_type))
+                skills.extend(
+                    (piece_id, skill, normalize_name(skill), level)
+                    for skill, level in piece.get("skills", {}).items()
+                )
+                slots.extend(
+                    (piece_id, size, amount)
+                    for size, amount in enumerate(piece.get("slots", []), 1)
+                    if amount
+                )
+
+    connection.executemany(
+        "INSERT INTO pieces (id, rank, set_name, armor_type) VALUES (?, ?, ?, ?)",
+        pieces,
+    )
+    connection.executemany(
+        "INSERT INTO piece_skills (piece_id, skill, skill_key, level) "
+        "VALUES (?, ?, ?, ?)",
+        skills,
+    )
+    connection.executemany(
+        "INSERT INTO slots (piece_id, size, amount) VALUES (?, ?, ?)", slots
+    )
+
+
+class ArmorCatalogue:
+    """
+    Read-only queries on an armor catalogue written by write_armor_catalogue.
+    The filters are evaluated by SQLite with the indexes on rank, armor type,
+    skill and slot size, so only the matching pieces are loaded.
+    """
+
+    def __init__(self, path: str) -> None:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Could not find armor catalogue {path}")
+        self.connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def find_pieces(
+        self,
+        rank: str | None = None,
+        armor_type: str | None = None,
+        skills: dict[str, int] | None = None,
+        min_slot_size: int | None = None,
+    ) -> list[CataloguePiece]:
+        """
+        Returns the pieces of the rank and armor type that have at least the given
+        level of every skill (normalized names) and a decoration slot of at least
+        min_slot_size, e.g. all master rank legs with attack-boost >= 2
+        and a size 4 slot.
+        """
+        conditions = []
+        parameters = []
+        if rank is not None:
+            conditions.append("rank = ?")
+            parameters.append(rank)
+        if armor_type is not None:
+            conditions.append("armor_type = ?")
+            parameters.append(armor_type)
+        for skill, level in (skills or {}).items():
+            conditions.append(
+                "id IN (SELECT piece_id FROM piece_skills "
+                "WHERE skill_key = ? AND level >= ?)"
+            )
+            parameters.extend([normalize_name(skill), level])
+        if min_slot_size is not None:
+            conditions.append("id IN (SELECT piece_id FROM slots WHERE size >= ?)")
+            parameters.append(min_slot_size)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.connection.execute(
+            f"SELECT rank, set_name, armor_type FROM pieces {where} "
+            "ORDER BY rank, set_name, armor_type",
+            parameters,
+        )
+        return [CataloguePiece(*row) for row in rows]
+
+    def get_piece(
+        self, rank: str, set_name: str, armor_type: str
+    ) -> dict[str, Any] | None:
+        """
+        Returns the piece in the same format as the armor data json.
+        """
+        row = self.connection.execute(
+            "SELECT id FROM pieces WHERE rank = ? AND set_name = ? AND armor_type = ?",
+            (rank, set_name, armor_type),
+        ).fetchone()
+        if row is None:
+            return None
+
+        slots = [0, 0, 0, 0]
+        for size, amount in self.connection.execute(
+            "SELECT size, amount FROM slots WHERE piece_id = ?", row
+        ):
+            slots[size - 1] = amount
+        skills = dict(
+            self.connection.execute(
+                "SELECT skill, level FROM piece_skills WHERE piece_id = ?", row
+            )
+        )
+        return {"slots": slots, "skills": skills}
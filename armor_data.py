@@ -1,57 +1,307 @@
+import codecs
+import hashlib
 import json
 import os
-from typing import Any
-
-import requests
-
-from armor_set import ArmorSet
-
-ARMOR_DATA_URL = "https://mhw-db.com/armor"
+import sys
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from functools import partial
+from typing import TYPE_CHECKING, Any
+
+from armor_cache import open_armor_cache, write_armor_cache
+from armor_catalogue import ArmorCatalogue, write_armor_catalogue
+from armor_set import RESISTANCES, ArmorSet, normalize_name
+from name_index import NameIndex, build_name_indexes
+from spans import profiled, span
+
+# requests is only imported when data is synced, so loading local data stays fast.
+if TYPE_CHECKING:
+    import requests
+
+REMOTE_DATA_URL = "https://mhw-db.com"
+ARMOR_ENDPOINT = "/armor"
+ARMOR_DATA_URL = REMOTE_DATA_URL + ARMOR_ENDPOINT
+REMOTE_ENDPOINTS = {
+    "decorations": "/decorations",
+    "skills": "/skills",
+    "charms": "/charms",
+    "set_bonuses": "/armor/sets",
+}
+STREAM_CHUNK_SIZE = 64 * 1024
+PROGRESS_INTERVAL = 100
 
 DATA_FOLDER = "./data"
 ARMOR_DATA_FILE = "armor_data.json"
 ARMOR_SET_FILE = "armor_sets.json"
+ARMOR_CACHE_EXTENSION = ".bin"
+ARMOR_CATALOGUE_EXTENSION = ".db"
+NAME_INDEX_EXTENSION = ".names.json"
+SYNC_STATE_FILE = "sync_state.json"
+REMOTE_DATA_FILES = {
+    "decorations": "decorations.json",
+    "skills": "skills.json",
+    "charms": "charms.json",
+    "set_bonuses": "set_bonuses.json",
+}
 ARMOR_DATA = os.path.join(DATA_FOLDER, ARMOR_DATA_FILE)
 ARMOR_SET_PATH = os.path.join(DATA_FOLDER, ARMOR_SET_FILE)
+DECORATIONS_PATH = os.path.join(DATA_FOLDER, REMOTE_DATA_FILES["decorations"])
+CHARMS_PATH = os.path.join(DATA_FOLDER, REMOTE_DATA_FILES["charms"])
 
 
+@profiled("sync_armor_data")
 def sync_armor_data(
-    force: bool = False, path: str = DATA_FOLDER, filename: str = ARMOR_DATA_FILE
+    force: bool = False,
+    path: str = DATA_FOLDER,
+    filename: str = ARMOR_DATA_FILE,
+    refresh: bool = False,
+    base_url: str = REMOTE_DATA_URL,
 ) -> None:
     """
     Syncs the armor data with a remote database if no local file exists.
+    Besides the armor, the decorations, skills, charms and armor set bonuses are synced.
     The force flag can be used to sync even if a local file exists.
+    The refresh flag only updates the pieces that changed since the last sync.
     """
     if os.path.exists(os.path.join(path, filename)) and not force:
+        if refresh:
+            _refresh_armor_data(path, filename, base_url + ARMOR_ENDPOINT)
+            return
+
         print("Armor data already exists. Not syncing with remote armor data.")
         return
 
-    armor_data = _get_remote_armor_data()
-    _save_armor_data(armor_data, path, filename)
+    sync_state = {}
+    remote_data = _get_remote_data(base_url, sync_state)
+    if remote_data is None:
+        print("Failed to sync with the remote data.")
+        return
+
+    _save_remote_data(remote_data, path, filename)
+    if sync_state:
+        _save_sync_state(sync_state, path)
 
 
-def load_armor_data(file_path: str = ARMOR_DATA) -> dict[str, Any]:
+@profiled("load_armor_data")
+def load_armor_data(file_path: str = ARMOR_DATA) -> Mapping[str, Any]:
     """
     Loads the json data from the given path.
+    If a binary cache next to the json file is up to date, the cache is memory-mapped
+    instead of parsing the json. Otherwise the cache is (re)built from the json.
     """
     if not os.path.exists(file_path):
         print(f"Could not find path {file_path}")
         return {}
 
-    with open(file_path) as file:
+    cache_path = get_armor_cache_path(file_path)
+    if _is_cache_up_to_date(file_path, cache_path):
+        try:
+            armor_data = open_armor_cache(cache_path)
+            print("Loaded armor data.")
+            return armor_data
+        except (OSError, ValueError) as exc:
+            print(f"Failed to open armor data cache: {exc}")
+
+    with open(file_path) as file, span("json.load"):
         try:
             armor_data = json.load(file)
         except json.JSONDecodeError as exc:
             print(f"Failed to load armor data: {exc}")
             return {}
 
+    with span("write cache"):
+        write_armor_cache(armor_data, cache_path)
     print("Loaded armor data.")
     return armor_data
 
 
-def _get_remote_armor_data(url: str = ARMOR_DATA_URL) -> dict[str, Any]:
+class LazyArmorData(Mapping):
+    """
+    Armor data that is only synced and loaded the first time it is accessed,
+    so an action that does not need the armor data does not pay for it.
+    """
+
+    def __init__(self, path: str = DATA_FOLDER, filename: str = ARMOR_DATA_FILE):
+        self.path = path
+        self.filename = filename
+        self._armor_data = None
+
+    def load(self) -> Mapping[str, Any]:
+        if self._armor_data is None:
+            sync_armor_data(path=self.path, filename=self.filename)
+            self._armor_data = load_armor_data(os.path.join(self.path, self.filename))
+        return self._armor_data
+
+    def __getitem__(self, rank: str) -> Mapping[str, Any]:
+        return self.load()[rank]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.load())
+
+    def __len__(self) -> int:
+        return len(self.load())
+
+
+@profiled("open_armor_catalogue")
+def open_armor_catalogue(file_path: str = ARMOR_DATA) -> ArmorCatalogue | None:
+    """
+    Opens the SQLite catalogue next to the armor data json.
+    The catalogue is (re)built from the armor data if it is missing or outdated.
+    """
+    if not os.path.exists(file_path):
+        print(f"Could not find path {file_path}")
+        return None
+
+    catalogue_path = get_armor_catalogue_path(file_path)
+    if not _is_cache_up_to_date(file_path, catalogue_path):
+        armor_data = load_armor_data(file_path)
+        if not armor_data or not write_armor_catalogue(armor_data, catalogue_path):
+            return None
+
+    return ArmorCatalogue(catalogue_path)
+
+
+@profiled("load_name_indexes")
+def load_name_indexes(file_path: str = ARMOR_DATA) -> dict[str, NameIndex]:
+    """
+    Loads the name index of the armor set names of each rank from the json next
+    to the armor data. The indexes are (re)built if they are missing or outdated.
+    """
+    if not os.path.exists(file_path):
+        print(f"Could not find path {file_path}")
+        return {}
+
+    index_path = get_name_index_path(file_path)
+    if _is_cache_up_to_date(file_path, index_path):
+        try:
+            with open(index_path) as file:
+                data = json.load(file)
+            return {rank: NameIndex.from_dict(index) for rank, index in data.items()}
+        except (OSError, json.JSONDecodeError, AttributeError, ValueError) as exc:
+            print(f"Failed to load the name index: {exc}")
+
+    name_indexes = build_name_indexes(load_armor_data(file_path))
+    with open(index_path, "w") as file:
+        json.dump({rank: index.to_dict() for rank, index in name_indexes.items()}, file)
+    return name_indexes
+
+
+@profiled("load_decorations")
+def load_decorations(file_path: str = DECORATIONS_PATH) -> dict[str, Any]:
+    """
+    Loads the decorations that were synced from the remote database.
+    """
+    return _load_remote_data(file_path, "decorations")
+
+
+@profiled("load_charms")
+def load_charms(file_path: str = CHARMS_PATH) -> dict[str, Any]:
+    """
+    Loads the charms that were synced from the remote database.
+    """
+    return _load_remote_data(file_path, "charms")
+
+
+def _load_remote_data(file_path: str, name: str) -> dict[str, Any]:
+    if not os.path.exists(file_path):
+        print(f"Could not find path {file_path}. Sync again to get the {name}.")
+        return {}
+
+    with open(file_path) as file:
+        try:
+            return json.load(file)
+        except json.JSONDecodeError as exc:
+            print(f"Failed to load {name}: {exc}")
+            return {}
+
+
+def get_armor_cache_path(file_path: str) -> str:
+    return os.path.splitext(file_path)[0] + ARMOR_CACHE_EXTENSION
+
+
+def get_armor_catalogue_path(file_path: str = ARMOR_DATA) -> str:
+    return os.path.splitext(file_path)[0] + ARMOR_CATALOGUE_EXTENSION
+
+
+def get_name_index_path(file_path: str = ARMOR_DATA) -> str:
+    return os.path.splitext(file_path)[0] + NAME_INDEX_EXTENSION
+
+
+def _is_cache_up_to_date(file_path: str, cache_path: str) -> bool:
+    if not os.path.exists(cache_path):
+        return False
+    return os.path.getmtime(cache_path) >= os.path.getmtime(file_path)
+
+
+def _get_remote_data(
+    base_url: str = REMOTE_DATA_URL, sync_state: dict[str, Any] | None = None
+) -> dict[str, Any] | None:
+    """
+    Fetches the armor and the other endpoints concurrently through one pooled session.
+    Returns the data by endpoint name, or None if any of the endpoints failed,
+    so the local data is never partially updated.
+    """
+    parsers = {
+        "decorations": _parse_decorations,
+        "skills": _parse_skill_levels,
+        "charms": _parse_charms,
+        "set_bonuses": _parse_set_bonuses,
+    }
+
+    from fetch import create_session, fetch_concurrently
+
+    with create_session() as session:
+        tasks = {
+            "armor": partial(
+                _get_remote_armor_data,
+                base_url + ARMOR_ENDPOINT,
+                sync_state=sync_state,
+                session=session,
+            )
+        }
+        for name, endpoint in REMOTE_ENDPOINTS.items():
+            tasks[name] = partial(
+                _get_remote_json, session, base_url + endpoint, parsers[name]
+            )
+
+        remote_data = fetch_concurrently(tasks)
+
+    if not remote_data["armor"] or any(data is None for data in remote_data.values()):
+        return None
+
+    return remote_data
+
+
+def _get_remote_json(
+    session: "requests.Session",
+    url: str,
+    parser: Callable[[list[Any]], dict[str, Any]],
+) -> dict[str, Any] | None:
+    from fetch import get_json
+
+    data = get_json(session, url)
+    if data is None:
+        return None
+
+    if not isinstance(data, list):
+        print(f"Expected a list from {url}")
+        return None
+
+    return parser(data)
+
+
+def _get_remote_armor_data(
+    url: str = ARMOR_DATA_URL,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    sync_state: dict[str, Any] | None = None,
+    session: "requests.Session | None" = None,
+) -> dict[str, Any]:
     """
     Requests armor data from a remote database.
+    The response is streamed and parsed one armor piece at a time,
+    so the full response is never held in memory.
+    If a sync_state dict is given, it gets filled with the validators of the response
+    and a content hash per piece, so a later sync can refresh incrementally.
     If the response is succesfull it formats the data as follows and returns it:
     {
         <rank> : {
@@ -67,43 +317,277 @@ def _get_remote_armor_data(url: str = ARMOR_DATA_URL) -> dict[str, Any]:
     }
 
     """
-    response = requests.get(url)
+    import requests
+
+    from fetch import REQUEST_TIMEOUT
+
+    try:
+        response = (session or requests).get(url, stream=True, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as exc:
+        print(f"Failed to collect data: {exc}")
+        return {}
+
     if response.status_code != 200:
         print("Failed to collect data")
         return {}
 
     armor_data = {"low": {}, "high": {}, "master": {}}
-    armor_pieces = response.json()
-    for armor_piece in armor_pieces:
-        print(armor_piece)
-        try:
-            name = armor_piece["armorSet"]["name"].lower().replace(" ", "-")
-            rank = armor_piece["rank"]
-            armor_type = armor_piece["type"]
-            skills = armor_piece["skills"]
-            slots = armor_piece["slots"]
-        except KeyError as exc:
-            print(f"Failed to get required data for armor piece {armor_piece}. {exc}")
-            continue
+    hashes = {}
+    try:
+        for rank, name, armor_type, piece in _stream_armor_pieces(response, chunk_size):
+            armor_data.setdefault(rank, {}).setdefault(name, {})[armor_type] = piece
+            hashes[_get_piece_key(rank, name, armor_type)] = _hash_piece(piece)
+    except ValueError as exc:
+        print(f"\nFailed to parse armor data: {exc}")
+        return {}
 
-        armor_slots = _parse_slots(slots)
-        if slots is None:
-            print(f"Failed to parse slots: {slots}.")
-            continue
+    if sync_state is not None:
+        sync_state.update(_get_response_validators(response))
+        sync_state["hashes"] = hashes
 
-        armor_skills = _parse_skills(skills)
-        if skills is None:
-            print(f"Failed to parse skills {skills}.")
+    return armor_data
+
+
+def _refresh_armor_data(path: str, filename: str, url: str = ARMOR_DATA_URL) -> None:
+    """
+    Sends a conditional request with the validators of the last sync.
+    If the remote data changed, only the pieces that were added, modified or removed
+    (based on their content hash) are merged into the local armor data.
+    The local files are left untouched when no piece changed.
+    """
+    sync_state = _load_sync_state(path)
+    headers = {}
+    if "etag" in sync_state:
+        headers["If-None-Match"] = sync_state["etag"]
+    if "last_modified" in sync_state:
+        headers["If-Modified-Since"] = sync_state["last_modified"]
+
+    import requests
+
+    from fetch import REQUEST_TIMEOUT, create_session
+
+    try:
+        with create_session() as session:
+            response = session.get(
+                url, headers=headers, stream=True, timeout=REQUEST_TIMEOUT
+            )
+    except requests.RequestException as exc:
+        print(f"Failed to collect data: {exc}")
+        return
+
+    if response.status_code == 304:
+        response.close()
+        print("Armor data is up to date.")
+        return
+    if response.status_code != 200:
+        print("Failed to collect data")
+        return
+
+    old_hashes = sync_state.get("hashes", {})
+    hashes = {}
+    changed_pieces = []
+    try:
+        for rank, name, armor_type, piece in _stream_armor_pieces(response):
+            key = _get_piece_key(rank, name, armor_type)
+            hashes[key] = _hash_piece(piece)
+            if old_hashes.get(key) != hashes[key]:
+                changed_pieces.append((rank, name, armor_type, piece))
+    except ValueError as exc:
+        print(f"\nFailed to parse armor data: {exc}")
+        return
+
+    removed_keys = old_hashes.keys() - hashes.keys()
+    sync_state = {**_get_response_validators(response), "hashes": hashes}
+    if not changed_pieces and not removed_keys:
+        _save_sync_state(sync_state, path)
+        print("Armor data is up to date.")
+        return
+
+    with open(os.path.join(path, filename)) as file:
+        armor_data = json.load(file)
+
+    for rank, name, armor_type, piece in changed_pieces:
+        armor_data.setdefault(rank, {}).setdefault(name, {})[armor_type] = piece
+
+    for key in removed_keys:
+        rank, name, armor_type = key.split("/")
+        armor_set = armor_data.get(rank, {}).get(name, {})
+        armor_set.pop(armor_type, None)
+        if not armor_set:
+            armor_data.get(rank, {}).pop(name, None)
+
+    _save_armor_data(armor_data, path, filename)
+    _save_sync_state(sync_state, path)
+    print(
+        f"Merged {len(changed_pieces)} changed and {len(removed_keys)} removed pieces."
+    )
+
+
+def _stream_armor_pieces(
+    response: "requests.Response", chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[tuple[str, str, str, dict[str, Any]]]:
+    """
+    Parses the armor pieces of a streamed response one at a time.
+    Shows a progress counter and reports the speed and the peak memory
+    of the process at the end.
+    Raises a ValueError if the response is not a valid json array.
+    """
+    start = time.perf_counter()
+
+    count = 0
+    try:
+        armor_pieces = _iter_json_array(response.iter_content(chunk_size))
+        for count, armor_piece in enumerate(armor_pieces, start=1):
+            if count % PROGRESS_INTERVAL == 0:
+                print(f"\rSyncing armor pieces: {count}", end="", flush=True)
+
+            parsed_piece = _parse_armor_piece(armor_piece)
+            if parsed_piece is not None:
+                yield parsed_piece
+    finally:
+        response.close()
+
+    duration = time.perf_counter() - start
+    peak_memory = _get_peak_memory()
+    memory = "" if peak_memory is None else f", peak memory {peak_memory:.1f} MiB"
+    print(
+        f"\rSynced {count} armor pieces in {duration:.2f}s "
+        f"({count / max(duration, 1e-9):.0f} pieces/s{memory})"
+    )
+
+
+def _get_peak_memory() -> float | None:
+    """
+    Returns the peak resident memory of the process in MiB,
+    or None on platforms without the resource module (Windows).
+    Unlike tracemalloc this does not slow down the allocations.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB everywhere else.
+    if sys.platform == "darwin":
+        return peak / 1024 / 1024
+    return peak / 1024
+
+
+def _iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Incrementally parses a json array from chunks of bytes
+    and yields the elements of the array one at a time.
+    Raises a ValueError if the data is not a valid json array.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buffer = ""
+    position = 0
+    exhausted = False
+    expected = "["
+
+    def read_more() -> bool:
+        nonlocal buffer, position, exhausted
+        if exhausted:
+            return False
+
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            text = text_decoder.decode(b"", final=True)
+        else:
+            text = text_decoder.decode(chunk)
+
+        buffer = buffer[position:] + text
+        position = 0
+        return True
+
+    while True:
+        while position < len(buffer) and buffer[position].isspace():
+            position += 1
+
+        if position == len(buffer):
+            if not read_more():
+                raise ValueError("Unexpected end of the json array.")
             continue
 
-        if name not in armor_data[rank]:
-            armor_data[rank][name] = {}
-        armor_data[rank][name][armor_type] = {
-            "slots": armor_slots,
-            "skills": armor_skills,
-        }
+        char = buffer[position]
+        if expected == "[":
+            if char != "[":
+                raise ValueError("Expected the start of a json array.")
+            position += 1
+            expected = "value or ]"
+        elif expected == ", or ]" or (expected == "value or ]" and char == "]"):
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(f"Expected , or ] at position {position}.")
+            position += 1
+            expected = "value"
+        else:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if read_more():
+                    continue
+                raise
+
+            # A number at the end of the buffer might continue in the next chunk.
+            if end == len(buffer) and read_more():
+                continue
+
+            yield value
+            position = end
+            expected = ", or ]"
+
+
+def _parse_armor_piece(
+    armor_piece: dict[str, Any],
+) -> tuple[str, str, str, dict[str, Any]] | None:
+    """
+    Converts a single armor piece from the remote database to its
+    rank, armor set name, armor type and the piece data.
+    The defense (fully upgraded) and the resistances (in RESISTANCES order)
+    are only stored if the remote piece has them.
+    """
+    try:
+        name = normalize_name(armor_piece["armorSet"]["name"])
+        rank = armor_piece["rank"]
+        armor_type = armor_piece["type"]
+        skills = armor_piece["skills"]
+        slots = armor_piece["slots"]
+    except (KeyError, TypeError) as exc:
+        print(f"Failed to get required data for armor piece {armor_piece}. {exc}")
+        return None
+
+    armor_slots = _parse_slots(slots)
+    if armor_slots is None:
+        print(f"Failed to parse slots: {slots}.")
+        return None
+
+    armor_skills = _parse_skills(skills)
+    if armor_skills is None:
+        print(f"Failed to parse skills {skills}.")
+        return None
+
+    piece = {"slots": armor_slots, "skills": armor_skills}
+    if "defense" in armor_piece:
+        defense = _parse_defense(armor_piece["defense"])
+        if defense is None:
+            print(f"Failed to parse defense {armor_piece['defense']}.")
+            return None
+        piece["defense"] = defense
 
-    return armor_data
+    if "resistances" in armor_piece:
+        resistances = _parse_resistances(armor_piece["resistances"])
+        if resistances is None:
+            print(f"Failed to parse resistances {armor_piece['resistances']}.")
+            return None
+        piece["resistances"] = resistances
+
+    return rank, name, armor_type, piece
 
 
 def _parse_slots(slots: list[dict[str, Any]]) -> list[int] | None:
@@ -140,19 +624,210 @@ def _parse_skills(skills: list[dict[str, Any]]) -> dict[str, int] | None:
     return armor_skills
 
 
+def _parse_defense(defense: dict[str, Any]) -> int | None:
+    """
+    Returns the defense of a fully upgraded (not augmented) armor piece.
+    """
+    try:
+        value = defense["max"]
+    except (KeyError, TypeError):
+        return None
+
+    if not isinstance(value, int) or value < 0:
+        return None
+    return value
+
+
+def _parse_resistances(resistances: dict[str, Any]) -> list[int] | None:
+    """
+    Converts the resistances to a list with the value of each resistance
+    in RESISTANCES order.
+    """
+    try:
+        values = [resistances[resistance] for resistance in RESISTANCES]
+    except (KeyError, TypeError):
+        return None
+
+    if not all(isinstance(value, int) for value in values):
+        return None
+    return values
+
+
+def _parse_decorations(decorations: list[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Converts the decorations to a dict where the keys are the normalized
+    decoration names and the values the slot size and skills of the decoration.
+    """
+    parsed_decorations = {}
+    for decoration in decorations:
+        try:
+            name = normalize_name(decoration["name"])
+            slot = decoration["slot"]
+            skills = _parse_skills(decoration["skills"])
+        except (KeyError, TypeError) as exc:
+            print(f"Failed to get required data for decoration {decoration}. {exc}")
+            continue
+
+        if skills is None:
+            print(f"Failed to parse skills of decoration {name}.")
+            continue
+
+        parsed_decorations[name] = {"slot": slot, "skills": skills}
+
+    return parsed_decorations
+
+
+def _parse_skill_levels(skills: list[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Converts the skills to a dict where the keys are the skill names
+    and the values the maximum level of the skill.
+    """
+    parsed_skills = {}
+    for skill in skills:
+        try:
+            levels = [rank["level"] for rank in skill["ranks"]]
+            parsed_skills[skill["name"]] = {"max_level": max(levels, default=0)}
+        except (KeyError, TypeError) as exc:
+            print(f"Failed to get required data for skill {skill}. {exc}")
+
+    return parsed_skills
+
+
+def _parse_charms(charms: list[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Converts the charms to a dict where the keys are the normalized names
+    of every charm level (e.g. attack-charm-iii) and the values its skills.
+    """
+    parsed_charms = {}
+    for charm in charms:
+        try:
+            ranks = charm["ranks"]
+            for rank in ranks:
+                name = normalize_name(rank["name"])
+                skills = _parse_skills(rank["skills"])
+                if skills is None:
+                    print(f"Failed to parse skills of charm {name}.")
+                    continue
+                parsed_charms[name] = {"skills": skills}
+        except (KeyError, TypeError) as exc:
+            print(f"Failed to get required data for charm {charm}. {exc}")
+
+    return parsed_charms
+
+
+def _parse_set_bonuses(armor_sets: list[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Converts the armor sets to a dict where the keys are the normalized armor set names
+    and the values the name of the set bonus and the skills per number of pieces.
+    """
+    parsed_bonuses = {}
+    for armor_set in armor_sets:
+        try:
+            bonus = armor_set["bonus"]
+            if bonus is None:
+                continue
+
+            parsed_bonuses[normalize_name(armor_set["name"])] = {
+                "name": bonus["name"],
+                "ranks": [
+                    {
+                        "pieces": rank["pieces"],
+                        "skills": {rank["skill"]["skillName"]: rank["skill"]["level"]},
+                    }
+                    for rank in bonus["ranks"]
+                ],
+            }
+        except (KeyError, TypeError) as exc:
+            print(f"Failed to get required data for armor set {armor_set}. {exc}")
+
+    return parsed_bonuses
+
+
+def _get_piece_key(rank: str, name: str, armor_type: str) -> str:
+    return f"{rank}/{name}/{armor_type}"
+
+
+def _hash_piece(piece: dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(piece, sort_keys=True).encode()).hexdigest()
+
+
+def _get_response_validators(response: "requests.Response") -> dict[str, str]:
+    validators = {}
+    if "ETag" in response.headers:
+        validators["etag"] = response.headers["ETag"]
+    if "Last-Modified" in response.headers:
+        validators["last_modified"] = response.headers["Last-Modified"]
+    return validators
+
+
+def _load_sync_state(path: str = DATA_FOLDER) -> dict[str, Any]:
+    file_path = os.path.join(path, SYNC_STATE_FILE)
+    if not os.path.exists(file_path):
+        return {}
+
+    with open(file_path) as file:
+        try:
+            return json.load(file)
+        except json.JSONDecodeError as exc:
+            print(f"Failed to load sync state: {exc}")
+            return {}
+
+
+def _save_sync_state(sync_state: dict[str, Any], path: str = DATA_FOLDER) -> None:
+    with open(os.path.join(path, SYNC_STATE_FILE), "w") as file:
+        json.dump(sync_state, file)
+
+
+def _save_remote_data(
+    remote_data: dict[str, Any],
+    path: str = DATA_FOLDER,
+    filename: str = ARMOR_DATA_FILE,
+) -> None:
+    """
+    Saves the data of all endpoints in one step: every file is first written to a
+    temporary file, and only when all of them are written they replace the old files.
+    """
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+    file_names = {"armor": filename, **REMOTE_DATA_FILES}
+    file_paths = []
+    for name, data in remote_data.items():
+        file_path = os.path.join(path, file_names[name])
+        with open(f"{file_path}.tmp", "w") as file:
+            json.dump(data, file)
+        file_paths.append(file_path)
+
+    for file_path in file_paths:
+        os.replace(f"{file_path}.tmp", file_path)
+
+    armor_path = os.path.join(path, filename)
+    write_armor_cache(remote_data["armor"], get_armor_cache_path(armor_path))
+    write_armor_catalogue(remote_data["armor"], get_armor_catalogue_path(armor_path))
+    print("Saved armor data.")
+
+
 def _save_armor_data(
-    armor_data: dict[str, Any], path: str = DATA_FOLDER, filename: str = ARMOR_DATA_FILE
+    armor_data: dict[str, Any],
+    path: str = DATA_FOLDER,
+    filename: str = ARMOR_DATA_FILE,
+    catalogue: bool = True,
 ) -> None:
     """
     Saves the given data as json at the give path and filename.
     If the file/folder does not exist yet, it gets created automatically.
+    Next to the json the binary cache and (optionally) the SQLite catalogue are written.
     """
     if not os.path.exists(path):
         os.mkdir(path)
 
-    with open(os.path.join(path, filename), "w") as file:
+    file_path = os.path.join(path, filename)
+    with open(file_path, "w") as file:
         json.dump(armor_data, file)
 
+    write_armor_cache(armor_data, get_armor_cache_path(file_path))
+    if catalogue:
+        write_armor_catalogue(armor_data, get_armor_catalogue_path(file_path))
     print("Saved armor data.")
 
 
@@ -172,6 +847,7 @@ def save_armor_sets(
         json.dump(armor_sets_json, file)
 
 
+@profiled("load_armor_sets")
 def load_armor_sets(filepath: str = ARMOR_SET_PATH):
     if not os.path.exists(filepath):
         return []
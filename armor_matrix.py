@@ -0,0 +1,140 @@
+from typing import Any
+
+import numpy as np
+
+from armor_set import RESISTANCES, ArmorSet
+
+ARMOR_TYPES = ["head", "chest", "gloves", "waist", "legs"]
+# Charms are compiled like an extra armor type that never has decoration slots.
+CHARM_TYPE = "charm"
+FREE_SLOT = -1
+# The columns of the stat matrices.
+STATS = ["defense"] + RESISTANCES
+
+
+class CompiledRank:
+    """
+    Dense representation of the armor pieces of a single rank.
+    For every armor type it holds the piece names, a (pieces x skills) matrix
+    with the skill levels, a (pieces x 4) matrix with the decoration slots
+    and a (pieces x STATS) matrix with the defense and the resistances.
+    Every matrix ends with an extra row of zeros, so a build can use the
+    index FREE_SLOT (-1) for an armor type that has no piece.
+    The charms are stored the same way under CHARM_TYPE.
+    """
+
+    def __init__(
+        self,
+        skills: list[str],
+        names: dict[str, list[str]],
+        skill_matrices: dict[str, np.ndarray],
+        slot_matrices: dict[str, np.ndarray],
+        stat_matrices: dict[str, np.ndarray],
+    ) -> None:
+        self.skills = skills
+        self.skill_ids = {skill: i for i, skill in enumerate(skills)}
+        self.names = names
+        self.skill_matrices = skill_matrices
+        self.slot_matrices = slot_matrices
+        self.stat_matrices = stat_matrices
+
+    def __repr__(self) -> str:
+        pieces = {armor_type: len(names) for armor_type, names in self.names.items()}
+        return f"CompiledRank(skills={len(self.skills)}, pieces={pieces})"
+
+    def get_piece_name(self, armor_type: str, row: int) -> str | None:
+        if row == FREE_SLOT:
+            return None
+        return self.names[armor_type][row]
+
+
+def compile_armor_data(
+    armor_data: dict[str, Any], charms: dict[str, Any] | None = None
+) -> dict[str, CompiledRank]:
+    """
+    Compiles the nested armor data into a CompiledRank for each rank.
+    """
+    return {
+        rank: compile_rank(rank_data, charms) for rank, rank_data in armor_data.items()
+    }
+
+
+def compile_rank(
+    rank_data: dict[str, Any], charms: dict[str, Any] | None = None
+) -> CompiledRank:
+    """
+    Compiles the armor sets of a single rank (and the charms) into skill,
+    slot and stat matrices. Charms and pieces without stats have zero stats.
+    The skill ids are assigned in sorted order of the skill names,
+    so compiling the same data always results in the same vocabulary.
+    """
+    charms = charms or {}
+    skills = sorted(
+        {
+            skill
+            for armor_set in rank_data.values()
+            for piece in armor_set.values()
+            for skill in piece.get("skills", {})
+        }
+        | {skill for charm in charms.values() for skill in charm.get("skills", {})}
+    )
+    skill_ids = {skill: i for i, skill in enumerate(skills)}
+
+    names = {}
+    skill_matrices = {}
+    slot_matrices = {}
+    stat_matrices = {}
+    for armor_type in ARMOR_TYPES:
+        type_names = [
+            name for name, armor_set in rank_data.items() if armor_type in armor_set
+        ]
+        skill_matrix = np.zeros((len(type_names) + 1, len(skills)), dtype=np.int16)
+        slot_matrix = np.zeros((len(type_names) + 1, 4), dtype=np.int16)
+        stat_matrix = np.zeros((len(type_names) + 1, len(STATS)), dtype=np.int32)
+
+        for row, name in enumerate(type_names):
+            piece = rank_data[name][armor_type]
+            for skill, level in piece.get("skills", {}).items():
+                skill_matrix[row, skill_ids[skill]] = level
+            slot_matrix[row] = piece.get("slots", [0, 0, 0, 0])
+            stat_matrix[row, 0] = piece.get("defense", 0)
+            stat_matrix[row, 1:] = piece.get("resistances", [0] * len(RESISTANCES))
+
+        names[armor_type] = type_names
+        skill_matrices[armor_type] = skill_matrix
+        slot_matrices[armor_type] = slot_matrix
+        stat_matrices[armor_type] = stat_matrix
+
+    charm_matrix = np.zeros((len(charms) + 1, len(skills)), dtype=np.int16)
+    for row, charm in enumerate(charms.values()):
+        for skill, level in charm.get("skills", {}).items():
+            charm_matrix[row, skill_ids[skill]] = level
+
+    names[CHARM_TYPE] = list(charms)
+    skill_matrices[CHARM_TYPE] = charm_matrix
+    slot_matrices[CHARM_TYPE] = np.zeros((len(charms) + 1, 4), dtype=np.int16)
+    stat_matrices[CHARM_TYPE] = np.zeros((len(charms) + 1, len(STATS)), dtype=np.int32)
+
+    return CompiledRank(skills, names, skill_matrices, slot_matrices, stat_matrices)
+
+
+def compile_armor_sets(
+    armor_sets: list[ArmorSet],
+) -> tuple[list[str], np.ndarray, np.ndarray]:
+    """
+    Calculates the skill and slot totals of every armor set once and aligns them
+    on a shared, sorted skill vocabulary.
+    Returns the skill names, a (sets x skills) and a (sets x 4) matrix.
+    """
+    set_buffs = [armor_set.get_buffs() for armor_set in armor_sets]
+    skills = sorted({skill for buffs in set_buffs for skill in buffs})
+    skill_ids = {skill: i for i, skill in enumerate(skills)}
+
+    skill_matrix = np.zeros((len(armor_sets), len(skills)), dtype=np.int16)
+    slot_matrix = np.zeros((len(armor_sets), 4), dtype=np.int16)
+    for row, (armor_set, buffs) in enumerate(zip(armor_sets, set_buffs)):
+        for skill, level in buffs.items():
+            skill_matrix[row, skill_ids[skill]] = level
+        slot_matrix[row] = armor_set.get_decoration_slots()
+
+    return skills, skill_matrix, slot_matrix
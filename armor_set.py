@@ -1,13 +1,27 @@
+import sys
+from collections.abc import Mapping
 from enum import Enum
-from typing import Any, Self
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Self
 
-from rich.columns import Columns
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
+from output import get_console
+from spans import profiled
+
+if TYPE_CHECKING:
+    from rich.console import Console
 
 LEVEL_FILLED = "▰"
 LEVEL_NOT_FILLED = "▱"
+# The elemental resistances of an armor piece, in the order they are stored.
+RESISTANCES = ["fire", "water", "ice", "thunder", "dragon"]
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalizes a name the same way armor set names are stored,
+    so 'Attack Boost' and 'attack-boost' refer to the same skill.
+    """
+    return name.lower().replace(" ", "-")
 
 
 class ArmorType(Enum):
@@ -39,23 +53,91 @@ class ArmorRank(Enum):
         raise ValueError(f"Could not convert {value} to ArmorRank enum")
 
 
+# Skill names are interned once, armor pieces only store the skill ids.
+_skill_ids: dict[str, int] = {}
+_skill_names: list[str] = []
+
+
+def get_skill_id(skill: str) -> int:
+    if skill not in _skill_ids:
+        _skill_ids[skill] = len(_skill_names)
+        _skill_names.append(sys.intern(skill))
+    return _skill_ids[skill]
+
+
+def get_skill_name(skill_id: int) -> str:
+    return _skill_names[skill_id]
+
+
 class ArmorPiece:
+    """
+    Immutable armor piece (or charm). The skills are stored as a tuple of
+    (skill id, level) pairs and the slots as a tuple, so a piece does not keep
+    the dicts and lists of the json it was created from alive.
+    ArmorPiece.new, new_charm and from_dict return flyweights: every piece with
+    the same rank, set name, type, skills and slots is one shared object.
+    """
+
+    __slots__ = ("name", "armor_type", "rank", "skills", "slots")
+    _pieces: dict[tuple, "ArmorPiece"] = {}
+
     def __init__(
         self,
         armor_type: ArmorType,
         rank: ArmorRank,
         name: str,
-        buffs: list[dict[str, int]],
+        buffs: dict[str, int],
         slots: list[int],
     ) -> None:
         if len(slots) != 4:
             raise ValueError("Slots must be an array of length 4")
 
-        self.name = name
-        self.armor_type = armor_type
-        self.rank = rank
-        self.buffs = buffs  # NOTE: Buff as class with name/level/max level?
-        self.slots = slots
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "armor_type", armor_type)
+        object.__setattr__(self, "rank", rank)
+        object.__setattr__(
+            self,
+            "skills",
+            tuple((get_skill_id(skill), level) for skill, level in buffs.items()),
+        )
+        object.__setattr__(self, "slots", tuple(slots))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"ArmorPiece is immutable, can not set {name}")
+
+    def __reduce__(self):
+        # Skill ids are only valid in this process, so pickle the skill names.
+        return (
+            ArmorPiece.shared,
+            (self.armor_type, self.rank, self.name, self.buffs, self.slots),
+        )
+
+    @property
+    def buffs(self) -> dict[str, int]:
+        return {get_skill_name(skill_id): level for skill_id, level in self.skills}
+
+    @staticmethod
+    def shared(
+        armor_type: ArmorType,
+        rank: ArmorRank,
+        name: str,
+        buffs: dict[str, int],
+        slots: list[int],
+    ) -> Self:
+        """
+        Returns the shared piece with the given values, the piece is only created
+        the first time it is requested.
+        """
+        key = (armor_type, rank, name, tuple(buffs.items()), tuple(slots))
+        piece = ArmorPiece._pieces.get(key)
+        if piece is None:
+            piece = ArmorPiece(armor_type, rank, name, buffs, slots)
+            ArmorPiece._pieces[key] = piece
+        return piece
+
+    @staticmethod
+    def clear_shared() -> None:
+        ArmorPiece._pieces.clear()
 
     @staticmethod
     def new(
@@ -70,7 +152,7 @@ class ArmorPiece:
             print("Could not find piece.")
             return None
 
-        return ArmorPiece(
+        return ArmorPiece.shared(
             armor_type=ArmorType.from_str(armor_type),
             rank=ArmorRank.from_str(rank),
             name=name,
@@ -78,6 +160,22 @@ class ArmorPiece:
             buffs=piece_data.get("skills", {}),
         )
 
+    @staticmethod
+    def new_charm(rank: str, name: str, charms: dict[str, Any]) -> Self | None:
+        try:
+            charm_data = charms[name]
+        except KeyError:
+            print("Could not find charm.")
+            return None
+
+        return ArmorPiece.shared(
+            armor_type=ArmorType.CHARM,
+            rank=ArmorRank.from_str(rank),
+            name=name,
+            slots=[0, 0, 0, 0],
+            buffs=charm_data.get("skills", {}),
+        )
+
     def __repr__(self) -> str:
         return f"ArmorPiece(rank={self.rank.name}, name={self.name}, type={self.armor_type.name})"
 
@@ -87,7 +185,7 @@ class ArmorPiece:
             "type": self.armor_type.value,
             "rank": self.rank.value,
             "buffs": self.buffs,
-            "slots": self.slots,
+            "slots": list(self.slots),
         }
 
     @staticmethod
@@ -95,21 +193,27 @@ class ArmorPiece:
         if not data:
             return None
         try:
-            return ArmorPiece(
+            return ArmorPiece.shared(
                 name=data["name"],
                 armor_type=ArmorType.from_str(data["type"]),
                 rank=ArmorRank.from_str(data["rank"]),
                 buffs=data["buffs"],
                 slots=data["slots"],
             )
-        except (KeyError, ValueError) as exc:
+        except (KeyError, ValueError, AttributeError, TypeError) as exc:
             raise ValueError(
                 f"dict: {data} is not a valid dictionary for an armor piece. {exc}"
             )
 
-    def print_to_console(self):
+    @profiled("render")
+    def print_to_console(self, console: "Console | None" = None):
+        from rich.columns import Columns
+        from rich.panel import Panel
+        from rich.table import Table
+
         max_level = 5
-        console = Console()
+        if console is None:
+            console = get_console()
 
         skill_table = Table(show_edge=False, show_header=False)
         skill_table.add_column("Skill name")
@@ -131,7 +235,34 @@ class ArmorPiece:
         console.print(Columns([skill_panel, slot_panel]))
 
 
+class _PieceAttribute:
+    """
+    A piece of an ArmorSet. Setting the piece updates the skill and slot totals
+    of the set by removing the old piece and adding the new one.
+    """
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.attribute = f"_{name}"
+
+    def __get__(self, armor_set: "ArmorSet", owner: type | None = None):
+        if armor_set is None:
+            return self
+        return getattr(armor_set, self.attribute)
+
+    def __set__(self, armor_set: "ArmorSet", piece: ArmorPiece | None) -> None:
+        armor_set._update_totals(getattr(armor_set, self.attribute, None), piece)
+        setattr(armor_set, self.attribute, piece)
+
+
 class ArmorSet:
+    helm = _PieceAttribute()
+    chest = _PieceAttribute()
+    arm = _PieceAttribute()
+    waist = _PieceAttribute()
+    leg = _PieceAttribute()
+    # NOTE: Possibly create charm as seperate class? it has name + buff
+    charm = _PieceAttribute()
+
     def __init__(
         self,
         name: str,
@@ -142,13 +273,16 @@ class ArmorSet:
         leg: ArmorPiece | None = None,
         charm: ArmorPiece | None = None,
     ) -> None:
+        # Running totals of all pieces, kept up to date when a piece is set.
+        self._buffs = {}
+        self._slots = [0, 0, 0, 0]
+
         self.name = name
         self.helm = helm
         self.chest = chest
         self.arm = arm
         self.waist = waist
         self.leg = leg
-        # NOTE: Possibly create charm as seperate class? it has name + buff
         self.charm = charm
 
     def get_piece_names(self) -> dict[str, str]:
@@ -158,35 +292,70 @@ class ArmorSet:
             "gloves": self.arm.name if self.arm else "-",
             "waist": self.waist.name if self.waist else "-",
             "legs": self.leg.name if self.leg else "-",
+            "charm": self.charm.name if self.charm else "-",
         }
 
-    def get_buffs(self) -> dict[str, int]:
-        pieces = [self.helm, self.chest, self.arm, self.waist, self.leg]
-        buffs = {}
-
-        for piece in pieces:
-            if piece is None:
-                continue
-
-            for key, value in piece.buffs.items():
-                if key not in buffs:
-                    buffs[key] = 0
-                buffs[key] += value
-
-        return buffs
+    def get_buffs(self) -> Mapping[str, int]:
+        """
+        Returns a read-only view on the skill totals of the set.
+        """
+        return MappingProxyType(self._buffs)
 
     def get_decoration_slots(self) -> list[int]:
-        pieces = [self.helm, self.chest, self.arm, self.waist, self.leg]
-        slots = [0, 0, 0, 0]
+        return list(self._slots)
 
-        for piece in pieces:
+    def get_piece(self, armor_type: ArmorType) -> ArmorPiece | None:
+        match armor_type:
+            case ArmorType.HELM:
+                return self.helm
+            case ArmorType.CHEST:
+                return self.chest
+            case ArmorType.ARM:
+                return self.arm
+            case ArmorType.WAIST:
+                return self.waist
+            case ArmorType.LEG:
+                return self.leg
+            case ArmorType.CHARM:
+                return self.charm
+
+    def preview_replace(
+        self, armor_type: ArmorType, piece: ArmorPiece | None
+    ) -> tuple[dict[str, int], list[int]]:
+        """
+        Calculates what replacing the piece of the armor type would change,
+        without changing the set. Returns the new totals of the skills of the old
+        and the new piece (0 if the skill is lost) and the new decoration slots.
+        """
+        return self._get_changes(self.get_piece(armor_type), piece)
+
+    def _get_changes(
+        self, old_piece: ArmorPiece | None, new_piece: ArmorPiece | None
+    ) -> tuple[dict[str, int], list[int]]:
+        changes = {}
+        slots = list(self._slots)
+        for sign, piece in [(-1, old_piece), (1, new_piece)]:
             if piece is None:
                 continue
 
-            for i in range(len(slots)):
-                slots[i] += piece.slots[i]
+            for skill_id, level in piece.skills:
+                skill = get_skill_name(skill_id)
+                changes[skill] = changes.get(skill, self._buffs.get(skill, 0))
+                changes[skill] += sign * level
+            for i, amount in enumerate(piece.slots):
+                slots[i] += sign * amount
 
-        return slots
+        return changes, slots
+
+    def _update_totals(
+        self, old_piece: ArmorPiece | None, new_piece: ArmorPiece | None
+    ) -> None:
+        changes, self._slots = self._get_changes(old_piece, new_piece)
+        for skill, level in changes.items():
+            if level:
+                self._buffs[skill] = level
+            else:
+                self._buffs.pop(skill, None)
 
     def replace_piece(self, armor_type: ArmorType, piece: ArmorPiece):
         match armor_type:
@@ -200,6 +369,8 @@ class ArmorSet:
                 self.waist = piece
             case ArmorType.LEG:
                 self.leg = piece
+            case ArmorType.CHARM:
+                self.charm = piece
 
     def __repr__(self) -> str:
         return f"""ArmorSet(
@@ -220,6 +391,7 @@ class ArmorSet:
             "arm": self.arm.to_dict() if self.arm else None,
             "waist": self.waist.to_dict() if self.waist else None,
             "leg": self.leg.to_dict() if self.leg else None,
+            "charm": self.charm.to_dict() if self.charm else None,
         }
 
     @staticmethod
@@ -232,6 +404,8 @@ class ArmorSet:
                 arm=ArmorPiece.from_dict(data["arm"]),
                 waist=ArmorPiece.from_dict(data["waist"]),
                 leg=ArmorPiece.from_dict(data["leg"]),
+                # Sets that were saved before charms were supported have no charm.
+                charm=ArmorPiece.from_dict(data.get("charm")),
             )
 
         except (KeyError, ValueError) as exc:
@@ -239,9 +413,15 @@ class ArmorSet:
                 f"dict: {data} is not a valid dictionary for an armor set. \n{exc}"
             )
 
-    def print_to_console(self):
+    @profiled("render")
+    def print_to_console(self, console: "Console | None" = None):
+        from rich.columns import Columns
+        from rich.panel import Panel
+        from rich.table import Table
+
         max_level = 5
-        console = Console()
+        if console is None:
+            console = get_console()
 
         piece_table = Table(show_edge=False, show_header=False)
         piece_table.add_column("piece")
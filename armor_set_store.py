@@ -0,0 +1,303 @@
+import json
+import os
+import sqlite3
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from armor_data import ARMOR_SET_PATH, DATA_FOLDER, load_armor_sets
+from armor_set import ArmorSet
+from name_index import (MIN_SIMILARITY, SUGGESTION_LIMIT, get_similarity,
+                        get_trigrams)
+from spans import profiled
+
+ARMOR_SET_DB_FILE = "armor_sets.db"
+ARMOR_SET_DB_PATH = os.path.join(DATA_FOLDER, ARMOR_SET_DB_FILE)
+SCHEMA_VERSION = 2
+# The most candidates that share a trigram with a name to rank by similarity.
+MAX_NAME_CANDIDATES = 50
+DEFAULT_BATCH_SIZE = 20
+
+
+class ArmorSetStore:
+    """
+    Saved armor sets in a SQLite database with one row per set.
+    The names have a unique index, so looking up, creating or editing a set only
+    reads or writes that row instead of the whole collection.
+    The sets are listed in the order they were first saved.
+    The trigrams of the names are indexed for suggestions of similar names.
+    """
+
+    def __init__(self, path: str, json_path: str | None = None) -> None:
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self._migrate(json_path)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM armor_sets").fetchone()[0]
+
+    def __contains__(self, name: str) -> bool:
+        row = self.connection.execute(
+            "SELECT 1 FROM armor_sets WHERE name = ?", (name,)
+        ).fetchone()
+        return row is not None
+
+    def get(self, name: str) -> ArmorSet | None:
+        row = self.connection.execute(
+            "SELECT data FROM armor_sets WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._load_row(row[0])
+
+    def get_names(self) -> list[str]:
+        rows = self.connection.execute("SELECT name FROM armor_sets ORDER BY id")
+        return [name for (name,) in rows]
+
+    def load_all(self) -> list[ArmorSet]:
+        rows = self.connection.execute("SELECT data FROM armor_sets ORDER BY id")
+        armor_sets = [self._load_row(data) for (data,) in rows]
+        return [armor_set for armor_set in armor_sets if armor_set is not None]
+
+    def find_similar_names(self, name: str, limit: int = SUGGESTION_LIMIT) -> list[str]:
+        """
+        Returns the saved set names that are most similar to the name,
+        the candidates are found with the trigram index instead of comparing
+        the name with every saved set.
+        """
+        similar = self._get_similar_names(name)
+        matches = sorted(
+            (-similarity, candidate) for candidate, similarity in similar.items()
+        )
+        return [candidate for _, candidate in matches[:limit]]
+
+    def _get_similar_names(self, name: str) -> dict[str, float]:
+        """
+        Returns the similarity of the indexed names that are similar enough to the name.
+        """
+        trigrams = get_trigrams(name)
+        # Counting the shared trigrams before the join only looks up the names
+        # of the best candidates.
+        rows = self.connection.execute(
+            "SELECT name, shared FROM ("
+            "SELECT set_id, COUNT(*) AS shared FROM name_trigrams "
+            f"WHERE trigram IN ({', '.join('?' * len(trigrams))}) "
+            "GROUP BY set_id ORDER BY shared DESC LIMIT ?) "
+            "JOIN armor_sets ON armor_sets.id = set_id",
+            [*trigrams, MAX_NAME_CANDIDATES],
+        )
+        similar = {}
+        for candidate, shared in rows:
+            similarity = get_similarity(
+                shared, len(trigrams), len(get_trigrams(candidate))
+            )
+            if similarity >= MIN_SIMILARITY:
+                similar[candidate] = similarity
+        return similar
+
+    def save(self, armor_set: ArmorSet) -> None:
+        """
+        Creates the set or replaces the saved set with the same name.
+        """
+        with self._transaction():
+            self._insert([armor_set], replace=True)
+
+    def save_all(self, armor_sets: list[ArmorSet]) -> None:
+        """
+        Creates or replaces the sets in a single transaction.
+        """
+        with self._transaction():
+            self._insert(armor_sets, replace=True)
+
+    def _insert(self, armor_sets: list[ArmorSet], replace: bool = False) -> None:
+        conflict = "DO UPDATE SET data = excluded.data" if replace else "DO NOTHING"
+        self.connection.executemany(
+            f"INSERT INTO armor_sets (name, data) VALUES (?, ?) "
+            f"ON CONFLICT (name) {conflict}",
+            (
+                (armor_set.name, json.dumps(armor_set.to_dict()))
+                for armor_set in armor_sets
+            ),
+        )
+        self._index_names([armor_set.name for armor_set in armor_sets])
+
+    def _index_names(self, names: list[str]) -> None:
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO name_trigrams (trigram, set_id) "
+            "SELECT ?, id FROM armor_sets WHERE name = ?",
+            ((trigram, name) for name in names for trigram in get_trigrams(name)),
+        )
+
+    @profiled("ArmorSet.from_dict")
+    def _load_row(self, data: str) -> ArmorSet | None:
+        try:
+            return ArmorSet.from_dict(json.loads(data))
+        except (json.JSONDecodeError, ValueError) as exc:
+            print(f"Failed to load armor set: {exc}")
+            return None
+
+    def _migrate(self, json_path: str | None) -> None:
+        """
+        Creates the tables the first time the database is opened and moves the sets
+        of the json file into it. The schema version is stored in the database,
+        so the json file is only migrated once.
+        Version 2 added the trigram index of the names.
+        """
+        with self._transaction():
+            version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                return
+
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS armor_sets ("
+                "id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, data TEXT NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS name_trigrams ("
+                "trigram TEXT NOT NULL, "
+                "set_id INTEGER NOT NULL REFERENCES armor_sets (id), "
+                "PRIMARY KEY (trigram, set_id)) WITHOUT ROWID"
+            )
+            if version == 1:
+                rows = self.connection.execute("SELECT name FROM armor_sets")
+                self._index_names([name for (name,) in rows])
+            elif json_path is not None and os.path.exists(json_path):
+                # Older versions allowed duplicate names, the first set is kept.
+                armor_sets = load_armor_sets(json_path)
+                self._insert(armor_sets)
+                print(f"Migrated {len(armor_sets)} armor sets from {json_path}")
+
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+
+class BufferedArmorSetStore(ArmorSetStore):
+    """
+    An armor set store for a long running session like the shell.
+    Loaded sets are kept in memory, so a set is only read from the database once.
+    Saved sets are written in batches of batch_size sets in a single transaction,
+    the remaining changes are written by flush or when the store is closed.
+    With a batch size of 0 the changes are only written by flush or close.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        json_path: str | None = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        super().__init__(path, json_path)
+        self.batch_size = batch_size
+        self._sets: dict[str, ArmorSet | None] = {}
+        self._names: dict[str, None] | None = None
+        self._pending: dict[str, ArmorSet] = {}
+
+    def close(self) -> None:
+        self.flush()
+        super().close()
+
+    def __len__(self) -> int:
+        return len(self._get_names())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._get_names()
+
+    def get(self, name: str) -> ArmorSet | None:
+        if name not in self._sets:
+            self._sets[name] = super().get(name)
+        return self._sets[name]
+
+    def get_names(self) -> list[str]:
+        return list(self._get_names())
+
+    def load_all(self) -> list[ArmorSet]:
+        if any(name not in self._sets for name in self._get_names()):
+            rows = self.connection.execute("SELECT name, data FROM armor_sets")
+            for name, data in rows:
+                if name not in self._sets:
+                    self._sets[name] = self._load_row(data)
+
+        armor_sets = [self._sets.get(name) for name in self._get_names()]
+        return [armor_set for armor_set in armor_sets if armor_set is not None]
+
+    def save(self, armor_set: ArmorSet) -> None:
+        self._pending[armor_set.name] = armor_set
+        self._sets[armor_set.name] = armor_set
+        self._get_names()[armor_set.name] = None
+        if self.batch_size and len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def save_all(self, armor_sets: list[ArmorSet]) -> None:
+        for armor_set in armor_sets:
+            self.save(armor_set)
+
+    def get_pending_count(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> None:
+        """
+        Writes the sets that were saved since the last flush in one transaction.
+        """
+        if not self._pending:
+            return
+
+        # The pending sets are written as they are now, including later edits.
+        super().save_all(list(self._pending.values()))
+        self._pending.clear()
+
+    def _get_similar_names(self, name: str) -> dict[str, float]:
+        # The names of the pending sets are only indexed when they are written,
+        # they are compared with the name here instead of flushing them.
+        similar = super()._get_similar_names(name)
+        trigrams = get_trigrams(name)
+        for candidate in self._pending:
+            candidate_trigrams = get_trigrams(candidate)
+            similarity = get_similarity(
+                len(trigrams & candidate_trigrams),
+                len(trigrams),
+                len(candidate_trigrams),
+            )
+            if similarity >= MIN_SIMILARITY:
+                similar[candidate] = similarity
+        return similar
+
+    def _get_names(self) -> dict[str, None]:
+        if self._names is None:
+            self._names = dict.fromkeys(super().get_names())
+        return self._names
+
+
+def open_armor_set_store(
+    path: str = ARMOR_SET_DB_PATH,
+    json_path: str = ARMOR_SET_PATH,
+    batch_size: int | None = None,
+) -> ArmorSetStore:
+    """
+    Opens the saved armor sets. With a batch size the changes are buffered,
+    see BufferedArmorSetStore.
+    """
+    folder = os.path.dirname(path)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+
+    if batch_size is not None:
+        return BufferedArmorSetStore(path, json_path, batch_size)
+    return ArmorSetStore(path, json_path)
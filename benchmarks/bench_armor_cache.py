@@ -0,0 +1,106 @@
+"""
+Compares the cold start of a single armor piece lookup when the armor data is
+parsed from json and when it is memory-mapped from the binary cache.
+Every measurement runs in a new python process, so the time and RSS
+include the interpreter start, like a run of main.py would.
+
+Usage: python benchmarks/bench_armor_cache.py [--scale 3] [--runs 10]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalogue import generate_armor_data
+from timing import Timer
+
+from armor_cache import write_armor_cache
+
+LOOKUP_JSON = """
+import json
+with open({path!r}) as file:
+    armor_data = json.load(file)
+armor_data["master"]["master-set-1"]["head"]
+"""
+
+LOOKUP_CACHE = """
+import sys
+sys.path.insert(0, {root!r})
+from armor_cache import open_armor_cache
+armor_data = open_armor_cache({path!r})
+armor_data["master"]["master-set-1"]["head"]
+"""
+
+
+# ru_maxrss is inherited from the parent process on fork, so read VmRSS instead.
+PRINT_RSS = """
+with open("/proc/self/status") as file:
+    print([line.split()[1] for line in file if line.startswith("VmRSS")][0])
+"""
+
+
+def measure_process(code: str, runs: int) -> dict[str, float]:
+    times = []
+    rss = []
+    for _ in range(runs):
+        with Timer() as timer:
+            result = subprocess.run(
+                [sys.executable, "-c", code + PRINT_RSS],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+        times.append(timer.ms)
+        rss.append(int(result.stdout.split()[-1]))
+
+    return {
+        "median_ms": statistics.median(times),
+        "min_ms": min(times),
+        "rss_kb": statistics.median(rss),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        json_path = os.path.join(folder, "armor_data.json")
+        cache_path = os.path.join(folder, "armor_data.bin")
+        armor_data = generate_armor_data(args.scale)
+        with open(json_path, "w") as file:
+            json.dump(armor_data, file)
+        write_armor_cache(armor_data, cache_path)
+
+        baseline = measure_process("pass", args.runs)
+        cache = measure_process(
+            LOOKUP_CACHE.format(root=ROOT, path=cache_path), args.runs
+        )
+        json_result = measure_process(LOOKUP_JSON.format(path=json_path), args.runs)
+
+        print(f"json size:  {os.path.getsize(json_path) / 1024:.0f} KiB")
+        print(f"cache size: {os.path.getsize(cache_path) / 1024:.0f} KiB")
+        for name, result in [
+            ("interpreter", baseline),
+            ("cache", cache),
+            ("json", json_result),
+        ]:
+            print(
+                f"{name:<12} median {result['median_ms']:.1f} ms"
+                f"  min {result['min_ms']:.1f} ms"
+                f"  rss {result['rss_kb']:.0f} KiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Measures the memory of loading saved armor sets with tracemalloc.
+The saved sets are generated from a small catalogue, like real saved sets that
+reuse the same pieces, and loaded once with the shared (flyweight) ArmorPiece and
+once with a copy of the previous model that kept the buffs dict and slots list
+of every piece.
+
+Usage: python benchmarks/bench_armor_pieces.py [--sets 10000] [--catalogue 300]
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from timing import Timer
+
+from armor_set import ArmorPiece, ArmorRank, ArmorSet, ArmorType
+
+PIECE_KEYS = ["helm", "chest", "arm", "waist", "leg"]
+
+
+class LegacyArmorPiece:
+    """
+    The armor piece before it used __slots__, interned skills and flyweights.
+    """
+
+    def __init__(self, armor_type, rank, name, buffs, slots) -> None:
+        self.name = name
+        self.armor_type = armor_type
+        self.rank = rank
+        self.buffs = buffs
+        self.slots = slots
+
+    @staticmethod
+    def from_dict(data):
+        if not data:
+            return None
+        return LegacyArmorPiece(
+            name=data["name"],
+            armor_type=ArmorType.from_str(data["type"]),
+            rank=ArmorRank.from_str(data["rank"]),
+            buffs=data["buffs"],
+            slots=data["slots"],
+        )
+
+
+def legacy_set_from_dict(data):
+    return ArmorSet(
+        data["name"], *(LegacyArmorPiece.from_dict(data[key]) for key in PIECE_KEYS)
+    )
+
+
+def generate_saved_sets(set_count: int, catalogue_size: int, seed: int = 0) -> str:
+    generator = random.Random(seed)
+    skills = [f"Skill {i}" for i in range(150)]
+    types = ["head", "chest", "gloves", "waist", "legs"]
+    saved_sets = []
+    for i in range(set_count):
+        armor_set = {"name": f"set-{i}"}
+        for key, armor_type in zip(PIECE_KEYS, types):
+            piece = generator.randrange(catalogue_size)
+            piece_generator = random.Random(f"{armor_type}-{piece}")
+            armor_set[key] = {
+                "name": f"piece-{piece}",
+                "type": armor_type,
+                "rank": "master",
+                "buffs": {
+                    skill: piece_generator.randint(1, 3)
+                    for skill in piece_generator.sample(skills, 2)
+                },
+                "slots": [piece_generator.randint(0, 1) for _ in range(4)],
+            }
+        saved_sets.append(armor_set)
+
+    # Like load_armor_sets, the sets are parsed from json, so no dicts are shared.
+    return json.dumps(saved_sets)
+
+
+def measure_memory(saved_sets: str, from_dict) -> dict[str, float]:
+    """
+    Returns the memory that is still allocated after the sets are loaded
+    (the parsed json is released) and the peak while loading them.
+    """
+    gc.collect()
+    ArmorPiece.clear_shared()
+    tracemalloc.start()
+    with Timer() as timer:
+        data = json.loads(saved_sets)
+        armor_sets = [from_dict(armor_set) for armor_set in data]
+        del data
+        gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert len(armor_sets) > 0
+    return {"current": current, "peak": peak, "ms": timer.ms}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sets", type=int, default=10000)
+    parser.add_argument("--catalogue", type=int, default=300, help="Pieces per type")
+    args = parser.parse_args()
+
+    saved_sets = generate_saved_sets(args.sets, args.catalogue)
+    print(f"{args.sets} saved sets, {len(saved_sets) / 1024:.0f} KiB of json")
+
+    legacy = measure_memory(saved_sets, legacy_set_from_dict)
+    shared = measure_memory(saved_sets, ArmorSet.from_dict)
+    for name, result in [("legacy", legacy), ("shared", shared)]:
+        print(
+            f"{name:<8} retained {result['current'] / 1024:8.0f} KiB"
+            f"  peak {result['peak'] / 1024:8.0f} KiB"
+            f"  load {result['ms']:.0f} ms"
+        )
+    print(f"retained memory: {shared['current'] / legacy['current']:.2f}x of legacy")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compares the latency of a single edit command (look up a saved set by name,
+replace a piece and save it) with the json file and with the SQLite store
+for growing numbers of saved sets.
+
+Usage: python benchmarks/bench_armor_set_store.py [--sizes 100 1000 10000 30000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from timing import measure
+
+from armor_data import load_armor_sets, save_armor_sets
+from armor_set import ArmorPiece, ArmorRank, ArmorSet, ArmorType
+from armor_set_store import ArmorSetStore
+
+
+def make_armor_set(number: int) -> ArmorSet:
+    return ArmorSet(
+        f"set-{number}",
+        *(
+            ArmorPiece.shared(
+                armor_type, ArmorRank.MR, f"piece-{number % 50}", {"Skill": 1}, [0] * 4
+            )
+            for armor_type in list(ArmorType)[:5]
+        ),
+    )
+
+
+def edit_json(folder: str, name: str, piece: ArmorPiece) -> None:
+    armor_sets = load_armor_sets(os.path.join(folder, "armor_sets.json"))
+    armor_set = next(armor_set for armor_set in armor_sets if armor_set.name == name)
+    armor_set.replace_piece(piece.armor_type, piece)
+    save_armor_sets(armor_sets, folder, "armor_sets.json")
+
+
+def edit_store(path: str, name: str, piece: ArmorPiece) -> None:
+    with ArmorSetStore(path) as store:
+        armor_set = store.get(name)
+        armor_set.replace_piece(piece.armor_type, piece)
+        store.save(armor_set)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    piece = ArmorPiece.shared(ArmorType.LEG, ArmorRank.MR, "new", {"Other": 2}, [1] * 4)
+    print(f"{'sets':>8} {'json ms':>10} {'sqlite ms':>10}")
+    for size in args.sizes:
+        armor_sets = [make_armor_set(number) for number in range(size)]
+        name = f"set-{size // 2}"
+        with tempfile.TemporaryDirectory() as folder:
+            save_armor_sets(armor_sets, folder, "armor_sets.json")
+            db_path = os.path.join(folder, "armor_sets.db")
+            with ArmorSetStore(db_path) as store:
+                store.save_all(armor_sets)
+
+            json_ms = statistics.median(
+                measure(lambda: edit_json(folder, name, piece), args.runs)
+            )
+            store_ms = statistics.median(
+                measure(lambda: edit_store(db_path, name, piece), args.runs)
+            )
+            print(f"{size:>8} {json_ms:>10.2f} {store_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
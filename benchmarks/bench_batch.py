@@ -0,0 +1,99 @@
+"""
+Compares running a script of create/edit/list commands with the batch action
+against one process per command. The per process time is measured on the first
+--sample commands and extrapolated to the whole script.
+The commands run in a temporary folder with a generated armor catalogue.
+
+Usage: python benchmarks/bench_batch.py [--scale 3] [--commands 600] [--sample 20]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalogue import generate_armor_data
+from timing import Timer
+
+MAIN = os.path.join(ROOT, "main.py")
+
+
+def get_commands(count: int) -> list[list[str]]:
+    commands = []
+    for number in range(count):
+        name = f"build-{number // 3}"
+        piece = f"master-set-{number % 50 + 1}"
+        match number % 3:
+            case 0:
+                commands.append(["create", "-r", "master", "-n", name, "--head", piece])
+            case 1:
+                commands.append(
+                    ["edit", "-n", name, "-r", "master", "-p", "legs"]
+                    + ["--new-piece", piece]
+                )
+            case 2:
+                commands.append(["list", "set", "-n", name])
+    return commands
+
+
+def prepare_folder(folder: str, scale: int, commands: list[list[str]]) -> str:
+    os.makedirs(os.path.join(folder, "data"))
+    with open(os.path.join(folder, "data", "armor_data.json"), "w") as file:
+        json.dump(generate_armor_data(scale), file)
+
+    path = os.path.join(folder, "commands.jsonl")
+    with open(path, "w") as file:
+        for command in commands:
+            file.write(f"{json.dumps(command)}\n")
+
+    # The first run builds the binary cache of the armor data.
+    run(folder, ["list", "all-sets"])
+    return path
+
+
+def run(folder: str, arguments: list[str]) -> float:
+    with Timer() as timer:
+        subprocess.run(
+            [sys.executable, MAIN, *arguments],
+            cwd=folder,
+            check=True,
+            capture_output=True,
+        )
+    return timer.ms / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=3)
+    parser.add_argument("--commands", type=int, default=600)
+    parser.add_argument("--sample", type=int, default=20)
+    args = parser.parse_args()
+
+    commands = get_commands(args.commands)
+    with tempfile.TemporaryDirectory() as folder:
+        prepare_folder(folder, args.scale, commands)
+        sample = sum(run(folder, command) for command in commands[: args.sample])
+        total = sample / args.sample * len(commands)
+        print(
+            f"{'processes':<18} {total:7.2f} s  {len(commands) / total:7.0f} commands/s"
+            f"  (extrapolated from {args.sample} commands)"
+        )
+
+    for checkpoint in [0, 50]:
+        with tempfile.TemporaryDirectory() as folder:
+            path = prepare_folder(folder, args.scale, commands)
+            total = run(folder, ["batch", "-f", path, "--checkpoint", str(checkpoint)])
+            label = f"batch checkpoint {checkpoint}"
+            print(
+                f"{label:<18} {total:7.2f} s  {len(commands) / total:7.0f} commands/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
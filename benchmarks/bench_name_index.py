@@ -0,0 +1,99 @@
+"""
+Measures the "did you mean" lookups: a fuzzy search in the trigram index of the
+armor set names of a rank, loading the cached indexes, and the suggestions for a
+saved set name from the trigram table of the saved sets.
+Compares them with ranking every name by difflib similarity.
+
+Usage: python benchmarks/bench_name_index.py [--sets 4000] [--saved 3000]
+"""
+
+import argparse
+import difflib
+import json
+import os
+import random
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from timing import Timer
+
+from armor_data import load_name_indexes
+from armor_set import ArmorSet
+from armor_set_store import ArmorSetStore
+from name_index import NameIndex
+
+WORDS = ["kulu", "ya", "ku", "rathalos", "legiana", "nergigante", "anja", "jyura"]
+SUFFIXES = ["alpha", "beta", "alpha+", "beta+", "gamma"]
+
+
+def generate_names(count: int, seed: int = 1) -> list[str]:
+    random_state = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        words = random_state.sample(WORDS, 2) + [random_state.choice(SUFFIXES)]
+        names.add(f"{'-'.join(words)}-{random_state.randrange(100)}")
+    return sorted(names)
+
+
+def misspell(name: str, random_state: random.Random) -> str:
+    position = random_state.randrange(len(name))
+    return name[:position] + name[position + 1 :]
+
+
+def measure_queries(function, queries: list[str]) -> float:
+    """
+    Returns the mean duration of a query in ms.
+    """
+    with Timer() as timer:
+        for query in queries:
+            function(query)
+    return timer.ms / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sets", type=int, default=4000, help="Armor sets per rank")
+    parser.add_argument("--saved", type=int, default=3000, help="Saved armor sets")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    random_state = random.Random(2)
+    names = generate_names(args.sets)
+    queries = [
+        misspell(random_state.choice(names), random_state) for _ in range(args.queries)
+    ]
+
+    index = NameIndex.build(names)
+    index_ms = measure_queries(index.suggest, queries)
+    print(f"index search        {index_ms:8.3f} ms per query")
+    difflib_ms = measure_queries(
+        lambda query: difflib.get_close_matches(query, names), queries[:20]
+    )
+    print(f"difflib scan        {difflib_ms:8.3f} ms per query")
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "armor_data.json")
+        with open(path, "w") as file:
+            json.dump({"master": {name: {} for name in names}}, file)
+        load_name_indexes(path)
+        with Timer() as timer:
+            load_name_indexes(path)
+        print(f"load cached index   {timer.ms:8.3f} ms")
+
+        saved_names = generate_names(args.saved, seed=3)
+        with ArmorSetStore(os.path.join(folder, "armor_sets.db")) as store:
+            store.save_all([ArmorSet(name) for name in saved_names])
+            saved_queries = [
+                misspell(random_state.choice(saved_names), random_state)
+                for _ in range(args.queries)
+            ]
+            saved_ms = measure_queries(store.find_similar_names, saved_queries)
+            print(f"saved set search    {saved_ms:8.3f} ms per query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Measures listing the full catalogue in each output format: the names of all
+armor sets (list all-pieces) and every piece (query without filters).
+Each listing runs in a new process with stdout going to /dev/null, like a pipe,
+in a temporary folder with a generated armor catalogue.
+
+Usage: python benchmarks/bench_output.py [--scale 30] [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalogue import generate_armor_data
+from timing import measure
+
+from output import FORMATS
+
+MAIN = os.path.join(ROOT, "main.py")
+LISTINGS = {
+    "list all-pieces": ["list", "all-pieces"],
+    "query (all pieces)": ["query"],
+}
+
+
+def run(folder: str, arguments: list[str]) -> None:
+    subprocess.run(
+        [sys.executable, MAIN, *arguments],
+        cwd=folder,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=30)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        os.makedirs(os.path.join(folder, "data"))
+        with open(os.path.join(folder, "data", "armor_data.json"), "w") as file:
+            json.dump(generate_armor_data(args.scale), file)
+        # The first run builds the binary cache and the catalogue.
+        run(folder, ["query"])
+
+        for listing, arguments in LISTINGS.items():
+            for format in FORMATS:
+                times = measure(
+                    lambda: run(folder, [*arguments, "--format", format]), args.runs
+                )
+                print(f"{listing:<20} {format:<6} {statistics.median(times):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Compares the sort-and-sweep Pareto filter with comparing every pair of points,
+on random candidate builds with objectives like the ones of the Pareto search
+(target levels, defense, two resistances and slot capacity),
+and times the Pareto build search on a generated catalogue. Fails when a search
+at the real size takes longer than MAX_SEARCH_MS.
+
+Usage: python benchmarks/bench_pareto.py [--points 2000 20000] [--scale 1]
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalogue import generate_armor_data
+from timing import Timer
+
+from armor_matrix import compile_rank
+from build_search import search_pareto_armor_sets
+from pareto import pareto_filter
+
+RANK = "master"
+TARGETS = {"Skill 0": 3, "Skill 1": 2, "Skill 2": 2}
+# The frontier used to grow with every resistance and took minutes.
+RESISTANCE_CHOICES = [["fire", "ice"], ["fire", "water", "ice"]]
+MAX_SEARCH_MS = 10000
+# Pairwise filtering needs points x points values, skip it above this size.
+MAX_PAIRWISE_POINTS = 20000
+
+
+def pairwise_filter(points: np.ndarray) -> np.ndarray:
+    """
+    Compares every point with every other point, one row at a time.
+    """
+    _, unique = np.unique(points, axis=0, return_index=True)
+    unique.sort()
+    points = points[unique]
+    keep = [
+        not ((points >= point).all(axis=1) & (points > point).any(axis=1)).any()
+        for point in points
+    ]
+    return unique[keep]
+
+
+def generate_points(count: int, seed: int = 0) -> np.ndarray:
+    generator = np.random.default_rng(seed)
+    return np.column_stack(
+        [
+            generator.integers(0, 6, count),
+            generator.integers(500, 1000, count),
+            generator.integers(-15, 15, (count, 2)),
+            generator.integers(0, 40, count),
+        ]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, nargs="+", default=[2000, 20000])
+    parser.add_argument("--scale", type=int, default=1)
+    args = parser.parse_args()
+
+    for count in args.points:
+        points = generate_points(count)
+        with Timer() as sweep:
+            frontier = pareto_filter(points)
+        line = f"{count:>8} points: sweep {sweep.ms:10.1f} ms"
+        if count <= MAX_PAIRWISE_POINTS:
+            with Timer() as pairwise:
+                expected = pairwise_filter(points)
+            assert sorted(frontier.tolist()) == expected.tolist()
+            line += f", pairwise {pairwise.ms:10.1f} ms"
+        print(f"{line} ({len(frontier)} on the frontier)")
+
+    armor_data = generate_armor_data(args.scale)
+    compiled = compile_rank(armor_data[RANK])
+    for resistances in RESISTANCE_CHOICES:
+        with Timer() as search:
+            count, _ = search_pareto_armor_sets(
+                armor_data, RANK, TARGETS, resistances, limit=10, compiled=compiled
+            )
+        print(
+            f"search_pareto_armor_sets at {args.scale}x, {'+'.join(resistances)}: "
+            f"{search.ms:10.1f} ms ({count} sets on the frontier)"
+        )
+        if args.scale == 1 and search.ms > MAX_SEARCH_MS:
+            sys.exit(f"The search took longer than {MAX_SEARCH_MS} ms")
+
+
+if __name__ == "__main__":
+    main()
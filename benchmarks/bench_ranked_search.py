@@ -0,0 +1,97 @@
+"""
+Compares ranking the best builds of a search by collecting every matching build
+and sorting them with the bounded ranking of search_ranked_armor_sets, which
+keeps only the best builds and prunes partial builds that can not beat them.
+Reports the time, the time until the first result and the peak memory
+(measured in a second run with tracemalloc) on a generated catalogue.
+
+Usage: python benchmarks/bench_ranked_search.py [--scale 3] [--limit 10]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalogue import generate_armor_data
+from timing import Timer
+
+from armor_matrix import compile_rank
+from build_search import (SCORES, BuildRanking, BuildSearch,
+                          _resolve_skill_ids, get_piece_scores, rank_builds,
+                          search_builds)
+
+TARGETS = [
+    {"Skill 0": 3, "Skill 1": 3},
+    {"Skill 0": 4, "Skill 1": 2, "Skill 2": 2},
+]
+
+
+def collect_and_sort(compiled, skill_ids, targets, piece_scores, limit, first):
+    search = BuildSearch(compiled, skill_ids, targets, piece_scores)
+    builds = []
+    for build in search_builds(compiled, skill_ids, targets):
+        if not builds:
+            first.append(time.perf_counter())
+        builds.append((search.get_score(build), build))
+    builds.sort(key=lambda scored: -scored[0])
+    return builds[:limit]
+
+
+def rank(compiled, skill_ids, targets, piece_scores, limit, first):
+    ranking = BuildRanking(limit)
+    for _ in rank_builds(compiled, skill_ids, targets, ranking, piece_scores):
+        if not first:
+            first.append(time.perf_counter())
+    return ranking.get_builds()
+
+
+def measure_search(function, *args) -> tuple[float, float, float, int]:
+    """
+    Returns the duration and the time until the first result in ms,
+    the peak memory in bytes and the number of results.
+    """
+    first = []
+    with Timer() as timer:
+        results = function(*args, first)
+    first_result = (first[0] - timer.start) * 1000 if first else timer.ms
+
+    tracemalloc.start()
+    function(*args, [])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return timer.ms, first_result, peak, len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--score", choices=SCORES, default="skills")
+    args = parser.parse_args()
+
+    compiled = compile_rank(generate_armor_data(args.scale)["master"])
+    piece_scores = get_piece_scores(compiled, args.score)
+    for targets in TARGETS:
+        skill_ids = _resolve_skill_ids(compiled, targets)
+        levels = list(targets.values())
+        matches = sum(1 for _ in search_builds(compiled, skill_ids, levels))
+        print(f"{targets}: {matches} matching builds")
+        for name, function in [("collect + sort", collect_and_sort), ("ranked", rank)]:
+            duration, first_result, peak, _ = measure_search(
+                function, compiled, skill_ids, levels, piece_scores, args.limit
+            )
+            print(
+                f"  {name:<16} {duration:10.1f} ms, "
+                f"first result {first_result:8.2f} ms, "
+                f"peak {peak / 1024 / 1024:8.2f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
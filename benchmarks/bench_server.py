@@ -0,0 +1,175 @@
+"""
+Load test of the serve action against localhost. Starts the server in a
+temporary folder with a generated armor catalogue and a saved set, then keeps
+a number of keep-alive connections busy with one kind of request for a few
+seconds and reports the requests per second and the p50/p99 latency.
+
+Usage: python benchmarks/bench_server.py [--scale 3] [--connections 32]
+       [--duration 3] [--workers 2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalogue import generate_armor_data
+
+from armor_set import ArmorPiece, ArmorSet
+from armor_set_store import ArmorSetStore
+
+MAIN = os.path.join(ROOT, "main.py")
+
+
+def get_scenarios(connection: int) -> dict[str, tuple[str, str, dict | None]]:
+    return {
+        "GET /sets/<name>": ("GET", "/sets/set-a", None),
+        "GET /pieces query": (
+            "GET",
+            "/pieces?rank=master&piece=legs&skills=Skill%201=2",
+            None,
+        ),
+        "GET /compare": ("GET", "/compare?names=set-a,set-b", None),
+        "POST /search same": (
+            "POST",
+            "/search",
+            {"rank": "master", "skills": {"Skill 1": 3}, "limit": 5},
+        ),
+        "POST /search mixed": (
+            "POST",
+            "/search",
+            {
+                "rank": "master",
+                "skills": {f"Skill {connection % 8 + 1}": 3},
+                "limit": 5,
+            },
+        ),
+    }
+
+
+def prepare_data(folder: str, scale: int) -> None:
+    data_folder = os.path.join(folder, "data")
+    os.makedirs(data_folder)
+    armor_data = generate_armor_data(scale)
+    with open(os.path.join(data_folder, "armor_data.json"), "w") as file:
+        json.dump(armor_data, file)
+
+    with ArmorSetStore(os.path.join(data_folder, "armor_sets.db")) as store:
+        for name, set_name in [("set-a", "master-set-1"), ("set-b", "master-set-2")]:
+            store.save(
+                ArmorSet(
+                    name,
+                    ArmorPiece.new("head", "master", set_name, armor_data),
+                    ArmorPiece.new("chest", "master", set_name, armor_data),
+                )
+            )
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_connection(
+    port: int, request: tuple[str, str, dict | None], deadline: float
+) -> list[float]:
+    method, path, body = request
+    content = json.dumps(body).encode() if body is not None else b""
+    message = (
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Length: {len(content)}\r\n\r\n"
+    ).encode() + content
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    latencies = []
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        writer.write(message)
+        status = await reader.readline()
+        length = 0
+        while (header := await reader.readline()) != b"\r\n":
+            if header.lower().startswith(b"content-length:"):
+                length = int(header.split(b":")[1])
+        await reader.readexactly(length)
+        if b" 200 " not in status:
+            raise RuntimeError(f"{method} {path} failed: {status.decode().strip()}")
+        latencies.append(time.perf_counter() - start)
+
+    writer.close()
+    return latencies
+
+
+async def load_test(port: int, scenario: str, connections: int, duration: float):
+    deadline = time.perf_counter() + duration
+    results = await asyncio.gather(
+        *(
+            run_connection(port, get_scenarios(connection)[scenario], deadline)
+            for connection in range(connections)
+        )
+    )
+    latencies = sorted(latency for result in results for latency in result)
+    return (
+        len(latencies) / duration,
+        latencies[len(latencies) // 2],
+        latencies[int(len(latencies) * 0.99)],
+    )
+
+
+def wait_for_server(port: int, timeout: float = 30) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port)).close()
+            return
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+    raise RuntimeError("The server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=3)
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=3)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        prepare_data(folder, args.scale)
+        port = get_free_port()
+        server = subprocess.Popen(
+            [sys.executable, MAIN, "serve", "--port", str(port)]
+            + ["--workers", str(args.workers)],
+            cwd=folder,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_server(port)
+            for scenario in get_scenarios(0):
+                # A short warm up, e.g. for the catalogue and the compiled rank.
+                asyncio.run(load_test(port, scenario, 1, 0.2))
+                per_second, p50, p99 = asyncio.run(
+                    load_test(port, scenario, args.connections, args.duration)
+                )
+                print(
+                    f"{scenario:<20} {per_second:8.0f} req/s"
+                    f"  p50 {p50 * 1000:7.2f} ms  p99 {p99 * 1000:7.2f} ms"
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Compares running a sequence of edit/list/compare commands as one process per
+command against running the same commands in a single shell session, where
+the armor data, the indexes and the saved sets stay loaded between commands.
+The commands run in a temporary folder with a generated armor catalogue.
+
+Usage: python benchmarks/bench_shell.py [--scale 3] [--commands 60]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalogue import generate_armor_data
+from timing import Timer
+
+from armor_set_store import open_armor_set_store
+from main import run_shell_command
+from session import Session
+
+MAIN = os.path.join(ROOT, "main.py")
+
+
+def get_commands(count: int) -> list[str]:
+    commands = ["create -r master -n build --head master-set-1 --chest master-set-2"]
+    for number in range(count):
+        commands.append(
+            "edit -n build -r master -p legs --new-piece "
+            f"master-set-{number % 50 + 1}"
+        )
+        commands.append("list set -n build")
+        commands.append('list skill -n "Skill 1" -r master -p legs')
+    return commands[: count + 1]
+
+
+def get_action(command: str) -> str:
+    words = command.split()
+    return " ".join(words[:2]) if words[0] == "list" else words[0]
+
+
+def run_processes(folder: str, commands: list[str]) -> float:
+    with Timer() as timer:
+        for command in commands:
+            subprocess.run(
+                [sys.executable, MAIN, *shlex.split(command)],
+                cwd=folder,
+                check=True,
+                capture_output=True,
+            )
+    return timer.ms / 1000
+
+
+def run_shell(folder: str, commands: list[str]) -> tuple[float, dict[str, float]]:
+    """
+    Returns the time of the first command, which loads the data,
+    and the median time of the other commands per action.
+    """
+    times = {}
+    cwd = os.getcwd()
+    os.chdir(folder)
+    try:
+        session = Session(open_armor_set_store(batch_size=20))
+        with contextlib.redirect_stdout(io.StringIO()):
+            for command in commands:
+                with Timer() as timer:
+                    run_shell_command(command, session)
+                times.setdefault(get_action(command), []).append(timer.ms / 1000)
+            session.close()
+    finally:
+        os.chdir(cwd)
+
+    first = times.pop(get_action(commands[0]))[0]
+    return first, {action: statistics.median(t) for action, t in times.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=3)
+    parser.add_argument("--commands", type=int, default=60)
+    args = parser.parse_args()
+
+    commands = get_commands(args.commands)
+    for name, run in [("processes", run_processes), ("shell", run_shell)]:
+        with tempfile.TemporaryDirectory() as folder:
+            os.makedirs(os.path.join(folder, "data"))
+            with open(os.path.join(folder, "data", "armor_data.json"), "w") as file:
+                json.dump(generate_armor_data(args.scale), file)
+
+            if name == "processes":
+                total = run(folder, commands)
+                print(
+                    f"{name:<10} {len(commands)} commands {total * 1000:8.1f} ms"
+                    f"  per command {total / len(commands) * 1000:6.2f} ms"
+                )
+            else:
+                first, medians = run(folder, commands)
+                print(f"{name:<10} first command {first * 1000:6.1f} ms")
+                for action, median in medians.items():
+                    print(f"{'':<10} {action:<12} median {median * 1000:6.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Measures the startup cost of main.py per action: the import time of the
+modules main.py loads (python -X importtime) and the end-to-end wall time
+of running the action in a new process.
+The actions run in a temporary folder with a generated armor catalogue
+and two saved sets, so no data is synced from the remote database.
+
+Usage: python benchmarks/bench_startup.py [--scale 3] [--runs 5] [--imports 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalogue import generate_armor_data
+from timing import measure
+
+from armor_set import ArmorPiece, ArmorSet
+from armor_set_store import ArmorSetStore
+
+MAIN = os.path.join(ROOT, "main.py")
+ACTIONS = {
+    "list all-sets": ["list", "all-sets"],
+    "list set": ["list", "set", "-n", "set-a"],
+    "list skill": ["list", "skill", "-n", "Skill 1"],
+    "compare": ["compare", "set-a", "set-b"],
+    "query": ["query", "-r", "master", "-p", "legs", "-s", "Skill 1=1"],
+    "search": ["search", "-r", "master", "-s", "Skill 1=2", "-l", "1"],
+}
+
+
+def prepare_data(folder: str, scale: int) -> None:
+    data_folder = os.path.join(folder, "data")
+    os.makedirs(data_folder)
+    armor_data = generate_armor_data(scale)
+    with open(os.path.join(data_folder, "armor_data.json"), "w") as file:
+        json.dump(armor_data, file)
+
+    with ArmorSetStore(os.path.join(data_folder, "armor_sets.db")) as store:
+        for name, set_name in [("set-a", "master-set-1"), ("set-b", "master-set-2")]:
+            store.save(
+                ArmorSet(
+                    name,
+                    ArmorPiece.new("head", "master", set_name, armor_data),
+                    ArmorPiece.new("chest", "master", set_name, armor_data),
+                )
+            )
+
+    # The first run builds the binary cache and the catalogue.
+    run(folder, ACTIONS["query"])
+
+
+def run(folder: str, arguments: list[str], options: list[str] = []) -> str:
+    result = subprocess.run(
+        [sys.executable, *options, MAIN, *arguments],
+        cwd=folder,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return result.stderr
+
+
+def measure_imports(folder: str, arguments: list[str]) -> dict[str, float]:
+    """
+    Returns the cumulative import time in ms of every module that main.py imports
+    directly (the top level entries of -X importtime), without the site imports
+    that every python process does.
+    """
+    imports = {}
+    started = False
+    for line in run(folder, arguments, ["-X", "importtime"]).splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.strip() == "site":
+            started = True
+            continue
+        if started and not name.startswith("  "):
+            imports[name.strip()] = int(cumulative) / 1000
+
+    return imports
+
+
+def measure_wall(folder: str, arguments: list[str], runs: int) -> float:
+    return statistics.median(measure(lambda: run(folder, arguments), runs))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--imports", type=int, default=5, help="Slowest imports")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        prepare_data(folder, args.scale)
+        interpreter = measure_wall(folder, ["--help"], args.runs)
+        print(f"{'main.py --help':<16} wall {interpreter:7.1f} ms")
+
+        for action, arguments in ACTIONS.items():
+            imports = measure_imports(folder, arguments)
+            wall = measure_wall(folder, arguments, args.runs)
+            slowest = sorted(imports.items(), key=lambda item: -item[1])
+            print(
+                f"{action:<16} wall {wall:7.1f} ms"
+                f"  imports {sum(imports.values()):6.1f} ms  slowest: "
+                + ", ".join(f"{name} {ms:.1f}" for name, ms in slowest[: args.imports])
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Benchmark suite of the data paths of the tool on synthetic catalogues and saved
+set collections at multiples of the real mhw-db size (see catalogue.py):
+fetching and parsing the armor data from a local stub server, loading the armor
+data, saving and loading armor sets (json and SQLite), the skill and slot totals
+of a set, rendering and the build search.
+The results are written as json, so runs on different commits can be compared
+with --compare.
+
+Usage: python benchmarks/bench_suite.py [--scales 1 10 100] [--runs 3]
+                                        [--output results.json]
+                                        [--compare baseline.json]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalogue import (SCALES, generate_armor_data, generate_armor_sets,
+                       generate_remote_armor)
+from rich.console import Console
+from timing import measure
+
+from armor_data import (_get_remote_armor_data, get_armor_cache_path,
+                        load_armor_data, load_armor_sets, save_armor_sets)
+from armor_matrix import compile_rank
+from armor_set_store import ArmorSetStore
+from build_search import search_armor_sets
+from output import RecordWriter
+from tests.stub_server import StubServer
+
+# Rendering is measured on a fixed number of sets, it does not depend on the scale.
+RENDERED_SETS = 20
+SEARCH_RANK = "master"
+SEARCH_TARGETS = {"Skill 0": 2, "Skill 1": 2}
+SEARCH_LIMIT = 10
+
+
+def read_armor_data(armor_path: str) -> int:
+    """
+    Loads the armor data and reads every set, so the cache is measured with
+    decoding the sets and not only opening the file. Returns the number of sets.
+    """
+    armor_data = load_armor_data(armor_path)
+    count = 0
+    for rank in armor_data:
+        for _name, _armor_set in armor_data[rank].items():
+            count += 1
+    return count
+
+
+def run_scale(scale: int, runs: int) -> list[dict[str, Any]]:
+    remote_armor = generate_remote_armor(scale)
+    armor_data = generate_armor_data(scale)
+    armor_sets = generate_armor_sets(armor_data, scale)
+    pieces = [
+        {"rank": rank, "set": name, "type": armor_type, **piece}
+        for rank, rank_sets in armor_data.items()
+        for name, armor_set in rank_sets.items()
+        for armor_type, piece in armor_set.items()
+    ]
+    results = []
+
+    def record(benchmark: str, items: int, durations: list[float]) -> None:
+        median = statistics.median(durations)
+        results.append(
+            {
+                "benchmark": benchmark,
+                "scale": scale,
+                "items": items,
+                "median_ms": round(median, 3),
+                "min_ms": round(min(durations), 3),
+                "per_item_us": round(median / max(items, 1) * 1000, 3),
+                "runs": len(durations),
+            }
+        )
+        print(
+            f"{scale:>4}x {benchmark:<32} {median:10.2f} ms ({items} items)",
+            file=sys.stderr,
+        )
+
+    with tempfile.TemporaryDirectory() as folder:
+        stub = StubServer(chunk_size=64 * 1024)
+        stub.add_route("/armor", body=json.dumps(remote_armor).encode())
+        with stub:
+            record(
+                "fetch armor (stub)",
+                len(remote_armor),
+                measure(lambda: _get_remote_armor_data(stub.url + "/armor"), runs),
+            )
+
+        armor_path = os.path.join(folder, "armor_data.json")
+        with open(armor_path, "w") as file:
+            json.dump(armor_data, file)
+        cache_path = get_armor_cache_path(armor_path)
+        record(
+            "load_armor_data (json)",
+            len(pieces),
+            measure(
+                lambda: read_armor_data(armor_path),
+                runs,
+                setup=lambda: os.path.exists(cache_path) and os.remove(cache_path),
+            ),
+        )
+        record(
+            "load_armor_data (cache)",
+            len(pieces),
+            measure(lambda: read_armor_data(armor_path), runs),
+        )
+
+        sets_path = os.path.join(folder, "armor_sets.json")
+        record(
+            "save_armor_sets",
+            len(armor_sets),
+            measure(lambda: save_armor_sets(armor_sets, folder), runs),
+        )
+        record(
+            "load_armor_sets",
+            len(armor_sets),
+            measure(lambda: load_armor_sets(sets_path), runs),
+        )
+
+        db_path = os.path.join(folder, "armor_sets.db")
+        with ArmorSetStore(db_path) as store:
+            record(
+                "ArmorSetStore.save_all",
+                len(armor_sets),
+                measure(lambda: store.save_all(armor_sets), runs),
+            )
+            record(
+                "ArmorSetStore.load_all",
+                len(armor_sets),
+                measure(store.load_all, runs),
+            )
+
+    def get_totals() -> None:
+        for armor_set in armor_sets:
+            armor_set.get_buffs()
+            armor_set.get_decoration_slots()
+
+    record(
+        "get_buffs + get_decoration_slots", len(armor_sets), measure(get_totals, runs)
+    )
+
+    def render() -> None:
+        console = Console(file=io.StringIO(), width=120, force_terminal=True)
+        for armor_set in armor_sets[:RENDERED_SETS]:
+            armor_set.print_to_console(console)
+
+    # The first render imports the rich modules, which is not part of rendering.
+    render()
+    record("render armor sets (rich)", RENDERED_SETS, measure(render, runs))
+
+    def write_records() -> None:
+        with RecordWriter("jsonl", io.StringIO()) as writer:
+            for piece in pieces:
+                writer.write(piece)
+
+    record("write pieces (jsonl)", len(pieces), measure(write_records, runs))
+
+    compiled = compile_rank(armor_data[SEARCH_RANK])
+    record(
+        "compile_rank",
+        len(armor_data[SEARCH_RANK]),
+        measure(lambda: compile_rank(armor_data[SEARCH_RANK]), runs),
+    )
+    record(
+        "search_armor_sets",
+        len(armor_data[SEARCH_RANK]),
+        measure(
+            lambda: search_armor_sets(
+                armor_data,
+                SEARCH_RANK,
+                SEARCH_TARGETS,
+                SEARCH_LIMIT,
+                compiled=compiled,
+            ),
+            runs,
+        ),
+    )
+    return results
+
+
+def get_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def compare(results: list[dict[str, Any]], baseline_path: str) -> None:
+    """
+    Prints the change of the median of every benchmark against a previous run.
+    """
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+
+    previous = {
+        (result["benchmark"], result["scale"]): result["median_ms"]
+        for result in baseline["results"]
+    }
+    print(f"\nCompared with {baseline.get('commit')}:", file=sys.stderr)
+    for result in results:
+        old = previous.get((result["benchmark"], result["scale"]))
+        if not old:
+            continue
+        print(
+            f"{result['scale']:>4}x {result['benchmark']:<32} "
+            f"{old:10.2f} -> {result['median_ms']:10.2f} ms "
+            f"({result['median_ms'] / old:5.2f}x)",
+            file=sys.stderr,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", help="Write the json results to a file")
+    parser.add_argument("--compare", help="Json results of an earlier run")
+    args = parser.parse_args()
+
+    results = []
+    for scale in args.scales:
+        results.extend(run_scale(scale, args.runs))
+
+    report = {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare is not None:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Deterministic generator of synthetic armor catalogues and saved armor sets,
+scaled relative to the real mhw-db catalogue.
+The same scale and seed always give the same data, so benchmark runs on
+different commits measure the same workload.
+"""
+
+import random
+from typing import Any
+
+from armor_set import RESISTANCES, ArmorPiece, ArmorSet
+
+# The real mhw-db catalogue has about 1300 armor pieces in about 340 armor sets,
+# spread over the low, high and master ranks, with about 170 skills.
+REAL_ARMOR_SETS = {"low": 90, "high": 120, "master": 130}
+REAL_SKILL_COUNT = 170
+# A saved set collection of a regular user.
+REAL_SAVED_SETS = 100
+SCALES = [1, 10, 100]
+
+ARMOR_TYPES = ["head", "chest", "gloves", "waist", "legs"]
+SLOT_RANKS = {"low": 1, "high": 3, "master": 4}
+# The range of the fully upgraded defense of a piece per rank.
+DEFENSE_RANGES = {"low": (10, 60), "high": (60, 100), "master": (100, 200)}
+
+
+def get_skill_names() -> list[str]:
+    return [f"Skill {i}" for i in range(REAL_SKILL_COUNT)]
+
+
+def generate_remote_armor(scale: int = 1, seed: int = 0) -> list[dict[str, Any]]:
+    """
+    Generates the armor pieces in the format of the /armor endpoint of mhw-db.
+    """
+    generator = random.Random(seed)
+    # The stats have their own generator, so the rest of the catalogue
+    # stays the same as before it had stats.
+    stat_generator = random.Random(seed + 1)
+    skills = get_skill_names()
+    pieces = []
+    for rank, set_count in REAL_ARMOR_SETS.items():
+        for i in range(set_count * scale):
+            for armor_type in ARMOR_TYPES:
+                slot_count = generator.randint(0, 3)
+                skill_count = generator.randint(1, 3)
+                defense = stat_generator.randint(*DEFENSE_RANGES[rank])
+                pieces.append(
+                    {
+                        "id": len(pieces) + 1,
+                        "type": armor_type,
+                        "rank": rank,
+                        "slots": [
+                            {"rank": generator.randint(1, SLOT_RANKS[rank])}
+                            for _ in range(slot_count)
+                        ],
+                        "skills": [
+                            {"skillName": skill, "level": generator.randint(1, 3)}
+                            for skill in generator.sample(skills, skill_count)
+                        ],
+                        "armorSet": {"name": f"{rank} set {i}"},
+                        "defense": {"base": defense // 2, "max": defense},
+                        "resistances": {
+                            resistance: stat_generator.randint(-3, 3)
+                            for resistance in RESISTANCES
+                        },
+                    }
+                )
+    return pieces
+
+
+def generate_armor_data(scale: int = 1, seed: int = 0) -> dict[str, Any]:
+    """
+    Generates the local armor data, the same catalogue as generate_remote_armor
+    after it is parsed.
+    """
+    armor_data = {rank: {} for rank in REAL_ARMOR_SETS}
+    for piece in generate_remote_armor(scale, seed):
+        slots = [0, 0, 0, 0]
+        for slot in piece["slots"]:
+            slots[slot["rank"] - 1] += 1
+        name = piece["armorSet"]["name"].lower().replace(" ", "-")
+        armor_data[piece["rank"]].setdefault(name, {})[piece["type"]] = {
+            "slots": slots,
+            "skills": {skill["skillName"]: skill["level"] for skill in piece["skills"]},
+            "defense": piece["defense"]["max"],
+            "resistances": [
+                piece["resistances"][resistance] for resistance in RESISTANCES
+            ],
+        }
+    return armor_data
+
+
+def generate_armor_sets(
+    armor_data: dict[str, Any], scale: int = 1, seed: int = 0
+) -> list[ArmorSet]:
+    """
+    Generates saved armor sets that combine random pieces of the catalogue.
+    """
+    generator = random.Random(seed)
+    names = {rank: list(armor_sets) for rank, armor_sets in armor_data.items()}
+    armor_sets = []
+    for i in range(REAL_SAVED_SETS * scale):
+        rank = generator.choice(list(names))
+        pieces = [
+            ArmorPiece.new(armor_type, rank, generator.choice(names[rank]), armor_data)
+            for armor_type in ARMOR_TYPES
+        ]
+        armor_sets.append(ArmorSet(f"saved-set-{i}", *pieces))
+    return armor_sets
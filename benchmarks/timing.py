@@ -0,0 +1,42 @@
+"""
+Timing helpers shared by the benchmarks, so every script measures the same way.
+"""
+
+import contextlib
+import io
+import time
+from collections.abc import Callable
+from typing import Any
+
+
+class Timer:
+    """
+    Measures the duration of a with block in ms.
+    """
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        self.ms = 0.0
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.ms = (time.perf_counter() - self.start) * 1000
+
+
+def measure(
+    function: Callable[[], Any],
+    runs: int = 1,
+    setup: Callable[[], Any] | None = None,
+) -> list[float]:
+    """
+    Returns the duration of each run in ms. The setup runs before every run
+    and is not measured. Output of the function is discarded.
+    """
+    durations = []
+    for _ in range(runs):
+        if setup is not None:
+            setup()
+        with contextlib.redirect_stdout(io.StringIO()), Timer() as timer:
+            function()
+        durations.append(timer.ms)
+    return durations
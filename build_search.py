@@ -0,0 +1,807 @@
+import heapq
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any
+
+import numpy as np
+
+from armor_matrix import (ARMOR_TYPES, CHARM_TYPE, FREE_SLOT, STATS,
+                          CompiledRank, compile_rank)
+from armor_set import RESISTANCES, ArmorPiece, ArmorSet, normalize_name
+from pareto import pareto_filter
+
+# The last two armor types are evaluated together as one block of combinations.
+BLOCK_DEPTH = len(ARMOR_TYPES) - 2
+# The search is split into shards by the head x chest prefix.
+SHARD_DEPTH = 2
+# Charm lookup value for a deficit that no charm can make up for.
+NO_CHARM = -2
+# The scores the builds can be ranked by, see get_piece_scores.
+SCORES = ["skills", "slots", "free-pieces"]
+SLOT_SIZES = np.arange(1, 5)
+
+
+def search_armor_sets(
+    armor_data: dict[str, Any],
+    rank: str,
+    targets: dict[str, int],
+    limit: int | None = None,
+    workers: int = 1,
+    charms: dict[str, Any] | None = None,
+    compiled: CompiledRank | None = None,
+) -> list[ArmorSet]:
+    """
+    Searches all armor sets of the given rank that reach the target skill levels.
+    The pieces are combined type by type and a partial build is pruned as soon as
+    the remaining armor types (and a charm) can no longer make up for a missing
+    skill level. Once a charm can make up for the rest of the targets the remaining
+    slots are left free (None), so each result only names the pieces that are
+    needed for the targets. The search can be spread over multiple worker processes.
+    An already compiled rank (with the same charms) can be passed to skip compiling.
+    """
+    prepared = _prepare_search(armor_data, rank, targets, charms, compiled)
+    if prepared is None:
+        return []
+
+    compiled, skill_ids = prepared
+    results = []
+    for build in search_builds(compiled, skill_ids, list(targets.values()), workers):
+        results.append(
+            _create_armor_set(
+                armor_data, charms, rank, compiled, build, len(results) + 1
+            )
+        )
+        if limit is not None and len(results) >= limit:
+            break
+
+    return results
+
+
+def search_ranked_armor_sets(
+    armor_data: dict[str, Any],
+    rank: str,
+    targets: dict[str, int],
+    score: str,
+    limit: int = 10,
+    workers: int = 1,
+    charms: dict[str, Any] | None = None,
+    compiled: CompiledRank | None = None,
+    on_best: Callable[[int, ArmorSet], None] | None = None,
+) -> list[tuple[int, ArmorSet]]:
+    """
+    Searches the armor sets of the given rank that reach the target skill levels
+    and returns the best ones under the score (see SCORES) with their scores,
+    the best first. Builds with the same score keep the order they were found in.
+    The armor types and the charm are not left free when a piece scores higher,
+    see BuildSearch. Only the best builds are kept while searching, so the memory
+    does not grow with the number of builds that reach the targets.
+    Every time a better build is found it is passed to on_best.
+    """
+    prepared = _prepare_search(armor_data, rank, targets, charms, compiled)
+    if prepared is None:
+        return []
+
+    compiled, skill_ids = prepared
+    ranking = BuildRanking(limit)
+    best_score = None
+    for build_score, build in rank_builds(
+        compiled,
+        skill_ids,
+        list(targets.values()),
+        ranking,
+        get_piece_scores(compiled, score),
+        workers,
+    ):
+        if on_best is not None and (best_score is None or build_score > best_score):
+            best_score = build_score
+            on_best(
+                build_score,
+                _create_armor_set(armor_data, charms, rank, compiled, build, 1),
+            )
+
+    return [
+        (
+            build_score,
+            _create_armor_set(armor_data, charms, rank, compiled, build, number),
+        )
+        for number, (build_score, build) in enumerate(ranking.get_builds(), start=1)
+    ]
+
+
+def search_pareto_armor_sets(
+    armor_data: dict[str, Any],
+    rank: str,
+    targets: dict[str, int],
+    resistances: list[str] | None = None,
+    limit: int | None = None,
+    charms: dict[str, Any] | None = None,
+    compiled: CompiledRank | None = None,
+) -> tuple[int, list[tuple[dict[str, int], ArmorSet]]]:
+    """
+    Searches the armor sets of the given rank on the Pareto frontier of:
+    - levels: the target skill levels that are reached (capped at the targets)
+    - defense: the total defense
+    - the total of the given resistances, named like 'fire+ice'
+    - slots: the decoration slot capacity, the sum of the slot sizes
+    No set on the frontier is beaten by another set in all of them.
+    Returns the number of builds on the frontier and the objectives and the set
+    of the first limit of them, sorted by the objectives in that order
+    (highest first). Only the sets that are returned are created.
+    """
+    prepared = _prepare_search(armor_data, rank, targets, charms, compiled)
+    if prepared is None:
+        return 0, []
+
+    compiled, skill_ids = prepared
+    resistances = resistances or []
+    names = ["levels", "defense"]
+    if resistances:
+        names.append("+".join(resistances))
+    names.append("slots")
+    builds = pareto_builds(compiled, skill_ids, list(targets.values()), resistances)
+    return len(builds), [
+        (
+            dict(zip(names, objectives)),
+            _create_armor_set(armor_data, charms, rank, compiled, build, number),
+        )
+        for number, (objectives, build) in enumerate(builds[:limit], start=1)
+    ]
+
+
+def search_builds(
+    compiled: CompiledRank, skill_ids: list[int], targets: list[int], workers: int = 1
+):
+    """
+    Yields the piece rows (FREE_SLOT for a free slot) of every build of the compiled
+    rank that reaches the target levels of the given skill ids.
+    A build has a row for each armor type followed by the row of the charm.
+    With more than one worker the shards are searched by a process pool,
+    the builds are still yielded in the same order as with a single process.
+    """
+    search = BuildSearch(compiled, skill_ids, targets)
+    if workers > 1:
+        yield from _search_parallel(search, workers)
+    else:
+        for prefix, totals in search.shards():
+            yield from search.search_shard(prefix, totals)
+
+
+def rank_builds(
+    compiled: CompiledRank,
+    skill_ids: list[int],
+    targets: list[int],
+    ranking: "BuildRanking",
+    piece_scores: dict[str, np.ndarray],
+    workers: int = 1,
+) -> Iterator[tuple[int, tuple[int, ...]]]:
+    """
+    Searches the builds that reach the target levels and adds them to the ranking.
+    Yields the score and piece rows of every build that enters the ranking,
+    as soon as it is found. Once the ranking is full, partial builds that can
+    no longer beat its lowest score are pruned.
+    With more than one worker every shard is ranked by a worker process and
+    the best builds of each shard are merged in shard order.
+    """
+    search = BuildSearch(compiled, skill_ids, targets, piece_scores)
+    if workers > 1:
+        rank_shard = partial(_rank_shard, size=ranking.size)
+        for build_score, build in _search_parallel(search, workers, rank_shard):
+            if ranking.push(build_score, build):
+                yield build_score, build
+        return
+
+    for prefix, totals in search.shards():
+        for build in search.search_shard(prefix, totals):
+            build_score = search.get_score(build)
+            if ranking.push(build_score, build):
+                search.min_score = ranking.get_min_score()
+                yield build_score, build
+
+
+def pareto_builds(
+    compiled: CompiledRank,
+    skill_ids: list[int],
+    targets: list[int],
+    resistances: list[str],
+) -> list[tuple[tuple[int, ...], tuple[int, ...]]]:
+    """
+    Returns the objectives (see search_pareto_armor_sets) and the piece rows
+    of every build on the Pareto frontier, the best objectives first.
+
+    The builds are combined type by type and after each type only the partial
+    builds on the frontier of their skill levels (capped at the targets), defense,
+    the total of the resistances and slot capacity are kept. Every objective only
+    grows with these values, so a partial build that is dominated can never complete
+    to a build that is not. The total of the resistances is a single value, so the
+    frontiers do not grow with the number of resistances. The pieces of an armor
+    type are filtered the same way first.
+    The charm of a build is the one that reaches the most target levels.
+    """
+    unknown = [
+        resistance for resistance in resistances if resistance not in RESISTANCES
+    ]
+    if unknown:
+        raise ValueError(f"Unknown resistances: {unknown}, expected {RESISTANCES}")
+
+    targets_array = np.array(targets, dtype=np.int32)
+    resistance_columns = [STATS.index(resistance) for resistance in resistances]
+    skill_count = len(skill_ids)
+    value_count = skill_count + (3 if resistances else 2)
+
+    states = np.zeros((1, value_count), dtype=np.int32)
+    builds = np.zeros((1, 0), dtype=np.intp)
+    for armor_type in ARMOR_TYPES:
+        rows, points = _get_pareto_pieces(
+            compiled, armor_type, skill_ids, targets_array, resistance_columns
+        )
+        combined = (states[:, None, :] + points[None, :, :]).reshape(
+            -1, states.shape[1]
+        )
+        np.minimum(
+            combined[:, :skill_count], targets_array, out=combined[:, :skill_count]
+        )
+        keep = pareto_filter(combined)
+        states = combined[keep]
+        builds = np.column_stack([builds[keep // len(rows)], rows[keep % len(rows)]])
+
+    charm_rows, charm_levels = _get_free_first(
+        compiled.skill_matrices[CHARM_TYPE][:, skill_ids]
+    )
+    levels = np.minimum(
+        states[:, None, :skill_count] + charm_levels[None, :, :], targets_array
+    ).sum(axis=2)
+    # argmax picks the first of equal charms, which is the free slot.
+    best_charms = levels.argmax(axis=1)
+    objectives = np.column_stack(
+        [levels[np.arange(len(states)), best_charms], states[:, skill_count:]]
+    )
+    builds = np.column_stack([builds, charm_rows[best_charms]])
+
+    keep = pareto_filter(objectives)
+    return sorted(
+        (
+            (tuple(objectives[index].tolist()), tuple(builds[index].tolist()))
+            for index in keep
+        ),
+        key=lambda result: tuple(-value for value in result[0]),
+    )
+
+
+def get_piece_scores(compiled: CompiledRank, score: str) -> dict[str, np.ndarray]:
+    """
+    Returns the score of every row of each armor type and of the charms,
+    the score of a build is the sum of the scores of its rows:
+    - skills: the total level of all skills
+    - slots: the decoration slot capacity, the sum of the slot sizes
+    - free-pieces: the number of armor types that are left free
+    """
+    armor_types = ARMOR_TYPES + [CHARM_TYPE]
+    match score:
+        case "skills":
+            return {
+                armor_type: compiled.skill_matrices[armor_type].sum(
+                    axis=1, dtype=np.int64
+                )
+                for armor_type in armor_types
+            }
+        case "slots":
+            return {
+                armor_type: compiled.slot_matrices[armor_type] @ SLOT_SIZES
+                for armor_type in armor_types
+            }
+        case "free-pieces":
+            piece_scores = {}
+            for armor_type in armor_types:
+                type_scores = np.zeros(
+                    len(compiled.skill_matrices[armor_type]), dtype=np.int64
+                )
+                if armor_type != CHARM_TYPE:
+                    type_scores[FREE_SLOT] = 1
+                piece_scores[armor_type] = type_scores
+            return piece_scores
+
+    raise ValueError(f"Unknown score: {score}, expected one of {SCORES}")
+
+
+class BuildRanking:
+    """
+    The best builds under a score, kept in a min-heap of at most size builds,
+    so the worst build of the ranking is replaced when a better one is found.
+    Of two builds with the same score the one that was added first ranks higher.
+    """
+
+    def __init__(self, size: int) -> None:
+        if size < 1:
+            raise ValueError("The size of a ranking must be at least 1")
+
+        self.size = size
+        self._heap: list[tuple[int, int, tuple[int, ...]]] = []
+        self._count = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, score: int, build: tuple[int, ...]) -> bool:
+        """
+        Adds the build if the ranking is not full or the build is better than
+        the worst build of the ranking. Returns whether the build was added.
+        """
+        entry = (score, -self._count, build)
+        self._count += 1
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, entry)
+            return True
+
+        if entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+
+        return False
+
+    def get_min_score(self) -> int | None:
+        """
+        Returns the score a build has to beat to enter the full ranking.
+        """
+        if len(self._heap) < self.size:
+            return None
+        return self._heap[0][0]
+
+    def get_builds(self) -> list[tuple[int, tuple[int, ...]]]:
+        """
+        Returns the scores and builds, the best first.
+        """
+        return [(score, build) for score, _, build in sorted(self._heap, reverse=True)]
+
+
+class BuildSearch:
+    """
+    Depth first branch-and-bound over the armor types of a compiled rank.
+    Only the candidate rows and their levels for the target skills are kept,
+    so a search is small enough to be sent to worker processes.
+
+    The charm is not searched as another armor type. Instead the best charm for
+    every possible remaining deficit is looked up in a precomputed table,
+    so the charms do not multiply the number of searched builds.
+
+    With piece scores the builds are ranked, so they are not left minimal: instead
+    of a free slot an armor type gets its best scoring piece that gives none of the
+    skills (the fill row) and the charm is the best scoring charm that makes up for
+    the rest of the targets. Every combination of these pieces is searched, a partial
+    build is pruned when even the best remaining pieces can not get its score above
+    min_score, which a ranking keeps up to date.
+    """
+
+    def __init__(
+        self,
+        compiled: CompiledRank,
+        skill_ids: list[int],
+        targets: list[int],
+        piece_scores: dict[str, np.ndarray] | None = None,
+    ) -> None:
+        self.targets = tuple(targets)
+        self.targets_array = np.array(targets, dtype=np.int16)
+        self.ranked = piece_scores is not None
+        self.candidates = _get_candidates(compiled, skill_ids)
+        if piece_scores is not None:
+            self.candidates = [
+                _get_ranked_candidates(
+                    compiled, armor_type, skill_ids, rows, piece_scores[armor_type]
+                )
+                for armor_type, rows in zip(ARMOR_TYPES, self.candidates)
+            ]
+        self.levels = [
+            compiled.skill_matrices[armor_type][rows][:, skill_ids]
+            for armor_type, rows in zip(ARMOR_TYPES, self.candidates)
+        ]
+        self.level_tuples = [
+            [tuple(row) for row in type_levels.tolist()] for type_levels in self.levels
+        ]
+        charm_rows = _get_candidates(compiled, skill_ids, [CHARM_TYPE])[0]
+        charm_levels = compiled.skill_matrices[CHARM_TYPE][charm_rows][:, skill_ids]
+        self.bounds = _get_remaining_bounds(self.levels + [charm_levels])
+
+        if piece_scores is None:
+            piece_scores = {
+                armor_type: np.zeros(len(matrix), dtype=np.int64)
+                for armor_type, matrix in compiled.skill_matrices.items()
+            }
+        self.piece_scores = [
+            piece_scores[armor_type].tolist() for armor_type in ARMOR_TYPES
+        ]
+        self.charm_scores = piece_scores[CHARM_TYPE].tolist()
+        self.charm_caps, self.charm_table = _get_charm_table(
+            charm_rows, charm_levels, self.charm_scores if self.ranked else None
+        )
+        if self.ranked:
+            # Any charm can be added to a build that already reaches the targets.
+            no_deficit = (0,) * len(targets)
+            self.charm_table[no_deficit] = _get_best_row(piece_scores[CHARM_TYPE])
+        self.candidate_scores = [
+            [type_scores[row] for row in rows]
+            for type_scores, rows in zip(self.piece_scores, self.candidates)
+        ]
+        self.score_bounds = _get_remaining_score_bounds(
+            self.candidate_scores, self.charm_scores
+        )
+        self.min_score: int | None = None
+
+    def shards(self):
+        """
+        Splits the search into shards by the head x chest prefix.
+        Yields the prefix rows and skill totals of every shard in search order.
+        A prefix shorter than SHARD_DEPTH already reaches the targets.
+        """
+        rows = [FREE_SLOT] * SHARD_DEPTH
+
+        def split(depth: int, totals: tuple[int, ...]):
+            if depth == SHARD_DEPTH or (
+                not self.ranked and self._get_charm(totals) != NO_CHARM
+            ):
+                yield tuple(rows[:depth]), totals
+                return
+
+            if self._is_pruned(depth, totals):
+                return
+
+            for row, piece_levels in zip(
+                self.candidates[depth], self.level_tuples[depth]
+            ):
+                rows[depth] = row
+                yield from split(depth + 1, self._add(totals, piece_levels))
+
+        yield from split(0, (0,) * len(self.targets))
+
+    def search_shard(self, prefix: tuple[int, ...], totals: tuple[int, ...]):
+        """
+        Yields the builds that start with the given prefix rows.
+        """
+        rows = list(prefix) + [FREE_SLOT] * (len(ARMOR_TYPES) - len(prefix))
+
+        def search(depth: int, totals: tuple[int, ...], score: int):
+            charm = self._get_charm(totals)
+            if charm != NO_CHARM and not self.ranked:
+                free_slots = (FREE_SLOT,) * (len(ARMOR_TYPES) - depth)
+                yield tuple(rows[:depth]) + free_slots + (charm,)
+                return
+
+            if depth == len(ARMOR_TYPES):
+                if charm != NO_CHARM:
+                    yield tuple(rows) + (charm,)
+                return
+
+            if self._is_pruned(depth, totals) or self._is_score_pruned(depth, score):
+                return
+
+            if depth == BLOCK_DEPTH and not self.ranked:
+                yield from self._search_block(
+                    tuple(rows[:depth]), np.array(totals, dtype=np.int16)
+                )
+                return
+
+            for row, piece_levels, piece_score in zip(
+                self.candidates[depth],
+                self.level_tuples[depth],
+                self.candidate_scores[depth],
+            ):
+                rows[depth] = row
+                yield from search(
+                    depth + 1, self._add(totals, piece_levels), score + piece_score
+                )
+
+        prefix_score = sum(
+            type_scores[row] for type_scores, row in zip(self.piece_scores, prefix)
+        )
+        yield from search(len(prefix), totals, prefix_score)
+
+    def get_score(self, build: tuple[int, ...]) -> int:
+        """
+        Returns the score of a build, the sum of the scores of its rows.
+        """
+        return self.charm_scores[build[-1]] + sum(
+            type_scores[row]
+            for type_scores, row in zip(self.piece_scores, build[: len(ARMOR_TYPES)])
+        )
+
+    def _search_block(self, prefix: tuple[int, ...], totals: np.ndarray):
+        first_totals = totals + self.levels[BLOCK_DEPTH]
+        first_charms = self._get_charms(first_totals)
+        block_charms = self._get_charms(
+            first_totals[:, None, :] + self.levels[BLOCK_DEPTH + 1][None, :, :]
+        )
+
+        for i, first_row in enumerate(self.candidates[BLOCK_DEPTH]):
+            if first_charms[i] != NO_CHARM:
+                yield prefix + (first_row, FREE_SLOT, int(first_charms[i]))
+                continue
+
+            for j in np.flatnonzero(block_charms[i] != NO_CHARM):
+                second_row = self.candidates[BLOCK_DEPTH + 1][j]
+                yield prefix + (first_row, second_row, int(block_charms[i, j]))
+
+    def _get_charm(self, totals: tuple[int, ...]) -> int:
+        """
+        Returns the charm row that makes up for the rest of the targets,
+        FREE_SLOT if the targets are already met or NO_CHARM if no charm is enough.
+        """
+        deficit = tuple(
+            max(target - total, 0) for total, target in zip(totals, self.targets)
+        )
+        if any(level > cap for level, cap in zip(deficit, self.charm_caps)):
+            return NO_CHARM
+        return int(self.charm_table[deficit])
+
+    def _get_charms(self, totals: np.ndarray) -> np.ndarray:
+        """
+        Looks up the charm rows for an array of skill totals at once.
+        """
+        deficits = np.maximum(self.targets_array - totals, 0)
+        unreachable = (deficits > self.charm_caps).any(axis=-1)
+        charms = self.charm_table[
+            tuple(np.moveaxis(np.minimum(deficits, self.charm_caps), -1, 0))
+        ]
+        return np.where(unreachable, NO_CHARM, charms)
+
+    def _is_pruned(self, depth: int, totals: tuple[int, ...]) -> bool:
+        return any(
+            total + bound < target
+            for total, bound, target in zip(totals, self.bounds[depth], self.targets)
+        )
+
+    def _is_score_pruned(self, depth: int, score: int) -> bool:
+        return (
+            self.min_score is not None
+            and score + self.score_bounds[depth] <= self.min_score
+        )
+
+    @staticmethod
+    def _add(totals: tuple[int, ...], levels: tuple[int, ...]) -> tuple[int, ...]:
+        return tuple(total + level for total, level in zip(totals, levels))
+
+
+_worker_search: BuildSearch | None = None
+
+
+def _init_worker(search: BuildSearch) -> None:
+    global _worker_search
+    _worker_search = search
+
+
+def _search_shard(shard: tuple[tuple[int, ...], tuple[int, ...]]) -> list[tuple]:
+    return list(_worker_search.search_shard(*shard))
+
+
+def _rank_shard(
+    shard: tuple[tuple[int, ...], tuple[int, ...]], size: int
+) -> list[tuple[int, tuple[int, ...]]]:
+    """
+    Returns the best builds of the shard with their scores, the best first.
+    """
+    ranking = BuildRanking(size)
+    _worker_search.min_score = None
+    for build in _worker_search.search_shard(*shard):
+        if ranking.push(_worker_search.get_score(build), build):
+            _worker_search.min_score = ranking.get_min_score()
+    return ranking.get_builds()
+
+
+def _search_parallel(
+    search: BuildSearch,
+    workers: int,
+    search_shard: Callable[[tuple], list] = _search_shard,
+):
+    """
+    Searches the shards with a pool of worker processes.
+    Every worker gets its own copy of the search once when it starts,
+    after that only the shard prefixes and the found builds are sent.
+    The results are merged in shard order, so the output is deterministic.
+    """
+    shards = list(search.shards())
+    chunksize = max(1, len(shards) // (workers * 8))
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(search,)
+    )
+    try:
+        for builds in executor.map(search_shard, shards, chunksize=chunksize):
+            yield from builds
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def _prepare_search(
+    armor_data: dict[str, Any],
+    rank: str,
+    targets: dict[str, int],
+    charms: dict[str, Any] | None,
+    compiled: CompiledRank | None,
+) -> tuple[CompiledRank, list[int]] | None:
+    """
+    Compiles the rank, unless it is already compiled, and resolves the skill ids
+    of the targets. Returns None if the rank or a skill does not exist.
+    """
+    if rank not in armor_data:
+        print(f"Could not find rank: {rank}")
+        return None
+
+    if compiled is None:
+        compiled = compile_rank(armor_data[rank], charms)
+    skill_ids = _resolve_skill_ids(compiled, targets)
+    if skill_ids is None:
+        return None
+
+    return compiled, skill_ids
+
+
+def _resolve_skill_ids(
+    compiled: CompiledRank, targets: dict[str, int]
+) -> list[int] | None:
+    """
+    Maps the normalized target skill names to the skill ids of the compiled rank.
+    """
+    known_skills = {normalize_name(skill): i for i, skill in enumerate(compiled.skills)}
+
+    skill_ids = []
+    for target in targets:
+        key = normalize_name(target)
+        if key not in known_skills:
+            print(f"Could not find skill: {target}")
+            return None
+        skill_ids.append(known_skills[key])
+
+    return skill_ids
+
+
+def _get_candidates(
+    compiled: CompiledRank, skill_ids: list[int], armor_types: list[str] = ARMOR_TYPES
+) -> list[list[int]]:
+    """
+    Collects for each armor type the rows of the pieces that give at least one
+    of the skills. The candidates are sorted so the strongest pieces are tried first
+    and always end with a free slot (FREE_SLOT).
+    """
+    candidates = []
+    for armor_type in armor_types:
+        levels = compiled.skill_matrices[armor_type][:-1, skill_ids]
+        names = compiled.names[armor_type]
+        rows = np.flatnonzero(levels.any(axis=1)).tolist()
+        rows.sort(key=lambda row: (-int(levels[row].sum()), names[row]))
+        candidates.append(rows + [FREE_SLOT])
+
+    return candidates
+
+
+def _get_ranked_candidates(
+    compiled: CompiledRank,
+    armor_type: str,
+    skill_ids: list[int],
+    rows: list[int],
+    scores: np.ndarray,
+) -> list[int]:
+    """
+    Sorts the candidate rows of an armor type by their score (best first) and
+    replaces the free slot with the fill row: the best scoring row of the pieces
+    that give none of the skills, which is still the free slot if none of them
+    scores higher. A build has no reason to use another piece without the skills.
+    """
+    others = ~compiled.skill_matrices[armor_type][:, skill_ids].any(axis=1)
+    fill_row = _get_best_row(np.where(others, scores, np.iinfo(scores.dtype).min))
+    ranked = sorted(rows[:-1], key=lambda row: -scores[row])
+    return ranked + [fill_row]
+
+
+def _get_best_row(scores: np.ndarray) -> int:
+    """
+    Returns the row with the highest score, FREE_SLOT if no row scores higher
+    than the free slot.
+    """
+    best = int(np.argmax(scores))
+    return FREE_SLOT if scores[FREE_SLOT] >= scores[best] else best
+
+
+def _get_charm_table(
+    charm_rows: list[int],
+    charm_levels: np.ndarray,
+    charm_scores: list[int] | None = None,
+) -> tuple[tuple[int, ...], np.ndarray]:
+    """
+    Precomputes the best charm for every deficit that a charm can make up for.
+    The table has an axis per target skill that goes up to the highest level any
+    charm gives of that skill (the cap), so table[deficit] is the row of the
+    strongest charm that covers the deficit or NO_CHARM if there is none.
+    With the scores of the charm rows it is the best scoring charm instead.
+    Returns the caps and the table.
+    """
+    caps = tuple(charm_levels.max(axis=0).tolist())
+    table = np.full([cap + 1 for cap in caps], NO_CHARM, dtype=np.int32)
+
+    # The charms are sorted strongest first, so the stronger charms are written last.
+    charms = list(zip(charm_rows, charm_levels.tolist()))[::-1]
+    if charm_scores is not None:
+        # The sort is stable, of equal scores the stronger charm is still last.
+        charms.sort(key=lambda charm: charm_scores[charm[0]])
+    for row, levels in charms:
+        table[tuple(slice(0, level + 1) for level in levels)] = row
+    table[(0,) * len(caps)] = FREE_SLOT
+
+    return caps, table
+
+
+def _get_remaining_bounds(levels: list[np.ndarray]) -> list[tuple[int, ...]]:
+    """
+    Calculates for each depth the highest level per skill that the
+    remaining armor types (and the charm) could still add to a partial build.
+    """
+    best = np.array([type_levels.max(axis=0) for type_levels in levels])
+    remaining = np.cumsum(best[::-1], axis=0)[::-1]
+    return [tuple(bound) for bound in remaining.tolist()]
+
+
+def _get_pareto_pieces(
+    compiled: CompiledRank,
+    armor_type: str,
+    skill_ids: list[int],
+    targets: np.ndarray,
+    resistance_columns: list[int],
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the rows and the values (target skill levels capped at the targets,
+    defense, the total of the resistances if there are any and slot capacity)
+    of the pieces of an armor type that are not beaten in all values by another
+    piece. A free slot (FREE_SLOT) wins over equal pieces.
+    """
+    stats = compiled.stat_matrices[armor_type]
+    columns = [
+        np.minimum(compiled.skill_matrices[armor_type][:, skill_ids], targets),
+        stats[:, [0]],
+    ]
+    if resistance_columns:
+        columns.append(stats[:, resistance_columns].sum(axis=1, keepdims=True))
+    columns.append(compiled.slot_matrices[armor_type] @ SLOT_SIZES)
+    values = np.column_stack(columns).astype(np.int32)
+    rows, values = _get_free_first(values)
+    keep = np.sort(pareto_filter(values))
+    return rows[keep], values[keep]
+
+
+def _get_free_first(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Moves the free slot row (the last row) of a matrix to the front.
+    Returns the rows, with FREE_SLOT for the free slot, and the reordered matrix.
+    """
+    order = np.roll(np.arange(len(matrix)), 1)
+    rows = order.copy()
+    rows[0] = FREE_SLOT
+    return rows, matrix[order]
+
+
+def _get_remaining_score_bounds(
+    candidate_scores: list[list[int]], charm_scores: list[int]
+) -> list[int]:
+    """
+    Calculates for each depth the highest score that the remaining armor types
+    (and any charm) could still add to a partial build.
+    """
+    bounds = [max(charm_scores, default=0)]
+    for type_scores in reversed(candidate_scores):
+        bounds.append(bounds[-1] + max(type_scores))
+    return bounds[::-1]
+
+
+def _create_armor_set(
+    armor_data: dict[str, Any],
+    charms: dict[str, Any] | None,
+    rank: str,
+    compiled: CompiledRank,
+    build: tuple[int, ...],
+    number: int,
+) -> ArmorSet:
+    pieces = []
+    for armor_type, row in zip(ARMOR_TYPES, build):
+        name = compiled.get_piece_name(armor_type, row)
+        pieces.append(
+            ArmorPiece.new(armor_type, rank, name, armor_data) if name else None
+        )
+
+    charm_name = compiled.get_piece_name(CHARM_TYPE, build[len(ARMOR_TYPES)])
+    charm = ArmorPiece.new_charm(rank, charm_name, charms) if charm_name else None
+    return ArmorSet(f"search-{number}", *pieces, charm=charm)
@@ -0,0 +1,105 @@
+from typing import Any
+
+import numpy as np
+from rich.table import Table
+
+from armor_matrix import compile_armor_sets
+from armor_set import ArmorSet
+from output import get_console
+from spans import profiled
+
+
+class SetComparison:
+    """
+    The skill and slot totals of a group of armor sets, aligned on one skill vocabulary.
+    Row i of the matrices belongs to the armor set at index i of names.
+    """
+
+    def __init__(self, armor_sets: list[ArmorSet]) -> None:
+        self.names = [armor_set.name for armor_set in armor_sets]
+        self.skills, self.skill_matrix, self.slot_matrix = compile_armor_sets(
+            armor_sets
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Returns the levels of each skill and the slots of each set in set order.
+        """
+        return {
+            "names": self.names,
+            "skills": dict(zip(self.skills, self.skill_matrix.T.tolist())),
+            "slots": self.slot_matrix.tolist(),
+        }
+
+    def pairwise_deltas(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Calculates the differences for every pair of sets (i, j) with i < j.
+        Returns the pairs as a (pairs x 2) matrix of set indices and the
+        (pairs x skills) and (pairs x 4) matrices of set j minus set i.
+        """
+        first, second = np.triu_indices(len(self.names), k=1)
+        skill_deltas = self.skill_matrix[second] - self.skill_matrix[first]
+        slot_deltas = self.slot_matrix[second] - self.slot_matrix[first]
+        return np.stack([first, second], axis=1), skill_deltas, slot_deltas
+
+
+@profiled("render")
+def print_comparison(comparison: SetComparison, show_deltas: bool = False) -> None:
+    """
+    Prints a single skill by set table and optionally a table
+    with the differences between every pair of sets.
+    """
+    console = get_console()
+
+    table = Table(title="Comparison")
+    table.add_column("Skill")
+    for name in comparison.names:
+        table.add_column(name, justify="center")
+
+    for skill, levels in zip(comparison.skills, comparison.skill_matrix.T.tolist()):
+        table.add_row(skill, *map(_format_level, levels))
+
+    table.add_section()
+    for slot_size, amounts in enumerate(comparison.slot_matrix.T.tolist()):
+        table.add_row(f"{slot_size + 1} Slot", *map(_format_level, amounts))
+
+    console.print(table)
+
+    if show_deltas and len(comparison.names) > 1:
+        console.print(_create_delta_table(comparison))
+
+
+def _create_delta_table(comparison: SetComparison) -> Table:
+    """
+    Creates a table with a row for every pair of sets.
+    Skills and slot sizes that are the same for all sets are left out.
+    """
+    pairs, skill_deltas, slot_deltas = comparison.pairwise_deltas()
+    columns = comparison.skills + [f"{slot_size + 1} Slot" for slot_size in range(4)]
+    deltas = np.concatenate([skill_deltas, slot_deltas], axis=1)
+    changed = np.flatnonzero(deltas.any(axis=0))
+
+    table = Table(title="Differences")
+    table.add_column("Sets")
+    for column in changed:
+        table.add_column(columns[column], justify="center")
+
+    for (i, j), pair_deltas in zip(pairs.tolist(), deltas[:, changed].tolist()):
+        table.add_row(
+            f"{comparison.names[j]} vs {comparison.names[i]}",
+            *map(_format_delta, pair_deltas),
+        )
+
+    return table
+
+
+def _format_level(level: int) -> str:
+    return f"[cyan]{level}[/cyan]" if level else "-"
+
+
+def _format_delta(delta: int) -> str:
+    if delta > 0:
+        return f"[green]+{delta}[/green]"
+    if delta < 0:
+        return f"[red]{delta}[/red]"
+    return "-"
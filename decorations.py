@@ -0,0 +1,168 @@
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, NamedTuple
+
+from armor_set import ArmorSet, normalize_name
+
+SLOT_SIZES = 4
+
+
+class Decoration(NamedTuple):
+    name: str
+    size: int
+    skills: tuple[tuple[str, int], ...]
+
+
+class DecorationResult(NamedTuple):
+    # (slot size, decoration name) for every filled slot
+    decorations: list[tuple[int, str]]
+    # The skill levels that are still missing after the decorations
+    remaining: dict[str, int]
+
+
+class DecorationSolver:
+    """
+    Assigns decorations to decoration slots so they cover as much of a skill deficit
+    as possible. A decoration fits in any slot of its size or larger.
+
+    The solver is a dynamic program over (decoration, free slots per size, deficit)
+    states instead of over permutations of decorations. A decoration is always put in
+    the smallest free slot it fits in, which is never worse than a larger slot.
+    Results are cached per (slots, deficit), so solving many armor sets with the same
+    slots and missing levels (e.g. inside a build search) is cheap.
+    """
+
+    def __init__(self, decorations: Mapping[str, Any], skills: list[str]) -> None:
+        self.skills = [normalize_name(skill) for skill in skills]
+        self.decorations = _get_useful_decorations(decorations, self.skills)
+        self._solve = lru_cache(maxsize=None)(self._solve_state)
+
+    def solve(self, slots: list[int], deficits: dict[str, int]) -> DecorationResult:
+        """
+        Finds the decorations that cover the most levels of the deficits
+        (normalized skill name -> missing levels) with the given decoration slots.
+        Between equal coverage it prefers using the least slot capacity.
+        """
+        deficit = tuple(max(deficits.get(skill, 0), 0) for skill in self.skills)
+        _, _, placements = self._solve(0, tuple(slots), deficit)
+
+        remaining = list(deficit)
+        decorations = []
+        for index, slot_size in placements:
+            decoration = self.decorations[index]
+            decorations.append((slot_size, decoration.name))
+            remaining = self._apply(decoration, remaining)
+
+        return DecorationResult(
+            decorations,
+            {skill: level for skill, level in zip(self.skills, remaining) if level},
+        )
+
+    def _solve_state(
+        self, index: int, slots: tuple[int, ...], deficit: tuple[int, ...]
+    ) -> tuple[int, int, tuple[tuple[int, int], ...]]:
+        """
+        Returns the covered levels, the negated used slot capacity
+        and the (decoration index, slot size) placements of the best assignment.
+        """
+        if index == len(self.decorations) or not any(deficit) or not any(slots):
+            return 0, 0, ()
+
+        # Do not use this decoration (anymore).
+        best = self._solve(index + 1, slots, deficit)
+
+        decoration = self.decorations[index]
+        slot_size = _get_smallest_free_slot(slots, decoration.size)
+        if slot_size is None:
+            return best
+
+        new_deficit = tuple(self._apply(decoration, list(deficit)))
+        covered = sum(deficit) - sum(new_deficit)
+        if covered == 0:
+            return best
+
+        new_slots = list(slots)
+        new_slots[slot_size - 1] -= 1
+        rest_covered, rest_capacity, rest_placements = self._solve(
+            index, tuple(new_slots), new_deficit
+        )
+        candidate = (
+            covered + rest_covered,
+            rest_capacity - slot_size,
+            ((index, slot_size),) + rest_placements,
+        )
+        return max(best, candidate, key=lambda result: result[:2])
+
+    def _apply(self, decoration: Decoration, deficit: list[int]) -> list[int]:
+        deficit = list(deficit)
+        for skill, level in decoration.skills:
+            if skill in self.skills:
+                i = self.skills.index(skill)
+                deficit[i] = max(deficit[i] - level, 0)
+        return deficit
+
+
+def fill_decoration_slots(
+    armor_set: ArmorSet, targets: dict[str, int], decorations: Mapping[str, Any]
+) -> DecorationResult:
+    """
+    Fills the decoration slots of the armor set to reach the target skill levels.
+    """
+    buffs = {
+        normalize_name(skill): level for skill, level in armor_set.get_buffs().items()
+    }
+    deficits = {
+        normalize_name(skill): level - buffs.get(normalize_name(skill), 0)
+        for skill, level in targets.items()
+    }
+    solver = DecorationSolver(decorations, list(targets))
+    return solver.solve(armor_set.get_decoration_slots(), deficits)
+
+
+def _get_useful_decorations(
+    decorations: Mapping[str, Any], skills: list[str]
+) -> list[Decoration]:
+    """
+    Collects the decorations that give at least one of the skills. A decoration is
+    left out if another one is at most as large and gives at least the same levels.
+    """
+    useful = []
+    for name, decoration in decorations.items():
+        try:
+            skills_levels = tuple(
+                (normalize_name(skill), level)
+                for skill, level in decoration["skills"].items()
+            )
+            size = decoration["slot"]
+        except (KeyError, AttributeError, TypeError):
+            print(f"Invalid decoration: {name}")
+            continue
+
+        if 1 <= size <= SLOT_SIZES and any(
+            skill in skills for skill, _ in skills_levels
+        ):
+            useful.append(Decoration(name, size, skills_levels))
+
+    def levels(decoration: Decoration) -> list[int]:
+        decoration_skills = dict(decoration.skills)
+        return [decoration_skills.get(skill, 0) for skill in skills]
+
+    useful.sort(key=lambda decoration: (decoration.size, -sum(levels(decoration))))
+    kept = []
+    for decoration in useful:
+        dominated = any(
+            other.size <= decoration.size
+            and all(a >= b for a, b in zip(levels(other), levels(decoration)))
+            for other in kept
+        )
+        if not dominated:
+            kept.append(decoration)
+
+    return kept
+
+
+def _get_smallest_free_slot(slots: tuple[int, ...], size: int) -> int | None:
+    for slot_size in range(size, SLOT_SIZES + 1):
+        if slots[slot_size - 1] > 0:
+            return slot_size
+    return None
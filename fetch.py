@@ -0,0 +1,71 @@
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Enough for every endpoint of a sync (armor and the four others) at once.
+MAX_PARALLEL_REQUESTS = 8
+REQUEST_TIMEOUT = (5, 60)  # (connect, read) in seconds
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def create_session(
+    pool_size: int = MAX_PARALLEL_REQUESTS,
+    retries: int = MAX_RETRIES,
+    backoff: float = RETRY_BACKOFF,
+) -> requests.Session:
+    """
+    Creates a session that keeps up to pool_size connections per host open
+    and retries failed GET requests with an exponential backoff.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=["GET"],
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_concurrently(
+    tasks: dict[str, Callable[[], Any]], max_parallel: int = MAX_PARALLEL_REQUESTS
+) -> dict[str, Any]:
+    """
+    Runs the fetch tasks on a bounded pool of threads
+    and returns the result of every task by its name.
+    """
+    with ThreadPoolExecutor(max_workers=min(max_parallel, len(tasks) or 1)) as executor:
+        futures = {name: executor.submit(task) for name, task in tasks.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def get_json(session: requests.Session, url: str) -> Any | None:
+    """
+    Requests the json at the given url. Returns None if the request failed.
+    """
+    try:
+        response = session.get(url, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as exc:
+        print(f"Failed to collect data from {url}: {exc}")
+        return None
+
+    if response.status_code != 200:
+        print(f"Failed to collect data from {url}")
+        return None
+
+    try:
+        return response.json()
+    except ValueError as exc:
+        print(f"Failed to parse data from {url}: {exc}")
+        return None
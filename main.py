@@ -1,113 +1,639 @@
-from rich import print
+# Imported first, so a profile includes the imports of the other modules.
+import spans  # isort: skip
 
-from armor_data import (load_armor_data, load_armor_sets, save_armor_sets,
-                        sync_armor_data)
-from armor_set import ArmorPiece, ArmorSet
-from parse_args import parse_args
+import builtins
+import contextlib
+import io
+import json
+import shlex
+import sys
+import time
+from collections.abc import Iterator
+from typing import Any
 
+from armor_data import sync_armor_data
+from armor_set import ArmorPiece, ArmorSet, normalize_name
+from armor_set_store import ArmorSetStore, open_armor_set_store
+from name_index import format_suggestions
+from output import RecordWriter, print
+from parse_args import ACTIONS, parse_args
+from session import Session
+from spans import span
 
-def list_armor_pieces(args, armor_data) -> None:
-    for piece_type in ["head", "chest", "gloves", "waist", "legs"]:
-        print(f"\n[{piece_type}]")
+# The modules that need numpy (search, compare) and rich are only imported
+# by the actions that use them, see benchmarks/bench_startup.py.
+
+PIECE_TYPES = ["head", "chest", "gloves", "waist", "legs"]
+SHELL_COMMANDS = {
+    "flush": "Save the changed sets to disk",
+    "exit": "Save the changed sets and leave the shell",
+}
+
+
+class ActionError(Exception):
+    """
+    An action that could not be done. The message is printed by whoever runs
+    the action, a batch reports it with the line number.
+    """
+
+
+def list_armor_pieces(args, set_name: str, armor_data) -> None:
+    for piece_type in PIECE_TYPES:
+        print(f"\n\\[{piece_type}]")
         piece = ArmorPiece.new(
             piece_type,
             args.rank,
-            args.name,
+            set_name,
             armor_data,
         )
-        piece.print_to_console()
+        if piece is not None:
+            piece.print_to_console()
+
+
+def find_armor_set_name(session: Session, rank: str, name: str) -> str:
+    """
+    Returns the name of the armor set of the rank that the name refers to.
+    A name that only differs in case or spaces is resolved, otherwise the most
+    similar names of the name index are suggested in the ActionError.
+    The messages are printed without rich, so the record formats can use it.
+    """
+    armor_data = session.armor_data
+    if rank not in armor_data or name in armor_data[rank]:
+        return name
+
+    index = session.name_indexes.get(rank)
+    resolved = index.resolve(name) if index is not None else None
+    if resolved is not None:
+        builtins.print(f"Using armor set {resolved} for {name}.")
+        return resolved
 
+    suggestions = index.suggest(name) if index is not None else []
+    raise ActionError(
+        f"Could not find armor set: {name}.{format_suggestions(suggestions)}"
+    )
+
+
+def new_armor_piece(
+    session: Session, armor_type: str, rank: str, name: str
+) -> ArmorPiece | None:
+    if not name:
+        return None
 
-def create_armor_set(args, armor_data) -> ArmorSet:
+    set_name = find_armor_set_name(session, rank, name)
+    return ArmorPiece.new(armor_type, rank, set_name, session.armor_data)
+
+
+def create_armor_set(args, session: Session) -> ArmorSet:
     return ArmorSet(
         name=args.name,
-        helm=ArmorPiece.new("head", args.rank, args.head, armor_data),
-        chest=ArmorPiece.new(
-            "chest",
-            args.rank,
-            args.chest,
-            armor_data,
+        helm=new_armor_piece(session, "head", args.rank, args.head),
+        chest=new_armor_piece(session, "chest", args.rank, args.chest),
+        arm=new_armor_piece(session, "gloves", args.rank, args.gloves),
+        waist=new_armor_piece(session, "waist", args.rank, args.waist),
+        leg=new_armor_piece(session, "legs", args.rank, args.legs),
+        charm=(
+            ArmorPiece.new_charm(args.rank, args.charm, session.charms)
+            if args.charm
+            else None
         ),
-        arm=ArmorPiece.new("gloves", args.rank, args.gloves, armor_data),
-        waist=ArmorPiece.new(
-            "waist",
-            args.rank,
-            args.waist,
-            armor_data,
-        ),
-        leg=ArmorPiece.new("legs", args.rank, args.legs, armor_data),
     )
 
 
-def get_armor_set(armor_sets: list[ArmorSet], name) -> ArmorSet | None:
-    armor_set = list(
-        filter(
-            lambda armor_set: armor_set.name == name,
-            armor_sets,
+def save_new_armor_set(args, session: Session) -> None:
+    """
+    Creates and saves the set, unless a set with the same name is already saved.
+    """
+    if args.name in session.armor_sets:
+        raise ActionError(f"A set with the name {args.name} already exists.")
+
+    session.armor_sets.save(create_armor_set(args, session))
+
+
+def get_armor_set(armor_sets: ArmorSetStore, name) -> ArmorSet:
+    armor_set = armor_sets.get(name)
+    if armor_set is None:
+        suggestions = format_suggestions(armor_sets.find_similar_names(name))
+        raise ActionError(f"Could not find set with the name: {name}{suggestions}")
+    return armor_set
+
+
+def list_skill_pieces(args, session: Session) -> None:
+    skill_index = session.skill_index
+    if args.name not in skill_index:
+        raise ActionError(f"Could not find skill: {args.name}")
+
+    piece = None if args.piece in (None, "all") else args.piece
+    postings = skill_index.lookup(args.name, args.rank, piece)
+    lines = [f"===== {skill_index.get_skill_name(args.name)} ====="]
+    for posting in postings:
+        lines.append(
+            f"- {posting.rank} {posting.set_name} {posting.armor_type}: "
+            f"[cyan]{posting.level}[/cyan]"
         )
-    )
-    if armor_set == []:
-        print(f"Could not find set with the name: {name}")
-        return None
+    print("\n".join(lines))
+
+
+def compare_armor_sets(args, armor_sets: ArmorSetStore) -> None:
+    from compare import SetComparison, print_comparison
+
+    if args.all:
+        selected_sets = armor_sets.load_all()
     else:
-        return armor_set[0]
+        selected_sets = [get_armor_set(armor_sets, name) for name in args.names]
 
+    if not selected_sets:
+        raise ActionError("No sets to compare.")
 
-def main():
-    args = parse_args()
-    sync_armor_data()
-    armor_data = load_armor_data()
-    armor_sets: list[ArmorSet] = load_armor_sets()
+    if args.panels:
+        for armor_set in selected_sets:
+            print(f"\n\\[{armor_set.name}]")
+            armor_set.print_to_console()
+        return
+
+    print_comparison(SetComparison(selected_sets), args.deltas)
+
+
+def decorate_armor_set(args, session: Session) -> None:
+    from decorations import fill_decoration_slots
+
+    armor_set = get_armor_set(session.armor_sets, args.name)
+    result = fill_decoration_slots(armor_set, args.skills, session.decorations)
+    print(f"===== Decorations for {armor_set.name} =====")
+    if not result.decorations:
+        print("No decorations needed or available.")
+
+    for slot_size, decoration in result.decorations:
+        print(f"- {slot_size} Slot: [cyan]{decoration}[/cyan]")
+
+    for skill, level in result.remaining.items():
+        print(f"Still missing {level} level(s) of {skill}")
+
+
+def query_armor_pieces(args, session: Session) -> None:
+    catalogue = session.catalogue
+    if catalogue is None:
+        raise ActionError("Could not open the armor catalogue.")
+
+    pieces = catalogue.find_pieces(args.rank, args.piece, args.skills, args.slot)
+
+    lines = [f"===== {len(pieces)} pieces ====="]
+    for piece in pieces:
+        lines.append(f"- {piece.rank} {piece.set_name} [cyan]{piece.armor_type}[/cyan]")
+    print("\n".join(lines))
+
+
+def print_best_build(score: int, armor_set: ArmorSet) -> None:
+    pieces = [name for name in armor_set.get_piece_names().values() if name != "-"]
+    print(f"Best so far ({score}): {', '.join(pieces)}")
+
+
+def search_ranked_armor_builds(args, session: Session) -> None:
+    """
+    Searches the best sets under the score of the arguments.
+    Every better set is shown as soon as it is found, the best sets at the end.
+    """
+    from build_search import search_ranked_armor_sets
+
+    if args.limit < 1:
+        raise ActionError("The limit must be at least 1 to rank the sets.")
+
+    charms = session.charms
+    compiled = session.get_compiled_rank(args.rank)
+    with span("search builds"):
+        results = search_ranked_armor_sets(
+            session.armor_data,
+            args.rank,
+            args.skills,
+            args.score,
+            args.limit,
+            args.workers,
+            charms,
+            compiled,
+            on_best=print_best_build,
+        )
+    if not results:
+        print("Could not find an armor set with the given skills.")
+
+    for score, armor_set in results:
+        print(f"\n\\[{armor_set.name}] {args.score}: {score}")
+        armor_set.print_to_console()
+
+
+def search_pareto_armor_builds(args, session: Session) -> None:
+    """
+    Searches the sets on the Pareto frontier, shows at most limit of them.
+    """
+    from build_search import search_pareto_armor_sets
+
+    charms = session.charms
+    compiled = session.get_compiled_rank(args.rank)
+    with span("search builds"):
+        count, results = search_pareto_armor_sets(
+            session.armor_data,
+            args.rank,
+            args.skills,
+            args.resistances,
+            args.limit,
+            charms,
+            compiled,
+        )
+    if not count:
+        print("Could not find an armor set with the given skills.")
+        return
+
+    total = sum(args.skills.values())
+    for objectives, armor_set in results:
+        values = [f"levels: {objectives['levels']}/{total}"]
+        values.extend(
+            f"{name}: {value}" for name, value in objectives.items() if name != "levels"
+        )
+        print(f"\n\\[{armor_set.name}] {', '.join(values)}")
+        armor_set.print_to_console()
+
+    if count > len(results):
+        print(f"\nShowing {len(results)} of {count} sets on the Pareto frontier.")
+
+
+def check_search_skills(args, session: Session) -> None:
+    """
+    Checks that the rank of the search exists and has the skills of the search.
+    """
+    if args.rank not in session.armor_data:
+        raise ActionError(f"Could not find rank: {args.rank}")
+
+    compiled = session.get_compiled_rank(args.rank)
+    known_skills = {normalize_name(skill) for skill in compiled.skills}
+    for skill in args.skills:
+        if normalize_name(skill) not in known_skills:
+            raise ActionError(f"Could not find skill: {skill}")
+
+
+def search_armor_builds(args, session: Session) -> None:
+    from build_search import search_armor_sets
 
+    check_search_skills(args, session)
+
+    if args.pareto:
+        search_pareto_armor_builds(args, session)
+        return
+
+    if args.score is not None:
+        search_ranked_armor_builds(args, session)
+        return
+
+    charms = session.charms
+    compiled = session.get_compiled_rank(args.rank)
+    with span("search builds"):
+        results = search_armor_sets(
+            session.armor_data,
+            args.rank,
+            args.skills,
+            args.limit,
+            args.workers,
+            charms,
+            compiled,
+        )
+    if not results:
+        print("Could not find an armor set with the given skills.")
+
+    for armor_set in results:
+        print(f"\n\\[{armor_set.name}]")
+        armor_set.print_to_console()
+
+
+def edit_armor_set(args, session: Session) -> None:
+    armor_set = get_armor_set(session.armor_sets, args.name)
+    if args.piece == "charm":
+        new_piece = ArmorPiece.new_charm(args.rank, args.new_piece, session.charms)
+    else:
+        new_piece = new_armor_piece(session, args.piece, args.rank, args.new_piece)
+    if new_piece is None:
+        raise ActionError(f"Could not replace the {args.piece} of {armor_set.name}.")
+
+    armor_set.replace_piece(new_piece.armor_type, new_piece)
+    session.armor_sets.save(armor_set)
+
+
+def list_items(args, session: Session) -> None:
+    armor_data = session.armor_data
+    match args.type:
+        case "piece":
+            set_name = find_armor_set_name(session, args.rank, args.name)
+            if args.piece == "all":
+                list_armor_pieces(args, set_name, armor_data)
+            else:
+                piece = ArmorPiece.new(
+                    args.piece,
+                    args.rank,
+                    set_name,
+                    armor_data,
+                )
+                if piece is not None:
+                    piece.print_to_console()
+
+        case "skill":
+            list_skill_pieces(args, session)
+
+        case "set":
+            get_armor_set(session.armor_sets, args.name).print_to_console()
+
+        case "all-pieces":
+            # A single print per rank, rich renders each print separately.
+            for rank, armor_sets in armor_data.items():
+                lines = [f"===== {rank} ====="]
+                lines.extend(f"- {armor_set}" for armor_set in armor_sets)
+                print("\n".join(lines))
+
+        case "all-sets":
+            # Plain output, listing names does not need the rich console.
+            builtins.print("===== Armor Set names =====")
+            for name in session.armor_sets.get_names():
+                builtins.print(f"- {name}")
+
+
+def get_records(args, session: Session) -> Iterator[dict[str, Any]]:
+    """
+    Yields the items of a list or query action as records for a RecordWriter.
+    The messages are printed without rich, see write_records.
+    """
+    if args.action == "query":
+        catalogue = session.catalogue
+        if catalogue is None:
+            raise ActionError("Could not open the armor catalogue.")
+        for piece in catalogue.find_pieces(
+            args.rank, args.piece, args.skills, args.slot
+        ):
+            yield piece._asdict()
+        return
+
+    armor_data = session.armor_data
+    match args.type:
+        case "piece":
+            set_name = find_armor_set_name(session, args.rank, args.name)
+            piece_types = PIECE_TYPES if args.piece == "all" else [args.piece]
+            for piece_type in piece_types:
+                piece = ArmorPiece.new(piece_type, args.rank, set_name, armor_data)
+                if piece is not None:
+                    yield piece.to_dict()
+
+        case "skill":
+            skill_index = session.skill_index
+            if args.name not in skill_index:
+                raise ActionError(f"Could not find skill: {args.name}")
+            piece = None if args.piece in (None, "all") else args.piece
+            skill = skill_index.get_skill_name(args.name)
+            for posting in skill_index.lookup(args.name, args.rank, piece):
+                yield {"skill": skill, **posting._asdict()}
+
+        case "set":
+            yield get_armor_set(session.armor_sets, args.name).to_dict()
+
+        case "all-pieces":
+            for rank, armor_sets in armor_data.items():
+                for set_name in armor_sets:
+                    yield {"rank": rank, "set_name": set_name}
+
+        case "all-sets":
+            for name in session.armor_sets.get_names():
+                yield {"name": name}
+
+
+def write_records(args, session: Session) -> None:
+    """
+    Writes the items of a list or query action to stdout in a machine readable
+    format. Messages, like loading the armor data, are written to stderr,
+    so stdout can be piped.
+    """
+    with RecordWriter(args.format, sys.stdout) as writer, span("write records"):
+        with contextlib.redirect_stdout(sys.stderr):
+            for record in get_records(args, session):
+                writer.write(record)
+
+
+def run_action(args, session: Session) -> None:
     match args.action:
+        case "list" | "query" if args.format != "rich":
+            write_records(args, session)
         case "create":
-            armor_set = create_armor_set(args, armor_data)
-            armor_sets.append(armor_set)
-            save_armor_sets(armor_sets)
+            save_new_armor_set(args, session)
         case "edit":
-            armor_set = get_armor_set(armor_sets, args.name)
-            if armor_set is None:
-                return
-
-            new_piece = ArmorPiece.new(
-                args.piece, args.rank, args.new_piece, armor_data
-            )
-            armor_set.replace_piece(new_piece.armor_type, new_piece)
-            save_armor_sets(armor_sets)
-
+            edit_armor_set(args, session)
         case "compare":
-            return
+            compare_armor_sets(args, session.armor_sets)
+        case "decorate":
+            decorate_armor_set(args, session)
+        case "query":
+            query_armor_pieces(args, session)
+        case "search":
+            search_armor_builds(args, session)
         case "list":
-            match args.type:
-                case "piece":
-                    armor_set = armor_data[args.rank].get(args.name)
-                    if armor_set is None:
-                        print(f"Could not find armor set: {args.name}")
-                    elif args.piece == "all":
-                        list_armor_pieces()
-                    else:
-                        piece = ArmorPiece.new(
-                            args.piece,
-                            args.rank,
-                            args.name,
-                            armor_data,
-                        )
-                        piece.print_to_console()
-
-                case "set":
-                    armor_set = get_armor_set(armor_sets, args.name)
-                    armor_set.print_to_console()
-
-                case "all-pieces":
-                    for rank, armor_sets in armor_data.items():
-                        print(f"===== {rank} =====")
-                        for armor_set in armor_sets:
-                            print(f"- {armor_set}")
-
-                case "all-sets":
-                    print("===== Armor Set names =====")
-                    for armor_set in armor_sets:
-                        print(f"- {armor_set.name}")
+            list_items(args, session)
+        case "sync":
+            sync_armor_data(force=args.force, refresh=args.refresh)
+            session.reload()
+        case "shell" | "serve" | "batch":
+            print(f"Can not run {args.action} from a shell or batch.")
+
+
+def run_shell(session: Session) -> None:
+    """
+    Reads and runs actions until exit or the end of the input.
+    The data stays loaded between the actions and the changed sets are saved
+    in batches, the remaining changes are saved when the shell is left.
+    """
+    print("Type an action like 'list set -n my-set', 'help' or 'exit'.")
+    try:
+        while True:
+            try:
+                line = input("armor> ")
+            except EOFError:
+                break
+            except KeyboardInterrupt:
+                print()
+                continue
+
+            try:
+                if not run_shell_command(line, session):
+                    break
+            except KeyboardInterrupt:
+                print("Interrupted.")
+    finally:
+        pending = session.armor_sets.get_pending_count()
+        session.close()
+        if pending:
+            print(f"Saved {pending} changed armor sets.")
+
+
+def run_shell_command(line: str, session: Session) -> bool:
+    """
+    Runs a single line of the shell. Returns False if the shell should exit.
+    """
+    try:
+        argv = shlex.split(line)
+    except ValueError as exc:
+        print(f"Invalid command: {exc}")
+        return True
+
+    if not argv:
+        return True
+
+    match argv[0]:
+        case "exit" | "quit":
+            return False
+        case "flush":
+            session.armor_sets.flush()
+            return True
+        case "help":
+            print(f"Actions: {', '.join(ACTIONS)} (<action> --help for the options)")
+            for command, description in SHELL_COMMANDS.items():
+                print(f"{command}: {description}")
+            return True
+
+    try:
+        args = parse_args(argv)
+    except SystemExit:
+        # argparse already printed the usage or the error.
+        return True
+
+    try:
+        run_action(args, session)
+    except ActionError as exc:
+        builtins.print(exc)
+    except Exception as exc:
+        # A failed command is reported, the shell goes on with the next one.
+        builtins.print(f"{type(exc).__name__}: {exc}")
+    return True
+
+
+def run_batch(file_path: str, session: Session, checkpoint: int = 0) -> None:
+    """
+    Runs the actions of a JSONL file in order, one action per line as a list of
+    arguments or as a command string. A line that fails is reported and the batch
+    goes on. The changed sets are saved every checkpoint lines and at the end.
+    """
+    try:
+        file = open(file_path)
+    except OSError as exc:
+        print(f"Could not read {file_path}: {exc}")
+        session.close()
+        return
+
+    count = 0
+    errors = 0
+    start = time.perf_counter()
+    try:
+        with file:
+            for line_number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+
+                count += 1
+                error = run_batch_command(line, session)
+                if error is not None:
+                    errors += 1
+                    print(f"Line {line_number}: {error}")
+                if checkpoint and count % checkpoint == 0:
+                    session.armor_sets.flush()
+    finally:
+        session.close()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Ran {count} commands ({errors} failed) in {elapsed:.2f} s, "
+        f"{count / elapsed:.0f} commands/s."
+    )
+
+
+def run_batch_command(line: str, session: Session) -> str | None:
+    """
+    Runs a single line of a batch. Returns the error if the line failed.
+    """
+    try:
+        command = json.loads(line)
+        if isinstance(command, str):
+            command = shlex.split(command)
+    except ValueError as exc:
+        return f"Invalid command: {exc}"
+
+    if not isinstance(command, list) or not all(
+        isinstance(argument, str) for argument in command
+    ):
+        return "Expected a list of arguments or a command string"
+    if command and command[0] in ("shell", "serve", "batch"):
+        return f"Can not run {command[0]} from a batch"
+
+    # argparse writes its errors to stderr before it exits.
+    parse_errors = io.StringIO()
+    try:
+        with contextlib.redirect_stderr(parse_errors):
+            args = parse_args(command)
+    except SystemExit as exc:
+        if exc.code == 0:
+            return None
+        lines = parse_errors.getvalue().strip().splitlines()
+        return lines[-1] if lines else "Invalid arguments"
+
+    try:
+        run_action(args, session)
+    except ActionError as exc:
+        return str(exc)
+    except Exception as exc:
+        return f"{type(exc).__name__}: {exc}"
+    return None
+
+
+def run_main(args) -> None:
+    if args.action == "sync":
+        sync_armor_data(force=args.force, refresh=args.refresh)
+        return
+
+    if args.action == "shell":
+        run_shell(Session(open_armor_set_store(batch_size=args.batch_size)))
+        return
+
+    if args.action == "serve":
+        from server import run_server
+
+        run_server(
+            Session(open_armor_set_store()),
+            args.host,
+            args.port,
+            args.workers,
+            args.batch_window / 1000,
+        )
+        return
+
+    if args.action == "batch":
+        run_batch(
+            args.file, Session(open_armor_set_store(batch_size=0)), args.checkpoint
+        )
+        return
+
+    # The armor data is only synced and loaded when an action reads it.
+    try:
+        run_action(args, Session(open_armor_set_store()))
+    except ActionError as exc:
+        # On stderr, so stdout stays clean for the record formats.
+        builtins.print(exc, file=sys.stderr)
+
+
+def main():
+    args = parse_args()
+    if not (args.profile or args.profile_pstats or args.profile_trace):
+        run_main(args)
+        return
+
+    profiler = spans.start_profiler(with_cprofile=bool(args.profile_pstats))
+    try:
+        with span(args.action):
+            run_main(args)
+    finally:
+        spans.stop_profiler()
+        builtins.print(profiler.format_summary(), file=sys.stderr)
+        if args.profile_pstats:
+            profiler.write_pstats(args.profile_pstats)
+        if args.profile_trace:
+            profiler.write_trace(args.profile_trace)
 
 
 if __name__ == "__main__":
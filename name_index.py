@@ -0,0 +1,118 @@
+from collections import Counter
+from typing import Any, NamedTuple, Self
+
+from armor_set import normalize_name
+
+SUGGESTION_LIMIT = 3
+MIN_SIMILARITY = 0.3
+
+
+class NameMatch(NamedTuple):
+    name: str
+    similarity: float
+
+
+def get_trigrams(name: str) -> set[str]:
+    """
+    Returns the trigrams of the normalized name, padded so the start and end
+    of the name have their own trigrams, e.g. '  a', ' ab', 'abc', 'bc '.
+    """
+    padded = f"  {normalize_name(name)} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def get_similarity(shared: int, first_size: int, second_size: int) -> float:
+    """
+    The Jaccard similarity of two trigram sets with shared trigrams in common.
+    """
+    return shared / (first_size + second_size - shared)
+
+
+def format_suggestions(names: list[str]) -> str:
+    if not names:
+        return ""
+    return f" Did you mean: {', '.join(names)}?"
+
+
+class NameIndex:
+    """
+    Trigram index over a list of names for fuzzy lookups.
+    A query only looks at the names that share a trigram with it,
+    ranked by the Jaccard similarity of their trigrams.
+    """
+
+    def __init__(
+        self, names: list[str], postings: dict[str, list[int]], sizes: list[int]
+    ) -> None:
+        self.names = names
+        self.postings = postings
+        # The number of trigrams of each name.
+        self.sizes = sizes
+        self._normalized = {normalize_name(name): name for name in names}
+
+    @staticmethod
+    def build(names: list[str]) -> Self:
+        postings = {}
+        sizes = []
+        for name_id, name in enumerate(names):
+            trigrams = get_trigrams(name)
+            sizes.append(len(trigrams))
+            for trigram in trigrams:
+                postings.setdefault(trigram, []).append(name_id)
+        return NameIndex(list(names), postings, sizes)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def resolve(self, name: str) -> str | None:
+        """
+        Returns the name that only differs from the given name in case or spaces,
+        e.g. 'Leather Armor' resolves to 'leather-armor'.
+        """
+        return self._normalized.get(normalize_name(name))
+
+    def search(
+        self,
+        query: str,
+        limit: int = SUGGESTION_LIMIT,
+        min_similarity: float = MIN_SIMILARITY,
+    ) -> list[NameMatch]:
+        """
+        Returns the names most similar to the query, the most similar first.
+        """
+        trigrams = get_trigrams(query)
+        shared = Counter()
+        for trigram in trigrams:
+            shared.update(self.postings.get(trigram, ()))
+
+        matches = []
+        for name_id, count in shared.items():
+            similarity = get_similarity(count, len(trigrams), self.sizes[name_id])
+            if similarity >= min_similarity:
+                matches.append(NameMatch(self.names[name_id], similarity))
+
+        matches.sort(key=lambda match: (-match.similarity, match.name))
+        return matches[:limit]
+
+    def suggest(self, query: str, limit: int = SUGGESTION_LIMIT) -> list[str]:
+        return [match.name for match in self.search(query, limit)]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"names": self.names, "postings": self.postings, "sizes": self.sizes}
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> Self:
+        try:
+            return NameIndex(data["names"], data["postings"], data["sizes"])
+        except (KeyError, TypeError) as exc:
+            raise ValueError(f"dict is not a valid name index. {exc}")
+
+
+def build_name_indexes(armor_data: dict[str, Any]) -> dict[str, NameIndex]:
+    """
+    Builds a name index of the armor set names of each rank.
+    """
+    return {
+        rank: NameIndex.build(list(armor_sets))
+        for rank, armor_sets in armor_data.items()
+    }
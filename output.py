@@ -0,0 +1,96 @@
+import json
+import sys
+from typing import IO, TYPE_CHECKING, Any
+
+from spans import profiled
+
+# rich is only imported for the rich format, the other formats write plain text.
+if TYPE_CHECKING:
+    from rich.console import Console
+
+FORMATS = ["rich", "json", "jsonl", "tsv"]
+# The number of records that are joined into a single write.
+BUFFER_SIZE = 512
+
+
+def get_console() -> "Console":
+    """
+    Returns the console that all rich output is printed with,
+    which is the same console that rich.print uses.
+    """
+    from rich import get_console
+
+    return get_console()
+
+
+@profiled("render")
+def print(*objects: Any, **kwargs: Any) -> None:
+    """
+    Prints with the shared rich console, like rich.print,
+    but rich is only imported when something is printed.
+    """
+    get_console().print(*objects, **kwargs)
+
+
+class RecordWriter:
+    """
+    Writes records (dicts) to a file as a json array, as json lines or as
+    tab separated values with the keys of the first record as the header.
+    The records are streamed, but written in chunks of BUFFER_SIZE records
+    instead of one write per record.
+    """
+
+    def __init__(self, format: str, file: IO[str] | None = None) -> None:
+        if format not in FORMATS[1:]:
+            raise ValueError(f"Unknown record format: {format}")
+
+        self.format = format
+        self.file = sys.stdout if file is None else file
+        self.columns: list[str] | None = None
+        self.count = 0
+        self._buffer: list[str] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(self, record: dict[str, Any]) -> None:
+        match self.format:
+            case "json":
+                separator = "[\n" if self.count == 0 else ",\n"
+                self._buffer.append(separator + json.dumps(record))
+            case "jsonl":
+                self._buffer.append(json.dumps(record) + "\n")
+            case "tsv":
+                if self.columns is None:
+                    self.columns = list(record)
+                    self._buffer.append("\t".join(self.columns) + "\n")
+                values = [
+                    _format_tsv_value(record.get(column)) for column in self.columns
+                ]
+                self._buffer.append("\t".join(values) + "\n")
+
+        self.count += 1
+        if len(self._buffer) >= BUFFER_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        self.file.write("".join(self._buffer))
+        self._buffer.clear()
+
+    def close(self) -> None:
+        if self.format == "json":
+            self._buffer.append("\n]\n" if self.count else "[]\n")
+        self.flush()
+        self.file.flush()
+
+
+def _format_tsv_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value)
+    # Tabs and line breaks would split the value into columns or rows.
+    return str(value).replace("\t", " ").replace("\n", " ")
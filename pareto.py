@@ -0,0 +1,65 @@
+import numpy as np
+
+# The number of points compared with the frontier at once by the sweep.
+BLOCK_SIZE = 256
+
+
+def pareto_filter(points: np.ndarray) -> np.ndarray:
+    """
+    Returns the indices of the points on the Pareto frontier, where every column
+    is maximized: no other point is at least as good in every column and better
+    in one. Of equal points only the first one is kept. The indices are sorted
+    by the sum of the columns (highest first).
+
+    The points are swept in order of their sum, a point can only be dominated
+    by a point with a higher sum, so it only has to be compared with the frontier
+    found so far instead of with every other point. The sweep compares a block of
+    points with the frontier (and the points of the block with each other) at once,
+    one column at a time, so the comparisons stay in the dtype of the points.
+    """
+    points = np.asarray(points)
+    if len(points) == 0:
+        return np.zeros(0, dtype=np.intp)
+
+    _, unique = np.unique(points, axis=0, return_index=True)
+    unique.sort()
+    sums = points[unique].sum(axis=1, dtype=np.int64)
+    order = unique[np.argsort(-sums, kind="stable")]
+
+    # The frontier is stored column by column, so each comparison is contiguous.
+    frontier_columns = np.empty((points.shape[1], len(order)), dtype=points.dtype)
+    frontier = np.empty(len(order), dtype=np.intp)
+    size = 0
+    for start in range(0, len(order), BLOCK_SIZE):
+        block = order[start : start + BLOCK_SIZE]
+        block_points = points[block]
+        if size:
+            dominated = _get_covered(block_points, frontier_columns[:, :size])
+            block = block[~dominated.any(axis=1)]
+            block_points = points[block]
+
+        # The points are unique, so a point that is at least as good as another
+        # point in every column is better in one of them.
+        covered = _get_covered(block_points, block_points.T)
+        np.fill_diagonal(covered, False)
+        block = block[~covered.any(axis=1)]
+
+        frontier_columns[:, size : size + len(block)] = points[block].T
+        frontier[size : size + len(block)] = block
+        size += len(block)
+
+    return frontier[:size]
+
+
+def _get_covered(points: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """
+    Returns a (points x others) matrix that is True where the other point
+    (the others are stored column by column) is at least as good as the point
+    in every column.
+    """
+    covered = others[0][None, :] >= points[:, 0][:, None]
+    compared = np.empty_like(covered)
+    for i in range(1, len(others)):
+        np.greater_equal(others[i][None, :], points[:, i][:, None], out=compared)
+        covered &= compared
+    return covered
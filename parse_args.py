@@ -1,6 +1,25 @@
 import argparse
 import sys
 
+from armor_set import RESISTANCES
+from output import FORMATS
+
+ACTIONS = [
+    "create",
+    "edit",
+    "compare",
+    "list",
+    "search",
+    "decorate",
+    "query",
+    "sync",
+    "shell",
+    "serve",
+    "batch",
+]
+# The profile options that take a value, they can come before the action.
+PROFILE_VALUE_OPTIONS = ("--profile-pstats", "--profile-trace")
+
 
 def add_create_args(parser: argparse.ArgumentParser):
     group_create = parser.add_argument_group("create")
@@ -53,18 +72,25 @@ def add_create_args(parser: argparse.ArgumentParser):
         help="The armor set name of the leg piece.",
     )
 
+    group_create.add_argument(
+        "--charm",
+        type=str,
+        default="",
+        help="The name of the charm, e.g. attack-charm-iii.",
+    )
+
 
-def add_list_args(parser: argparse.ArgumentParser):
+def add_list_args(parser: argparse.ArgumentParser, list_type: str | None):
     group = parser.add_argument_group("list")
     group.add_argument(
         "type",
-        choices=["set", "piece", "all-pieces", "all-sets"],
+        choices=["set", "piece", "skill", "all-pieces", "all-sets"],
         help="The item(s) to see the details of",
     )
     group.add_argument(
         "-n",
         "--name",
-        required="set" in sys.argv or "piece" in sys.argv,
+        required=list_type in ("set", "piece", "skill"),
         type=str,
         help="the name of the item you want to list",
     )
@@ -72,7 +98,7 @@ def add_list_args(parser: argparse.ArgumentParser):
     group.add_argument(
         "-r",
         "--rank",
-        required="piece" in sys.argv,
+        required=list_type == "piece",
         choices=["low", "high", "master"],
         help="The rank of the armor ",
     )
@@ -80,11 +106,22 @@ def add_list_args(parser: argparse.ArgumentParser):
     group.add_argument(
         "-p",
         "--piece",
-        required="piece" in sys.argv,
+        required=list_type == "piece",
         choices=["head", "chest", "gloves", "waist", "legs", "all"],
         help="The piece of armor you want to see",
     )
 
+    add_format_arg(group)
+
+
+def add_format_arg(group: argparse._ArgumentGroup):
+    group.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="rich",
+        help="rich for the console, json, jsonl or tsv to pipe the output",
+    )
+
 
 def add_edit_args(parser: argparse.ArgumentParser):
     group = parser.add_argument_group("edit")
@@ -108,7 +145,7 @@ def add_edit_args(parser: argparse.ArgumentParser):
         "-p",
         "--piece",
         required=True,
-        choices=["head", "chest", "gloves", "waist", "legs"],
+        choices=["head", "chest", "gloves", "waist", "legs", "charm"],
         help="the piece you want to edit",
     )
 
@@ -120,23 +157,344 @@ def add_edit_args(parser: argparse.ArgumentParser):
     )
 
 
-def parse_args() -> argparse.Namespace:
+def add_compare_args(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("compare")
+    group.add_argument(
+        "names",
+        nargs="*",
+        help="The names of the sets you want to compare",
+    )
+
+    group.add_argument(
+        "-a",
+        "--all",
+        action="store_true",
+        help="Compare all saved sets",
+    )
+
+    group.add_argument(
+        "-d",
+        "--deltas",
+        action="store_true",
+        help="Also show the differences between every pair of sets",
+    )
+
+    group.add_argument(
+        "--panels",
+        action="store_true",
+        help="Show every set in its own panel instead of a single table",
+    )
+
+
+def add_decorate_args(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("decorate")
+    group.add_argument(
+        "-n",
+        "--name",
+        required=True,
+        type=str,
+        help="the name of the set you want to decorate",
+    )
+
+    group.add_argument(
+        "-s",
+        "--skills",
+        required=True,
+        type=parse_skill_targets,
+        help="The target skills and levels, e.g. attack-boost=7,critical-eye=4",
+    )
+
+
+def add_query_args(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("query")
+    group.add_argument(
+        "-r",
+        "--rank",
+        choices=["low", "high", "master"],
+        help="Only show pieces of this rank",
+    )
+
+    group.add_argument(
+        "-p",
+        "--piece",
+        choices=["head", "chest", "gloves", "waist", "legs"],
+        help="Only show pieces of this type",
+    )
+
+    group.add_argument(
+        "-s",
+        "--skills",
+        type=parse_skill_targets,
+        help="The minimum skill levels, e.g. attack-boost=2,critical-eye=1",
+    )
+
+    group.add_argument(
+        "--slot",
+        type=int,
+        choices=[1, 2, 3, 4],
+        help="Only show pieces with a decoration slot of at least this size",
+    )
+
+    add_format_arg(group)
+
+
+def add_sync_args(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("sync")
+    mode = group.add_mutually_exclusive_group()
+    mode.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Download and rewrite all armor data",
+    )
+
+    mode.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Only merge the armor pieces that changed since the last sync",
+    )
+
+
+def parse_skill_targets(value: str) -> dict[str, int]:
+    """
+    Converts a string like 'attack-boost=5,weakness-exploit=3'
+    to a dict where the keys are the skill names and the values the target level.
+    """
+    targets = {}
+    for target in value.split(","):
+        try:
+            skill, level = target.split("=")
+            targets[skill.strip()] = int(level)
+        except ValueError:
+            raise argparse.ArgumentTypeError(
+                f"{target} is not a valid skill target, expected <skill>=<level>"
+            )
+
+    return targets
+
+
+def parse_resistances(value: str) -> list[str]:
+    """
+    Converts a string like 'fire,ice' to a list of resistance names.
+    """
+    resistances = [resistance.strip().lower() for resistance in value.split(",")]
+    for resistance in resistances:
+        if resistance not in RESISTANCES:
+            raise argparse.ArgumentTypeError(
+                f"{resistance} is not a resistance, expected one of "
+                f"{', '.join(RESISTANCES)}"
+            )
+
+    return resistances
+
+
+def add_search_args(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("search")
+    group.add_argument(
+        "-r",
+        "--rank",
+        required=True,
+        choices=["low", "high", "master"],
+        help="The rank of the armor to search through",
+    )
+
+    group.add_argument(
+        "-s",
+        "--skills",
+        required=True,
+        type=parse_skill_targets,
+        help="The required skills and levels, e.g. attack-boost=5,weakness-exploit=3",
+    )
+
+    group.add_argument(
+        "-l",
+        "--limit",
+        type=int,
+        default=10,
+        help="The maximum number of armor sets to show",
+    )
+
+    group.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="The number of processes to search with",
+    )
+
+    mode = group.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--score",
+        choices=["skills", "slots", "free-pieces"],
+        help="Show the best sets by total skill levels, decoration slot capacity "
+        "or the number of free pieces instead of the first sets found",
+    )
+    mode.add_argument(
+        "--pareto",
+        action="store_true",
+        help="Show the sets that no other set beats in reached skill levels, "
+        "defense, the total of the chosen resistances and decoration slot capacity",
+    )
+
+    group.add_argument(
+        "--resistances",
+        type=parse_resistances,
+        default=[],
+        help="The resistances to weigh with --pareto, e.g. fire,ice",
+    )
+
+
+def add_shell_args(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("shell")
+    group.add_argument(
+        "-b",
+        "--batch-size",
+        type=int,
+        default=20,
+        help="The number of changed sets after which the changes are saved to disk",
+    )
+
+
+def add_serve_args(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("serve")
+    group.add_argument(
+        "--host",
+        type=str,
+        default="127.0.0.1",
+        help="The address to listen on",
+    )
+
+    group.add_argument(
+        "--port",
+        type=int,
+        default=8080,
+        help="The port to listen on",
+    )
+
+    group.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="The number of processes that run the build searches",
+    )
+
+    group.add_argument(
+        "--batch-window",
+        type=float,
+        default=2.0,
+        help="The milliseconds to wait for more searches of the same rank to batch",
+    )
+
+
+def add_batch_args(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("batch")
+    group.add_argument(
+        "-f",
+        "--file",
+        required=True,
+        type=str,
+        help="A JSONL file with an argument list or a command string per line",
+    )
+
+    group.add_argument(
+        "--checkpoint",
+        type=int,
+        default=0,
+        help="Save the changed sets every N commands, by default only at the end",
+    )
+
+
+def add_profile_args(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("profile")
+    group.add_argument(
+        "--profile",
+        action="store_true",
+        help="Show the time and allocations of each phase of the action at exit",
+    )
+
+    group.add_argument(
+        "--profile-pstats",
+        type=str,
+        help="Also profile with cProfile and write the pstats to this file",
+    )
+
+    group.add_argument(
+        "--profile-trace",
+        type=str,
+        help="Write the phases to this file as a Chrome trace (json)",
+    )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """
+    Parses the arguments of an action, by default the command line arguments.
+    The shell passes the arguments of each command it reads.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+
     parser = argparse.ArgumentParser(prog="armor-build-tool")
     parser.add_argument(
         "action",
-        choices=["create", "edit", "compare", "list"],
+        choices=ACTIONS,
         help="The action to perform.",
     )
+    add_profile_args(parser)
+
+    # The action is the first positional argument, an option value that is
+    # also the name of an action (like -n list) must not select its parser.
+    positionals = _get_leading_positionals(argv)
+    action = positionals[0] if positionals else None
+    match action:
+        case "create":
+            add_create_args(parser)
+        case "edit":
+            add_edit_args(parser)
+        case "compare":
+            add_compare_args(parser)
+        case "list":
+            add_list_args(parser, positionals[1] if len(positionals) > 1 else None)
+        case "search":
+            add_search_args(parser)
+        case "decorate":
+            add_decorate_args(parser)
+        case "query":
+            add_query_args(parser)
+        case "sync":
+            add_sync_args(parser)
+        case "shell":
+            add_shell_args(parser)
+        case "serve":
+            add_serve_args(parser)
+        case "batch":
+            add_batch_args(parser)
+        case _:
+            print("Missing an action")
+
+    args = parser.parse_args(argv)
+    if action == "search" and args.resistances and not args.pareto:
+        parser.error("argument --resistances: only allowed with --pareto")
+    return args
 
-    if "create" in sys.argv:
-        add_create_args(parser)
-    elif "edit" in sys.argv:
-        add_edit_args(parser)
-    elif "compare" in sys.argv:
-        pass
-    elif "list" in sys.argv:
-        add_list_args(parser)
-    else:
-        print("Missing an action")
 
-    return parser.parse_args()
+def _get_leading_positionals(argv: list[str]) -> list[str]:
+    """
+    Returns the positional arguments before the first option of the action,
+    like the action and the list type, skipping the profile options
+    that can come before the action.
+    """
+    positionals = []
+    tokens = iter(argv)
+    for token in tokens:
+        if token in PROFILE_VALUE_OPTIONS:
+            next(tokens, None)
+        elif token == "--profile" or token.startswith(
+            tuple(f"{option}=" for option in PROFILE_VALUE_OPTIONS)
+        ):
+            continue
+        elif token.startswith("-"):
+            break
+        else:
+            positionals.append(token)
+    return positionals
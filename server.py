@@ -0,0 +1,388 @@
+import asyncio
+import json
+from argparse import ArgumentTypeError
+from collections.abc import Mapping
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from http import HTTPStatus
+from typing import Any, NamedTuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from armor_data import ARMOR_DATA, CHARMS_PATH, load_armor_data, load_charms
+from armor_set import normalize_name
+from parse_args import parse_skill_targets
+from session import Session
+
+MAX_HEADERS = 100
+MAX_BODY_SIZE = 1024 * 1024
+DEFAULT_SEARCH_LIMIT = 10
+
+# A search query is the sorted targets of a search, the key of a batched search.
+SearchQuery = tuple[tuple[str, int], ...]
+
+# The armor data of a search worker process, see init_search_worker.
+_search_data: Mapping[str, Any] = {}
+_search_charms: dict[str, Any] = {}
+_compiled_ranks = {}
+
+
+class ApiError(Exception):
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class HttpRequest(NamedTuple):
+    method: str
+    path: list[str]
+    query: dict[str, str]
+    body: bytes
+    keep_alive: bool
+
+
+class SearchBatcher:
+    """
+    Groups the searches of the same rank that arrive while a search of that rank
+    is waiting or running. A batch is one job in the executor, which compiles the
+    rank once and searches every distinct set of targets once, with the highest
+    limit that was requested for them.
+    The tasks that run the batches are kept until they are done, the event loop
+    only keeps a weak reference to a task.
+    """
+
+    def __init__(self, executor: Executor, batch_window: float = 0.002) -> None:
+        self.executor = executor
+        self.batch_window = batch_window
+        self.pending: dict[str, list[tuple[SearchQuery, int, asyncio.Future]]] = {}
+        self.running: set[str] = set()
+        self.batches = 0
+        self._tasks: set[asyncio.Task] = set()
+
+    async def search(
+        self, rank: str, targets: dict[str, int], limit: int
+    ) -> list[dict[str, Any]]:
+        future = asyncio.get_running_loop().create_future()
+        query = tuple(sorted(targets.items()))
+        self.pending.setdefault(rank, []).append((query, limit, future))
+        if rank not in self.running:
+            self.running.add(rank)
+            task = asyncio.create_task(self._run(rank))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        results = await future
+        return results[:limit]
+
+    async def _run(self, rank: str) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            # Searches that arrive within the window join the first batch.
+            await asyncio.sleep(self.batch_window)
+            while self.pending.get(rank):
+                batch = self.pending.pop(rank)
+                limits = {}
+                for query, limit, _ in batch:
+                    limits[query] = max(limit, limits.get(query, 0))
+
+                self.batches += 1
+                try:
+                    results = await loop.run_in_executor(
+                        self.executor, partial(search_batch, rank, limits)
+                    )
+                except asyncio.CancelledError:
+                    for _, _, future in batch:
+                        future.cancel()
+                    raise
+                except Exception as exc:
+                    for _, _, future in batch:
+                        if not future.done():
+                            future.set_exception(exc)
+                    continue
+
+                for query, _, future in batch:
+                    if not future.done():
+                        future.set_result(results[query])
+        finally:
+            self.running.discard(rank)
+
+    async def close(self) -> None:
+        """
+        Cancels the running batches and the searches that are waiting for them.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        for batch in self.pending.values():
+            for _, _, future in batch:
+                future.cancel()
+        self.pending.clear()
+
+
+class ArmorServer:
+    """
+    JSON API over the armor data and the saved sets of a session.
+    The data stays loaded for all requests. Lookups run on the event loop,
+    the build searches run in the executor, batched per rank.
+
+    GET /pieces?rank=&piece=&skills=attack-boost=2&slot=  pieces in the catalogue
+    GET /pieces/<rank>/<armor set>                         pieces of an armor set
+    GET /sets                                              names of the saved sets
+    GET /sets/<name>                                       a saved set
+    GET /compare?names=set-a,set-b                         skills of saved sets
+    POST /search {"rank":, "skills": {}, "limit":}         armor sets with the skills
+    """
+
+    def __init__(
+        self, session: Session, executor: Executor, batch_window: float = 0.002
+    ) -> None:
+        self.session = session
+        self.batcher = SearchBatcher(executor, batch_window)
+
+    async def start(self, host: str, port: int) -> asyncio.Server:
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def close(self) -> None:
+        await self.batcher.close()
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except ApiError as exc:
+                    writer.write(encode_response(exc.status, {"error": str(exc)}))
+                    break
+                if request is None:
+                    break
+
+                status, body = await self.handle_request(request)
+                writer.write(encode_response(status, body, request.keep_alive))
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, request: HttpRequest) -> tuple[HTTPStatus, Any]:
+        try:
+            match request.method, request.path:
+                case "GET", ["pieces"]:
+                    return HTTPStatus.OK, self.find_pieces(request.query)
+                case "GET", ["pieces", rank, set_name]:
+                    return HTTPStatus.OK, self.get_pieces(rank, set_name)
+                case "GET", ["sets"]:
+                    return HTTPStatus.OK, self.session.armor_sets.get_names()
+                case "GET", ["sets", name]:
+                    return HTTPStatus.OK, self.get_armor_set(name).to_dict()
+                case "GET", ["compare"]:
+                    return HTTPStatus.OK, self.compare(request.query)
+                case "POST", ["search"]:
+                    return HTTPStatus.OK, await self.search(request.body)
+                case _:
+                    raise ApiError(HTTPStatus.NOT_FOUND, "Unknown endpoint")
+        except ApiError as exc:
+            return exc.status, {"error": str(exc)}
+        except Exception as exc:
+            print(f"Failed to handle {request.method} {request.path}: {exc!r}")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal error"}
+
+    def find_pieces(self, query: dict[str, str]) -> list[dict[str, str]]:
+        catalogue = self.session.catalogue
+        if catalogue is None:
+            raise ApiError(HTTPStatus.SERVICE_UNAVAILABLE, "No armor catalogue")
+
+        try:
+            skills = parse_skill_targets(query["skills"]) if "skills" in query else None
+            slot = int(query["slot"]) if "slot" in query else None
+        except (ArgumentTypeError, ValueError) as exc:
+            raise ApiError(HTTPStatus.BAD_REQUEST, str(exc))
+
+        pieces = catalogue.find_pieces(
+            query.get("rank"), query.get("piece"), skills, slot
+        )
+        return [piece._asdict() for piece in pieces]
+
+    def get_pieces(self, rank: str, set_name: str) -> dict[str, Any]:
+        armor_data = self.session.armor_data
+        if rank not in armor_data or set_name not in armor_data[rank]:
+            raise ApiError(
+                HTTPStatus.NOT_FOUND, f"Could not find armor set: {set_name}"
+            )
+        return armor_data[rank][set_name]
+
+    def get_armor_set(self, name: str):
+        armor_set = self.session.armor_sets.get(name)
+        if armor_set is None:
+            raise ApiError(
+                HTTPStatus.NOT_FOUND, f"Could not find set with the name: {name}"
+            )
+        return armor_set
+
+    def compare(self, query: dict[str, str]) -> dict[str, Any]:
+        from compare import SetComparison
+
+        names = [name for name in query.get("names", "").split(",") if name]
+        if not names:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "No sets to compare")
+        return SetComparison([self.get_armor_set(name) for name in names]).to_dict()
+
+    async def search(self, body: bytes) -> list[dict[str, Any]]:
+        try:
+            data = json.loads(body)
+            rank = data["rank"]
+            targets = {
+                str(skill): int(level) for skill, level in data["skills"].items()
+            }
+            limit = int(data.get("limit", DEFAULT_SEARCH_LIMIT))
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError, AttributeError):
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST,
+                'Expected {"rank": <rank>, "skills": {<skill>: <level>}, "limit": <n>}',
+            )
+
+        if rank not in self.session.armor_data:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Could not find rank: {rank}")
+        if limit < 1 or not targets:
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST, "Expected skills and a limit above 0"
+            )
+        self.check_skills(rank, targets)
+
+        return await self.batcher.search(rank, targets, limit)
+
+    def check_skills(self, rank: str, targets: dict[str, int]) -> None:
+        """
+        Checks that the pieces or charms of the rank give each of the skills.
+        """
+        compiled = self.session.get_compiled_rank(rank)
+        known_skills = {normalize_name(skill) for skill in compiled.skills}
+        for skill in targets:
+            if normalize_name(skill) not in known_skills:
+                raise ApiError(HTTPStatus.NOT_FOUND, f"Could not find skill: {skill}")
+
+
+async def read_request(reader: asyncio.StreamReader) -> HttpRequest | None:
+    """
+    Reads a HTTP/1.1 request. Returns None if the client closed the connection.
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Invalid request line")
+
+    headers = {}
+    while (header := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        if len(headers) >= MAX_HEADERS:
+            raise ApiError(
+                HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Too many headers"
+            )
+        name, _, value = header.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Invalid content length")
+    if length > MAX_BODY_SIZE:
+        raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = (
+        connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    )
+
+    url = urlsplit(target)
+    path = [unquote(part) for part in url.path.split("/") if part]
+    return HttpRequest(method, path, dict(parse_qsl(url.query)), body, keep_alive)
+
+
+def encode_response(status: HTTPStatus, body: Any, keep_alive: bool = False) -> bytes:
+    content = json.dumps(body).encode()
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(content)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + content
+
+
+def init_search_worker(
+    armor_data_path: str = ARMOR_DATA, charms_path: str = CHARMS_PATH
+) -> None:
+    """
+    Loads the armor data and charms once per search worker.
+    """
+    global _search_data, _search_charms
+    _search_data = load_armor_data(armor_data_path)
+    _search_charms = load_charms(charms_path)
+    _compiled_ranks.clear()
+
+
+def search_batch(
+    rank: str, limits: dict[SearchQuery, int]
+) -> dict[SearchQuery, list[dict[str, Any]]]:
+    """
+    Searches the builds of each query in the batch with the compiled rank
+    of this worker. Returns the armor sets of each query as dicts.
+    """
+    from armor_matrix import compile_rank
+    from build_search import search_armor_sets
+
+    if rank not in _compiled_ranks:
+        _compiled_ranks[rank] = compile_rank(_search_data[rank], _search_charms)
+
+    results = {}
+    for query, limit in limits.items():
+        armor_sets = search_armor_sets(
+            _search_data,
+            rank,
+            dict(query),
+            limit,
+            charms=_search_charms,
+            compiled=_compiled_ranks[rank],
+        )
+        results[query] = [armor_set.to_dict() for armor_set in armor_sets]
+
+    return results
+
+
+async def serve(
+    session: Session, host: str, port: int, workers: int, batch_window: float
+) -> None:
+    # Sync and load the data before the first request instead of during it.
+    len(session.armor_data)
+    with ProcessPoolExecutor(workers, initializer=init_search_worker) as executor:
+        armor_server = ArmorServer(session, executor, batch_window)
+        server = await armor_server.start(host, port)
+        print(f"Serving the armor API on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await armor_server.close()
+
+
+def run_server(
+    session: Session,
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    workers: int = 1,
+    batch_window: float = 0.002,
+) -> None:
+    try:
+        asyncio.run(serve(session, host, port, workers, batch_window))
+    except KeyboardInterrupt:
+        print("Stopped the server.")
+    finally:
+        session.close()
@@ -0,0 +1,87 @@
+from collections.abc import Mapping
+from functools import cached_property
+from typing import TYPE_CHECKING, Any
+
+from armor_catalogue import ArmorCatalogue
+from armor_data import (LazyArmorData, load_charms, load_decorations,
+                        load_name_indexes, open_armor_catalogue,
+                        sync_armor_data)
+from armor_set_store import ArmorSetStore
+from name_index import NameIndex
+from skill_index import SkillIndex
+from spans import span
+
+# Only for the annotations, armor_matrix imports numpy.
+if TYPE_CHECKING:
+    from armor_matrix import CompiledRank
+
+# The data that is loaded from the synced files and dropped by reload.
+LOADED_DATA = ["charms", "decorations", "skill_index", "catalogue", "name_indexes"]
+
+
+class Session:
+    """
+    The data the actions work on. The armor data, charms, decorations, indexes,
+    catalogue and compiled ranks are loaded the first time an action needs them and
+    then kept, so the commands of a shell only load them once.
+    """
+
+    def __init__(
+        self, armor_sets: ArmorSetStore, armor_data: Mapping[str, Any] | None = None
+    ) -> None:
+        self.armor_sets = armor_sets
+        self.armor_data = LazyArmorData() if armor_data is None else armor_data
+        self._compiled_ranks: dict[str, "CompiledRank"] = {}
+
+    def close(self) -> None:
+        if self.__dict__.get("catalogue") is not None:
+            self.catalogue.close()
+        self.armor_sets.close()
+
+    @cached_property
+    def charms(self) -> dict[str, Any]:
+        return load_charms()
+
+    @cached_property
+    def decorations(self) -> dict[str, Any]:
+        return load_decorations()
+
+    @cached_property
+    def skill_index(self) -> SkillIndex:
+        with span("build skill_index"):
+            return SkillIndex.build(self.armor_data)
+
+    @cached_property
+    def name_indexes(self) -> dict[str, NameIndex]:
+        sync_armor_data()
+        return load_name_indexes()
+
+    @cached_property
+    def catalogue(self) -> ArmorCatalogue | None:
+        sync_armor_data()
+        return open_armor_catalogue()
+
+    def get_compiled_rank(self, rank: str) -> "CompiledRank":
+        """
+        Returns the rank compiled with the charms for the build search.
+        """
+        if rank not in self._compiled_ranks:
+            from armor_matrix import compile_rank
+
+            with span("compile_rank"):
+                self._compiled_ranks[rank] = compile_rank(
+                    self.armor_data[rank], self.charms
+                )
+        return self._compiled_ranks[rank]
+
+    def reload(self) -> None:
+        """
+        Drops the loaded data, e.g. after a sync, so it is loaded again when needed.
+        """
+        if self.__dict__.get("catalogue") is not None:
+            self.catalogue.close()
+        for name in LOADED_DATA:
+            self.__dict__.pop(name, None)
+
+        self.armor_data = LazyArmorData()
+        self._compiled_ranks.clear()
@@ -0,0 +1,72 @@
+from typing import Any, NamedTuple, Self
+
+from armor_set import normalize_name
+
+
+class SkillPosting(NamedTuple):
+    rank: str
+    set_name: str
+    armor_type: str
+    level: int
+
+
+class SkillIndex:
+    """
+    Inverted index from skill name to the armor pieces that give the skill.
+    The skill names are normalized, so 'Weakness Exploit' and 'weakness-exploit'
+    find the same postings. The postings of a skill are sorted by level (highest first).
+    """
+
+    def __init__(
+        self, postings: dict[str, list[SkillPosting]], names: dict[str, str]
+    ) -> None:
+        self.postings = postings
+        self.names = names
+
+    @staticmethod
+    def build(armor_data: dict[str, Any]) -> Self:
+        postings = {}
+        names = {}
+        for rank, armor_sets in armor_data.items():
+            for set_name, pieces in armor_sets.items():
+                for armor_type, piece in pieces.items():
+                    for skill, level in piece.get("skills", {}).items():
+                        key = normalize_name(skill)
+                        names[key] = skill
+                        postings.setdefault(key, []).append(
+                            SkillPosting(rank, set_name, armor_type, level)
+                        )
+
+        for skill_postings in postings.values():
+            skill_postings.sort(key=lambda posting: -posting.level)
+
+        return SkillIndex(postings, names)
+
+    def __contains__(self, skill: str) -> bool:
+        return normalize_name(skill) in self.postings
+
+    def get_skill_name(self, skill: str) -> str | None:
+        return self.names.get(normalize_name(skill))
+
+    def lookup(
+        self,
+        skill: str,
+        rank: str | None = None,
+        armor_type: str | None = None,
+        min_level: int = 1,
+    ) -> list[SkillPosting]:
+        """
+        Returns the pieces that give at least min_level of the skill,
+        optionally only for the given rank and armor type.
+        """
+        postings = []
+        for posting in self.postings.get(normalize_name(skill), []):
+            if posting.level < min_level:
+                break
+            if rank is not None and posting.rank != rank:
+                continue
+            if armor_type is not None and posting.armor_type != armor_type:
+                continue
+            postings.append(posting)
+
+        return postings
@@ -0,0 +1,224 @@
+import functools
+import json
+import os
+import sys
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING, NamedTuple, TypeVar
+
+# cProfile is only imported when a pstats file is written.
+if TYPE_CHECKING:
+    import cProfile
+
+# The time this module was imported, main.py imports it before its other modules,
+# so the start of a profile covers the imports.
+IMPORT_WALL = time.perf_counter_ns()
+IMPORT_CPU = time.process_time_ns()
+IMPORT_BLOCKS = sys.getallocatedblocks()
+
+
+class SpanRecord(NamedTuple):
+    path: tuple[str, ...]
+    start: int
+    wall: int
+    cpu: int
+    blocks: int
+
+
+class _NullSpan:
+    """
+    The span that is returned while nothing is profiled, it does nothing.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "start", "cpu", "blocks")
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._stack.append(self.name)
+        self.blocks = sys.getallocatedblocks()
+        self.cpu = time.process_time_ns()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        end = time.perf_counter_ns()
+        cpu = time.process_time_ns()
+        stack = self.profiler._stack
+        self.profiler.records.append(
+            SpanRecord(
+                tuple(stack),
+                self.start,
+                end - self.start,
+                cpu - self.cpu,
+                sys.getallocatedblocks() - self.blocks,
+            )
+        )
+        stack.pop()
+
+
+class Profiler:
+    """
+    Records the wall time, CPU time and the change in allocated memory blocks
+    of nested spans. A span is identified by its path, the names of the spans
+    it runs in, so the same phase in different actions is reported separately.
+    Optionally cProfile runs while the profiler is active.
+    """
+
+    def __init__(self, with_cprofile: bool = False) -> None:
+        self.records: list[SpanRecord] = []
+        self._stack: list[str] = []
+        self.cprofile: "cProfile.Profile | None" = None
+        if with_cprofile:
+            import cProfile
+
+            self.cprofile = cProfile.Profile()
+
+    def span(self, name: str) -> _Span:
+        return _Span(self, name)
+
+    def start(self) -> None:
+        """
+        Records the time since this module was imported as the startup span
+        and starts cProfile.
+        """
+        self.records.append(
+            SpanRecord(
+                ("startup",),
+                IMPORT_WALL,
+                time.perf_counter_ns() - IMPORT_WALL,
+                time.process_time_ns() - IMPORT_CPU,
+                sys.getallocatedblocks() - IMPORT_BLOCKS,
+            )
+        )
+        if self.cprofile is not None:
+            self.cprofile.enable()
+
+    def stop(self) -> None:
+        if self.cprofile is not None:
+            self.cprofile.disable()
+
+    def get_summary(self) -> list[tuple[SpanRecord, int]]:
+        """
+        Returns the totals and the number of calls of every span path,
+        in the order the paths first started.
+        The blocks are the allocated memory blocks at the end of the span minus
+        those at the start.
+        """
+        totals = {}
+        counts = {}
+        for record in sorted(self.records, key=lambda record: record.start):
+            total = totals.get(record.path)
+            if total is None:
+                totals[record.path] = record
+                counts[record.path] = 1
+                continue
+            totals[record.path] = total._replace(
+                wall=total.wall + record.wall,
+                cpu=total.cpu + record.cpu,
+                blocks=total.blocks + record.blocks,
+            )
+            counts[record.path] += 1
+
+        return [(totals[path], counts[path]) for path in totals]
+
+    def format_summary(self) -> str:
+        lines = [
+            f"{'span':<40} {'calls':>6} {'wall ms':>10} {'cpu ms':>10} {'blocks':>10}"
+        ]
+        for record, count in self.get_summary():
+            name = "  " * (len(record.path) - 1) + record.path[-1]
+            lines.append(
+                f"{name:<40} {count:>6} {record.wall / 1e6:>10.2f} "
+                f"{record.cpu / 1e6:>10.2f} {record.blocks:>10}"
+            )
+        return "\n".join(lines)
+
+    def write_pstats(self, file_path: str) -> None:
+        if self.cprofile is None:
+            raise ValueError("cProfile did not run")
+        self.cprofile.dump_stats(file_path)
+
+    def write_trace(self, file_path: str) -> None:
+        """
+        Writes the spans as complete events of the Chrome trace event format,
+        which chrome://tracing and Perfetto can open.
+        """
+        events = [
+            {
+                "name": record.path[-1],
+                "cat": "span",
+                "ph": "X",
+                "ts": record.start / 1000,
+                "dur": record.wall / 1000,
+                "pid": os.getpid(),
+                "tid": 0,
+                "args": {"cpu_ms": record.cpu / 1e6, "blocks": record.blocks},
+            }
+            for record in self.records
+        ]
+        with open(file_path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+_profiler: Profiler | None = None
+Function = TypeVar("Function", bound=Callable)
+
+
+def span(name: str) -> _Span | _NullSpan:
+    """
+    Returns a context manager that records a span of the active profiler.
+    Without an active profiler it is a shared no-op, so spans can stay in the code.
+    """
+    if _profiler is None:
+        return _NULL_SPAN
+    return _profiler.span(name)
+
+
+def profiled(name: str) -> Callable[[Function], Function]:
+    """
+    Decorates a function to record each call as a span with the given name.
+    """
+
+    def decorator(function: Function) -> Function:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _profiler is None:
+                return function(*args, **kwargs)
+            with _profiler.span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def start_profiler(with_cprofile: bool = False) -> Profiler:
+    global _profiler
+    _profiler = Profiler(with_cprofile)
+    _profiler.start()
+    return _profiler
+
+
+def stop_profiler() -> Profiler | None:
+    global _profiler
+    profiler = _profiler
+    if profiler is not None:
+        profiler.stop()
+    _profiler = None
+    return profiler
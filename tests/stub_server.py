@@ -0,0 +1,75 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer:
+    """
+    Local stand-in for the remote database.
+    Every route maps a path to a (status, headers, body) response,
+    the body is written in small chunks to exercise streaming clients.
+    A request with an If-None-Match header that matches the ETag gets a 304.
+    A route can wait before it responds to simulate latency,
+    and it can fail a number of times with a 503 before it succeeds.
+    The start and end time of every request is kept to check for overlaps.
+    """
+
+    def __init__(self, chunk_size: int = 256) -> None:
+        self.routes = {}
+        self.delays = {}
+        self.failures = {}
+        self.requests = []
+        self.spans = []
+        self.chunk_size = chunk_size
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                start = time.perf_counter()
+                stub.requests.append((self.path, dict(self.headers)))
+                status, headers, body = stub.routes.get(self.path, (404, {}, b""))
+                time.sleep(stub.delays.get(self.path, 0))
+                stub.spans.append((start, time.perf_counter()))
+                if stub.failures.get(self.path, 0) > 0:
+                    stub.failures[self.path] -= 1
+                    status, body = 503, b""
+                etag = headers.get("ETag")
+                if etag is not None and self.headers.get("If-None-Match") == etag:
+                    status, body = 304, b""
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                for start in range(0, len(body), stub.chunk_size):
+                    self.wfile.write(body[start : start + stub.chunk_size])
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def add_route(
+        self,
+        path: str,
+        body: bytes,
+        status: int = 200,
+        headers=None,
+        delay: float = 0,
+        failures: int = 0,
+    ):
+        self.routes[path] = (status, headers or {}, body)
+        self.delays[path] = delay
+        self.failures[path] = failures
+
+    def __enter__(self):
+        threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        ).start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,142 @@
+import os
+import shutil
+from unittest.mock import patch
+
+import pytest
+
+from armor_cache import ArmorCache, open_armor_cache, write_armor_cache
+
+TEST_FOLDER = "./test_cache"
+TEST_PATH = os.path.join(TEST_FOLDER, "armor_data.bin")
+
+
+@pytest.fixture
+def armor_data():
+    return {
+        "low": {},
+        "high": {
+            "set-b": {"head": {"slots": [1, 0, 0, 0], "skills": {"Attack Boost": 1}}},
+        },
+        "master": {
+            "set-b": {
+                "head": {"slots": [0, 0, 0, 1], "skills": {}},
+                "legs": {
+                    "slots": [2, 0, 0, 0],
+                    "skills": {"Weakness Exploit": 2, "Attack Boost": 1},
+                },
+            },
+            "set-a": {
+                "chest": {
+                    "slots": [0, 1, 1, 0],
+                    "skills": {"Ünicode Skill": 3},
+                    "defense": 320,
+                    "resistances": [3, 0, -2, 1, 0],
+                },
+            },
+        },
+    }
+
+
+@pytest.fixture
+def cache_folder():
+    os.makedirs(TEST_FOLDER, exist_ok=True)
+    yield
+    shutil.rmtree(TEST_FOLDER)
+
+
+def test_write_and_open_armor_cache(armor_data, cache_folder):
+    assert write_armor_cache(armor_data, TEST_PATH)
+    cached = open_armor_cache(TEST_PATH)
+
+    assert cached == armor_data
+    assert list(cached) == ["low", "high", "master"]
+    # The sets keep the order of the json, not the order of the names.
+    assert list(cached["master"]) == ["set-b", "set-a"]
+    assert list(cached["master"].items()) == list(armor_data["master"].items())
+    assert len(cached["master"]) == 2
+    cached.cache.close()
+
+
+def test_armor_cache_lookups(armor_data, cache_folder):
+    write_armor_cache(armor_data, TEST_PATH)
+    cached = open_armor_cache(TEST_PATH)
+
+    assert cached["master"]["set-b"]["legs"] == {
+        "slots": [2, 0, 0, 0],
+        "skills": {"Weakness Exploit": 2, "Attack Boost": 1},
+    }
+    assert cached["master"]["set-a"]["chest"]["defense"] == 320
+    assert cached["master"]["set-a"]["chest"]["resistances"] == [3, 0, -2, 1, 0]
+    assert cached["high"].get("set-a") is None
+    assert cached["low"] == {}
+    with pytest.raises(KeyError):
+        cached["not a rank"]
+    cached.cache.close()
+
+
+def test_armor_cache_decodes_sets_once(armor_data, cache_folder):
+    write_armor_cache(armor_data, TEST_PATH)
+    cached = open_armor_cache(TEST_PATH)
+
+    assert list(cached.cache.iter_sets("master")) == [
+        ("set-b", armor_data["master"]["set-b"]),
+        ("set-a", armor_data["master"]["set-a"]),
+    ]
+
+    master = cached["master"]
+    looked_up = master["set-b"]
+    assert cached["master"] is master
+    assert master["set-b"] is looked_up
+
+    with patch.object(cached.cache, "get_set") as get_set:
+        assert dict(master.items()) == armor_data["master"]
+        assert master["set-a"] is master["set-a"]
+        assert master["set-b"] is looked_up
+        with pytest.raises(KeyError):
+            master["set-c"]
+        get_set.assert_not_called()
+    cached.cache.close()
+
+
+@pytest.mark.parametrize(
+    "armor_data",
+    [
+        {"data": "values"},
+        {"master": {"set": {"head": {"slots": [0, 0, 0], "skills": {}}}}},
+        {"master": {"set": {"head": {"slots": [0, 0, 0, 0], "skills": {"a": 0}}}}},
+        {
+            "master": {
+                "set": {
+                    "head": {
+                        "slots": [0, 0, 0, 0],
+                        "skills": {str(i): 1 for i in range(7)},
+                    }
+                }
+            }
+        },
+        {"master": {"set": {"head": {"slots": [0, 0, 0, 0], "defense": -1}}}},
+        {
+            "master": {
+                "set": {"head": {"slots": [0, 0, 0, 0], "resistances": [0, 0, 0]}}
+            }
+        },
+        {
+            "master": {
+                "set": {
+                    "head": {"slots": [0, 0, 0, 0], "resistances": [200, 0, 0, 0, 0]}
+                }
+            }
+        },
+    ],
+)
+def test_write_armor_cache_invalid_data(armor_data, cache_folder):
+    assert not write_armor_cache(armor_data, TEST_PATH)
+    assert not os.path.exists(TEST_PATH)
+
+
+def test_open_armor_cache_invalid_file(cache_folder):
+    with open(TEST_PATH, "wb") as file:
+        file.write(b"not a cache file at all")
+
+    with pytest.raises(ValueError):
+        ArmorCache(TEST_PATH)
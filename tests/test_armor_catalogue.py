@@ -0,0 +1,82 @@
+import os
+import shutil
+
+import pytest
+
+from armor_catalogue import (ArmorCatalogue, CataloguePiece,
+                             write_armor_catalogue)
+
+TEST_FOLDER = "./test_catalogue"
+TEST_PATH = os.path.join(TEST_FOLDER, "armor_data.db")
+
+
+@pytest.fixture
+def catalogue():
+    armor_data = {
+        "high": {
+            "set-a": {"legs": {"slots": [0, 0, 0, 1], "skills": {"Attack Boost": 3}}},
+        },
+        "master": {
+            "set-a": {
+                "head": {"slots": [0, 0, 0, 1], "skills": {"Attack Boost": 2}},
+                "legs": {"slots": [1, 0, 0, 1], "skills": {"Attack Boost": 2}},
+            },
+            "set-b": {
+                "legs": {
+                    "slots": [0, 0, 1, 0],
+                    "skills": {"Attack Boost": 3, "Critical Eye": 1},
+                },
+            },
+            "set-c": {"legs": {"slots": [0, 0, 0, 2], "skills": {"Attack Boost": 1}}},
+        },
+    }
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
+    os.makedirs(TEST_FOLDER)
+    assert write_armor_catalogue(armor_data, TEST_PATH)
+
+    with ArmorCatalogue(TEST_PATH) as catalogue:
+        yield catalogue
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
+
+
+def test_find_pieces(catalogue: ArmorCatalogue):
+    pieces = catalogue.find_pieces("master", "legs", {"Attack Boost": 2}, 4)
+    assert pieces == [CataloguePiece("master", "set-a", "legs")]
+
+
+def test_find_pieces_normalized_skills(catalogue: ArmorCatalogue):
+    pieces = catalogue.find_pieces(skills={"attack-boost": 3, "critical-eye": 1})
+    assert pieces == [CataloguePiece("master", "set-b", "legs")]
+
+
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        ({}, 5),
+        ({"rank": "high"}, 1),
+        ({"armor_type": "head"}, 1),
+        ({"skills": {"Attack Boost": 3}}, 2),
+        ({"min_slot_size": 3}, 5),
+        ({"rank": "master", "min_slot_size": 4}, 3),
+        ({"skills": {"Guard": 1}}, 0),
+    ],
+)
+def test_find_pieces_filters(catalogue: ArmorCatalogue, filters, expected):
+    assert len(catalogue.find_pieces(**filters)) == expected
+
+
+def test_get_piece(catalogue: ArmorCatalogue):
+    assert catalogue.get_piece("master", "set-b", "legs") == {
+        "slots": [0, 0, 1, 0],
+        "skills": {"Attack Boost": 3, "Critical Eye": 1},
+    }
+    assert catalogue.get_piece("master", "set-b", "head") is None
+
+
+def test_write_armor_catalogue_invalid():
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
+    os.makedirs(TEST_FOLDER)
+
+    assert not write_armor_catalogue({"master": ["not a set"]}, TEST_PATH)
+    assert not os.path.exists(TEST_PATH)
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
@@ -5,12 +5,19 @@ from unittest.mock import patch
 
 import pytest
 
-from armor_data import (_parse_skills, _parse_slots, _save_armor_data,
-                        load_armor_data, sync_armor_data)
+from armor_cache import CachedArmorData
+from armor_data import (LazyArmorData, _get_remote_armor_data,
+                        _iter_json_array, _parse_armor_piece, _parse_defense,
+                        _parse_resistances, _parse_skills, _parse_slots,
+                        _save_armor_data, load_armor_data, load_charms,
+                        load_name_indexes, open_armor_catalogue,
+                        sync_armor_data)
+from tests.stub_server import StubServer
 
 TEST_FOLDER = "./test_data"
 TEST_FILE = "armor_data.json"
 TEST_PATH = os.path.join(TEST_FOLDER, TEST_FILE)
+TEST_CACHE_PATH = os.path.join(TEST_FOLDER, "armor_data.bin")
 
 
 def cleanup():
@@ -28,9 +35,11 @@ def make_test_file(data):
 
 
 @pytest.mark.parametrize("force", [False, True])
+@patch("armor_data._get_remote_json")
 @patch("armor_data._get_remote_armor_data")
-def test_sync_armor_data(get_remote_mock, force):
+def test_sync_armor_data(get_remote_mock, get_json_mock, force):
     cleanup()
+    get_json_mock.return_value = {}
     get_remote_mock.return_value = {"data": "values"}
 
     sync_armor_data(force, TEST_FOLDER, TEST_FILE)
@@ -45,8 +54,12 @@ def test_sync_armor_data(get_remote_mock, force):
 @pytest.mark.parametrize(
     "force, expected", [(False, {"data": "values"}), (True, {"new_data": "new_values"})]
 )
+@patch("armor_data._get_remote_json")
 @patch("armor_data._get_remote_armor_data")
-def test_sync_armor_data_already_synced(get_remote_mock, force, expected):
+def test_sync_armor_data_already_synced(
+    get_remote_mock, get_json_mock, force, expected
+):
+    get_json_mock.return_value = {}
     data = {"data": "values"}
     make_test_file(json.dumps(data))
 
@@ -68,6 +81,36 @@ def test_load_armor_data():
     cleanup()
 
 
+def test_load_armor_data_builds_cache():
+    data = {"master": {"set": {"head": {"slots": [0, 0, 0, 1], "skills": {"a": 1}}}}}
+    make_test_file(json.dumps(data))
+
+    assert load_armor_data(TEST_PATH) == data
+    assert os.path.exists(TEST_CACHE_PATH)
+
+    armor_data = load_armor_data(TEST_PATH)
+    assert isinstance(armor_data, CachedArmorData)
+    assert armor_data == data
+    armor_data.cache.close()
+    cleanup()
+
+
+def test_load_armor_data_rebuilds_outdated_cache():
+    data = {"master": {"set": {"head": {"slots": [0, 0, 0, 1], "skills": {"a": 1}}}}}
+    make_test_file(json.dumps(data))
+    load_armor_data(TEST_PATH)
+
+    data["master"]["set"]["head"]["skills"] = {"b": 2}
+    with open(TEST_PATH, "w") as file:
+        file.write(json.dumps(data))
+    cache_time = os.path.getmtime(TEST_CACHE_PATH)
+    os.utime(TEST_PATH, (cache_time + 1, cache_time + 1))
+
+    assert load_armor_data(TEST_PATH) == data
+    assert load_armor_data(TEST_PATH)["master"]["set"]["head"]["skills"] == {"b": 2}
+    cleanup()
+
+
 def test_load_armor_data_invalid():
     data = {"data": "values"}
     make_test_file(json.dumps(data)[:-2])
@@ -78,6 +121,58 @@ def test_load_armor_data_invalid():
     cleanup()
 
 
+def test_open_armor_catalogue_builds_catalogue():
+    data = {"master": {"set": {"legs": {"slots": [0, 0, 0, 1], "skills": {"a": 2}}}}}
+    make_test_file(json.dumps(data))
+
+    with open_armor_catalogue(TEST_PATH) as catalogue:
+        assert catalogue.find_pieces("master", "legs", {"a": 2}, 4)
+    assert os.path.exists(os.path.join(TEST_FOLDER, "armor_data.db"))
+    cleanup()
+
+
+def test_load_name_indexes_caches_indexes():
+    make_test_file(json.dumps({"master": {"kulu-ya-ku-alpha": {}, "leather": {}}}))
+
+    name_indexes = load_name_indexes(TEST_PATH)
+    assert name_indexes["master"].suggest("kulu-ya-ku") == ["kulu-ya-ku-alpha"]
+    assert os.path.exists(os.path.join(TEST_FOLDER, "armor_data.names.json"))
+
+    with patch("armor_data.build_name_indexes") as build_mock:
+        cached = load_name_indexes(TEST_PATH)
+        build_mock.assert_not_called()
+    assert cached["master"].names == ["kulu-ya-ku-alpha", "leather"]
+    cleanup()
+
+
+@patch("armor_data.load_armor_data")
+@patch("armor_data.sync_armor_data")
+def test_lazy_armor_data(sync_mock, load_mock):
+    load_mock.return_value = {"master": {"set": {}}}
+    armor_data = LazyArmorData(TEST_FOLDER, TEST_FILE)
+    sync_mock.assert_not_called()
+    load_mock.assert_not_called()
+
+    assert armor_data["master"] == {"set": {}}
+    assert "master" in armor_data
+    assert list(armor_data.keys()) == ["master"]
+
+    sync_mock.assert_called_once_with(path=TEST_FOLDER, filename=TEST_FILE)
+    load_mock.assert_called_once_with(TEST_PATH)
+
+
+def test_load_charms():
+    charms = {"attack-charm-i": {"skills": {"Attack Boost": 1}}}
+    make_test_file(json.dumps(charms))
+    assert load_charms(TEST_PATH) == charms
+    cleanup()
+
+
+def test_load_charms_missing_file():
+    cleanup()
+    assert load_charms(TEST_PATH) == {}
+
+
 @pytest.mark.parametrize(
     "slots, expected",
     [
@@ -156,6 +251,58 @@ def test_parse_skills_invalid_keys(skills):
     assert result is None
 
 
+@pytest.mark.parametrize(
+    "defense, expected",
+    [
+        ({"base": 2, "max": 58, "augmented": 90}, 58),
+        ({"base": 0, "max": 0}, 0),
+        ({"base": 2}, None),
+        ({"max": -1}, None),
+        ({"max": "58"}, None),
+        (None, None),
+    ],
+)
+def test_parse_defense(defense, expected):
+    assert _parse_defense(defense) == expected
+
+
+@pytest.mark.parametrize(
+    "resistances, expected",
+    [
+        (
+            {"fire": 2, "water": 0, "ice": -3, "thunder": 1, "dragon": 0},
+            [2, 0, -3, 1, 0],
+        ),
+        ({"fire": 2, "water": 0, "ice": -3, "thunder": 1}, None),
+        ({"fire": "2", "water": 0, "ice": -3, "thunder": 1, "dragon": 0}, None),
+        ([], None),
+    ],
+)
+def test_parse_resistances(resistances, expected):
+    assert _parse_resistances(resistances) == expected
+
+
+def test_parse_armor_piece_stats():
+    piece = make_remote_piece("Leather", "low", "head", [], [1])
+    piece["defense"] = {"base": 2, "max": 30}
+    piece["resistances"] = {"fire": 2, "water": 0, "ice": 0, "thunder": 0, "dragon": -1}
+
+    assert _parse_armor_piece(piece) == (
+        "low",
+        "leather",
+        "head",
+        {
+            "slots": [1, 0, 0, 0],
+            "skills": {},
+            "defense": 30,
+            "resistances": [2, 0, 0, 0, -1],
+        },
+    )
+
+    piece["defense"] = {"base": 2}
+    assert _parse_armor_piece(piece) is None
+
+
 def test_save_armor_data():
     cleanup()
     data = {"save": "value"}
@@ -180,3 +327,278 @@ def test_save_armor_data_file_already_exists():
 
     assert result == data
     cleanup()
+
+
+def make_remote_piece(name, rank, armor_type, skills, slots):
+    return {
+        "id": 1,
+        "type": armor_type,
+        "rank": rank,
+        "name": f"{name} {armor_type}",
+        "armorSet": {"id": 1, "name": name},
+        "skills": [{"skillName": skill, "level": level} for skill, level in skills],
+        "slots": [{"rank": rank} for rank in slots],
+    }
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_iter_json_array(chunk_size):
+    data = [{"name": "Ünïcode"}, 12345, [1, 2], "text", None]
+    encoded = json.dumps(data, ensure_ascii=False).encode()
+    chunks = [
+        encoded[start : start + chunk_size]
+        for start in range(0, len(encoded), chunk_size)
+    ]
+
+    assert list(_iter_json_array(chunks)) == data
+
+
+@pytest.mark.parametrize("data", [b"", b"{}", b"[1, 2", b"[1 2]", b"[1,]"])
+def test_iter_json_array_invalid(data):
+    with pytest.raises(ValueError):
+        list(_iter_json_array([data]))
+
+
+def test_get_remote_armor_data():
+    pieces = [
+        make_remote_piece(
+            "Rathalos Alpha +", "master", "head", [("Attack Boost", 2)], [1, 4]
+        ),
+        make_remote_piece("Rathalos Alpha +", "master", "legs", [], []),
+        make_remote_piece("Leather", "low", "head", [("Hunger Resistor", 1)], [1]),
+        {"invalid": "piece"},
+    ]
+
+    with StubServer(chunk_size=100) as server:
+        server.add_route("/armor", json.dumps(pieces).encode())
+        armor_data = _get_remote_armor_data(f"{server.url}/armor", chunk_size=64)
+
+    assert armor_data == {
+        "low": {
+            "leather": {
+                "head": {"slots": [1, 0, 0, 0], "skills": {"Hunger Resistor": 1}}
+            }
+        },
+        "high": {},
+        "master": {
+            "rathalos-alpha-+": {
+                "head": {"slots": [1, 0, 0, 1], "skills": {"Attack Boost": 2}},
+                "legs": {"slots": [0, 0, 0, 0], "skills": {}},
+            }
+        },
+    }
+
+
+def test_get_remote_armor_data_failed_request():
+    with StubServer() as server:
+        server.add_route("/armor", b"", status=500)
+        assert _get_remote_armor_data(f"{server.url}/armor") == {}
+
+
+def test_get_remote_armor_data_invalid_json():
+    with StubServer() as server:
+        server.add_route("/armor", b'[{"type": "head"')
+        assert _get_remote_armor_data(f"{server.url}/armor") == {}
+
+
+def make_remote_pieces(skill_level=2):
+    return [
+        make_remote_piece(
+            "Set A", "master", "head", [("Attack Boost", skill_level)], [1]
+        ),
+        make_remote_piece("Set A", "master", "legs", [], [2]),
+        make_remote_piece("Set B", "high", "head", [("Guard", 1)], []),
+    ]
+
+
+def serve_armor(server, pieces, etag):
+    server.add_route(
+        "/armor",
+        json.dumps(pieces).encode(),
+        headers={"ETag": etag, "Last-Modified": "Wed, 26 Feb 2025 10:00:00 GMT"},
+    )
+    for endpoint in ["/decorations", "/skills", "/charms", "/armor/sets"]:
+        server.add_route(endpoint, b"[]")
+
+
+def test_sync_armor_data_saves_sync_state():
+    cleanup()
+    with StubServer() as server:
+        serve_armor(server, make_remote_pieces(), '"v1"')
+        sync_armor_data(True, TEST_FOLDER, TEST_FILE, base_url=server.url)
+
+    with open(os.path.join(TEST_FOLDER, "sync_state.json")) as file:
+        sync_state = json.load(file)
+
+    assert sync_state["etag"] == '"v1"'
+    assert sync_state["last_modified"] == "Wed, 26 Feb 2025 10:00:00 GMT"
+    assert set(sync_state["hashes"]) == {
+        "master/set-a/head",
+        "master/set-a/legs",
+        "high/set-b/head",
+    }
+    cleanup()
+
+
+def test_refresh_armor_data_not_modified():
+    cleanup()
+    with StubServer() as server:
+        serve_armor(server, make_remote_pieces(), '"v1"')
+        url = server.url
+        sync_armor_data(True, TEST_FOLDER, TEST_FILE, base_url=url)
+        modified_time = os.path.getmtime(TEST_PATH)
+
+        sync_armor_data(False, TEST_FOLDER, TEST_FILE, refresh=True, base_url=url)
+
+        assert server.requests[-1][1]["If-None-Match"] == '"v1"'
+        assert server.requests[-1][1]["If-Modified-Since"] == (
+            "Wed, 26 Feb 2025 10:00:00 GMT"
+        )
+
+    assert os.path.getmtime(TEST_PATH) == modified_time
+    cleanup()
+
+
+def test_refresh_armor_data_unchanged_pieces():
+    cleanup()
+    with StubServer() as server:
+        url = server.url
+        serve_armor(server, make_remote_pieces(), '"v1"')
+        sync_armor_data(True, TEST_FOLDER, TEST_FILE, base_url=url)
+        modified_time = os.path.getmtime(TEST_PATH)
+
+        serve_armor(server, make_remote_pieces(), '"v2"')
+        sync_armor_data(False, TEST_FOLDER, TEST_FILE, refresh=True, base_url=url)
+
+    with open(os.path.join(TEST_FOLDER, "sync_state.json")) as file:
+        assert json.load(file)["etag"] == '"v2"'
+    assert os.path.getmtime(TEST_PATH) == modified_time
+    cleanup()
+
+
+def test_refresh_armor_data_merges_changed_pieces():
+    cleanup()
+    with StubServer() as server:
+        url = server.url
+        serve_armor(server, make_remote_pieces(), '"v1"')
+        sync_armor_data(True, TEST_FOLDER, TEST_FILE, base_url=url)
+
+        # A local change to a piece that does not change remotely must survive.
+        with open(TEST_PATH) as file:
+            armor_data = json.load(file)
+        armor_data["master"]["set-a"]["legs"]["skills"] = {"Local": 1}
+        with open(TEST_PATH, "w") as file:
+            json.dump(armor_data, file)
+
+        pieces = make_remote_pieces(skill_level=3)[:2]
+        pieces.append(make_remote_piece("Set C", "low", "waist", [], [1]))
+        serve_armor(server, pieces, '"v2"')
+        sync_armor_data(False, TEST_FOLDER, TEST_FILE, refresh=True, base_url=url)
+
+    with open(TEST_PATH) as file:
+        result = json.load(file)
+
+    assert result == {
+        "low": {"set-c": {"waist": {"slots": [1, 0, 0, 0], "skills": {}}}},
+        "high": {},
+        "master": {
+            "set-a": {
+                "head": {"slots": [1, 0, 0, 0], "skills": {"Attack Boost": 3}},
+                "legs": {"slots": [0, 1, 0, 0], "skills": {"Local": 1}},
+            }
+        },
+    }
+    cleanup()
+
+
+REMOTE_DECORATIONS = [
+    {
+        "name": "Attack Jewel 1",
+        "slot": 1,
+        "skills": [{"skillName": "Attack Boost", "level": 1}],
+    },
+    {
+        "name": "Critical/Attack Jewel 4",
+        "slot": 4,
+        "skills": [
+            {"skillName": "Critical Eye", "level": 1},
+            {"skillName": "Attack Boost", "level": 1},
+        ],
+    },
+]
+REMOTE_SKILLS = [
+    {"name": "Attack Boost", "ranks": [{"level": 1}, {"level": 2}, {"level": 7}]},
+]
+REMOTE_CHARMS = [
+    {
+        "name": "Attack Charm",
+        "ranks": [
+            {
+                "name": "Attack Charm I",
+                "skills": [{"skillName": "Attack Boost", "level": 1}],
+            },
+            {
+                "name": "Attack Charm II",
+                "skills": [{"skillName": "Attack Boost", "level": 2}],
+            },
+        ],
+    }
+]
+REMOTE_SETS = [
+    {
+        "name": "Rathalos Alpha +",
+        "bonus": {
+            "name": "Rathalos Mastery",
+            "ranks": [
+                {"pieces": 2, "skill": {"skillName": "Master's Touch", "level": 1}}
+            ],
+        },
+    },
+    {"name": "Leather", "bonus": None},
+]
+
+
+def test_sync_armor_data_all_endpoints():
+    cleanup()
+    with StubServer() as server:
+        serve_armor(server, make_remote_pieces(), '"v1"')
+        server.add_route("/decorations", json.dumps(REMOTE_DECORATIONS).encode())
+        server.add_route("/skills", json.dumps(REMOTE_SKILLS).encode())
+        server.add_route("/charms", json.dumps(REMOTE_CHARMS).encode())
+        server.add_route("/armor/sets", json.dumps(REMOTE_SETS).encode())
+        sync_armor_data(True, TEST_FOLDER, TEST_FILE, base_url=server.url)
+
+    def load(filename):
+        with open(os.path.join(TEST_FOLDER, filename)) as file:
+            return json.load(file)
+
+    assert load("decorations.json") == {
+        "attack-jewel-1": {"slot": 1, "skills": {"Attack Boost": 1}},
+        "critical/attack-jewel-4": {
+            "slot": 4,
+            "skills": {"Critical Eye": 1, "Attack Boost": 1},
+        },
+    }
+    assert load("skills.json") == {"Attack Boost": {"max_level": 7}}
+    assert load("charms.json") == {
+        "attack-charm-i": {"skills": {"Attack Boost": 1}},
+        "attack-charm-ii": {"skills": {"Attack Boost": 2}},
+    }
+    assert load("set_bonuses.json") == {
+        "rathalos-alpha-+": {
+            "name": "Rathalos Mastery",
+            "ranks": [{"pieces": 2, "skills": {"Master's Touch": 1}}],
+        }
+    }
+    assert set(load(TEST_FILE)["master"]) == {"set-a"}
+    cleanup()
+
+
+def test_sync_armor_data_failed_endpoint():
+    cleanup()
+    with StubServer() as server:
+        serve_armor(server, make_remote_pieces(), '"v1"')
+        server.add_route("/charms", b"", status=404)
+        sync_armor_data(True, TEST_FOLDER, TEST_FILE, base_url=server.url)
+
+    assert not os.path.exists(TEST_FOLDER)
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from armor_matrix import (CHARM_TYPE, FREE_SLOT, compile_armor_data,
+                          compile_armor_sets, compile_rank)
+from armor_set import ArmorPiece, ArmorRank, ArmorSet, ArmorType
+
+
+@pytest.fixture
+def rank_data():
+    return {
+        "set-a": {
+            "head": {"slots": [1, 0, 0, 0], "skills": {"Attack Boost": 2}},
+            "chest": {"slots": [0, 1, 0, 0], "skills": {"Weakness Exploit": 1}},
+        },
+        "set-b": {
+            "head": {"slots": [0, 0, 0, 1], "skills": {"Weakness Exploit": 2}},
+            "legs": {"slots": [2, 0, 0, 0], "skills": {"Attack Boost": 1}},
+        },
+    }
+
+
+def test_compile_rank(rank_data):
+    compiled = compile_rank(rank_data)
+
+    assert compiled.skills == ["Attack Boost", "Weakness Exploit"]
+    assert compiled.names["head"] == ["set-a", "set-b"]
+    assert compiled.names["chest"] == ["set-a"]
+    assert compiled.names["gloves"] == []
+    np.testing.assert_array_equal(
+        compiled.skill_matrices["head"], [[2, 0], [0, 2], [0, 0]]
+    )
+    np.testing.assert_array_equal(
+        compiled.slot_matrices["head"], [[1, 0, 0, 0], [0, 0, 0, 1], [0, 0, 0, 0]]
+    )
+
+
+def test_compile_rank_charms(rank_data):
+    charms = {
+        "guard-charm-i": {"skills": {"Guard": 1}},
+        "attack-charm-ii": {"skills": {"Attack Boost": 2}},
+    }
+    compiled = compile_rank(rank_data, charms)
+
+    assert compiled.skills == ["Attack Boost", "Guard", "Weakness Exploit"]
+    assert compiled.get_piece_name(CHARM_TYPE, 1) == "attack-charm-ii"
+    np.testing.assert_array_equal(
+        compiled.skill_matrices[CHARM_TYPE], [[0, 1, 0], [2, 0, 0], [0, 0, 0]]
+    )
+
+
+def test_compile_rank_stats(rank_data):
+    rank_data["set-a"]["head"]["defense"] = 50
+    rank_data["set-a"]["head"]["resistances"] = [2, 0, -1, 0, 1]
+    compiled = compile_rank(rank_data, {"guard-charm-i": {"skills": {"Guard": 1}}})
+
+    np.testing.assert_array_equal(
+        compiled.stat_matrices["head"],
+        [[50, 2, 0, -1, 0, 1], [0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0]],
+    )
+    assert compiled.stat_matrices[CHARM_TYPE].shape == (2, 6)
+    assert not compiled.stat_matrices[CHARM_TYPE].any()
+
+
+def test_compile_armor_data(rank_data):
+    compiled = compile_armor_data({"low": {}, "master": rank_data})
+    assert compiled["low"].skills == []
+    assert compiled["master"].names["legs"] == ["set-b"]
+
+
+def test_get_piece_name(rank_data):
+    compiled = compile_rank(rank_data)
+    assert compiled.get_piece_name("head", 1) == "set-b"
+    assert compiled.get_piece_name("head", FREE_SLOT) is None
+
+
+def test_compile_armor_sets():
+    armor_set = ArmorSet(
+        name="test-set",
+        helm=ArmorPiece(
+            armor_type=ArmorType.HELM,
+            name="Piece 1",
+            rank=ArmorRank.MR,
+            slots=[0, 1, 0, 0],
+            buffs={"buff 2": 1, "buff 1": 2},
+        ),
+    )
+
+    skills, skill_matrix, slot_matrix = compile_armor_sets(
+        [armor_set, ArmorSet(name="empty")]
+    )
+
+    assert skills == ["buff 1", "buff 2"]
+    np.testing.assert_array_equal(skill_matrix, [[2, 1], [0, 0]])
+    np.testing.assert_array_equal(slot_matrix, [[0, 1, 0, 0], [0, 0, 0, 0]])
@@ -1,3 +1,5 @@
+import pickle
+
 import pytest
 
 from armor_set import ArmorPiece, ArmorRank, ArmorSet, ArmorType
@@ -53,7 +55,7 @@ def test_armor_piece_new():
     assert armor_piece.rank == ArmorRank.MR
     assert armor_piece.name == "test-armor"
     assert armor_piece.buffs == {}
-    assert armor_piece.slots == [0, 0, 0, 0]
+    assert armor_piece.slots == (0, 0, 0, 0)
 
 
 def test_create_armor_piece_name_not_in_armor_data():
@@ -98,12 +100,68 @@ def test_get_buffs_missing_pieces(armor_set: ArmorSet):
     }
 
 
+def test_get_buffs_charm(armor_set: ArmorSet):
+    armor_set.charm = ArmorPiece.new_charm(
+        "master", "charm-i", {"charm-i": {"skills": {"buff 2": 1, "buff 4": 2}}}
+    )
+
+    result = armor_set.get_buffs()
+    assert result == {
+        "buff 1": 4,
+        "buff 2": 2,
+        "buff 3": 3,
+        "buff 4": 2,
+    }
+
+
+def test_new_charm_not_found():
+    assert ArmorPiece.new_charm("master", "charm-i", {}) is None
+
+
 def test_get_buffs_no_armor():
     armor_set = ArmorSet(name="test-set")
     result = armor_set.get_buffs()
     assert result == {}
 
 
+def test_get_buffs_read_only(armor_set: ArmorSet):
+    with pytest.raises(TypeError):
+        armor_set.get_buffs()["buff 1"] = 10
+
+
+def test_replace_piece_updates_totals(armor_set: ArmorSet):
+    new_leg = ArmorPiece(
+        armor_type=ArmorType.LEG,
+        name="Piece 6",
+        rank=ArmorRank.MR,
+        slots=[0, 0, 0, 1],
+        buffs={"buff 2": 2},
+    )
+    armor_set.replace_piece(ArmorType.LEG, new_leg)
+    armor_set.waist = None
+
+    assert armor_set.get_buffs() == {"buff 1": 4, "buff 2": 3}
+    assert armor_set.get_decoration_slots() == [2, 1, 1, 2]
+
+
+def test_preview_replace(armor_set: ArmorSet):
+    new_waist = ArmorPiece(
+        armor_type=ArmorType.WAIST,
+        name="Piece 6",
+        rank=ArmorRank.MR,
+        slots=[1, 0, 0, 0],
+        buffs={"buff 1": 1},
+    )
+
+    changes, slots = armor_set.preview_replace(ArmorType.WAIST, new_waist)
+
+    assert changes == {"buff 1": 5, "buff 3": 0}
+    assert slots == [5, 1, 1, 1]
+    assert armor_set.waist.name == "Piece 4"
+    assert armor_set.get_buffs() == {"buff 1": 4, "buff 2": 1, "buff 3": 3}
+    assert armor_set.get_decoration_slots() == [4, 1, 3, 1]
+
+
 def test_get_decoration_slots(armor_set: ArmorSet):
     result = armor_set.get_decoration_slots()
     assert result == [4, 1, 3, 1]
@@ -171,7 +229,7 @@ def test_armor_piece_from_dict():
     assert result.armor_type == ArmorType.HELM
     assert result.rank == ArmorRank.MR
     assert result.buffs == {}
-    assert result.slots == [0, 0, 0, 0]
+    assert result.slots == (0, 0, 0, 0)
 
 
 @pytest.mark.parametrize(
@@ -242,6 +300,44 @@ def test_armor_piece_from_dict_invalid_dict(data):
         ArmorPiece.from_dict(data)
 
 
+def test_armor_piece_from_dict_shared():
+    data = {
+        "name": "test",
+        "type": "head",
+        "rank": "master",
+        "buffs": {"buff 1": 1},
+        "slots": [1, 0, 0, 0],
+    }
+    piece = ArmorPiece.from_dict(data)
+
+    assert ArmorPiece.from_dict(dict(data)) is piece
+    assert ArmorPiece.from_dict({**data, "buffs": {"buff 1": 2}}) is not piece
+
+
+def test_armor_piece_new_shared():
+    armor_data = {"master": {"test-armor": {"head": {"slots": [0, 0, 0, 0]}}}}
+    piece = ArmorPiece.new("head", "master", "test-armor", armor_data)
+    assert ArmorPiece.new("head", "master", "test-armor", armor_data) is piece
+
+
+def test_armor_piece_immutable():
+    piece = ArmorPiece(ArmorType.HELM, ArmorRank.MR, "test", {"buff 1": 1}, [0] * 4)
+    with pytest.raises(AttributeError):
+        piece.name = "other"
+    with pytest.raises(AttributeError):
+        piece.extra = 1
+
+
+def test_armor_piece_pickle():
+    piece = ArmorPiece.shared(
+        ArmorType.HELM, ArmorRank.MR, "test", {"buff 1": 1}, [0, 1, 0, 0]
+    )
+    result = pickle.loads(pickle.dumps(piece))
+
+    assert result is piece
+    assert result.buffs == {"buff 1": 1}
+
+
 @pytest.mark.parametrize("data", [{}, None])
 def test_armor_piece_from_dict_no_data(data):
     assert ArmorPiece.from_dict(data) is None
@@ -302,6 +398,7 @@ def test_armor_set_to_dict(armor_set: ArmorSet):
             "slots": [2, 0, 0, 0],
             "buffs": {},
         },
+        "charm": None,
     }
 
     assert armor_set.to_dict() == expected
@@ -316,6 +413,7 @@ def test_armor_set_to_dict_no_pieces():
         "arm": None,
         "waist": None,
         "leg": None,
+        "charm": None,
     }
 
 
@@ -361,6 +459,50 @@ def test_armor_set_from_dict():
     assert result.leg is None
 
 
+def test_armor_set_charm_round_trip(armor_set: ArmorSet):
+    armor_set.charm = ArmorPiece(
+        armor_type=ArmorType.CHARM,
+        name="charm-i",
+        rank=ArmorRank.MR,
+        buffs={"buff 4": 1},
+        slots=[0, 0, 0, 0],
+    )
+    data = armor_set.to_dict()["charm"]
+    assert data == {
+        "type": "charm",
+        "name": "charm-i",
+        "rank": "master",
+        "buffs": {"buff 4": 1},
+        "slots": [0, 0, 0, 0],
+    }
+
+    result = ArmorSet.from_dict(
+        {
+            "name": "test-set",
+            "helm": None,
+            "chest": None,
+            "arm": None,
+            "waist": None,
+            "leg": None,
+            "charm": data,
+        }
+    )
+    assert result.charm.name == "charm-i"
+    assert result.get_buffs() == {"buff 4": 1}
+
+
+def test_armor_set_from_dict_no_charm():
+    data = {
+        "name": "test-set",
+        "helm": None,
+        "chest": None,
+        "arm": None,
+        "waist": None,
+        "leg": None,
+    }
+    assert ArmorSet.from_dict(data).charm is None
+
+
 @pytest.mark.parametrize(
     "data",
     [
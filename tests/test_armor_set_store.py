@@ -0,0 +1,202 @@
+import json
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from armor_set import ArmorPiece, ArmorRank, ArmorSet, ArmorType
+from armor_set_store import (ArmorSetStore, BufferedArmorSetStore,
+                             open_armor_set_store)
+
+TEST_FOLDER = "./test_store"
+TEST_DB_PATH = os.path.join(TEST_FOLDER, "armor_sets.db")
+TEST_JSON_PATH = os.path.join(TEST_FOLDER, "armor_sets.json")
+
+
+def make_armor_set(name, piece_name="Piece 1"):
+    return ArmorSet(
+        name=name,
+        helm=ArmorPiece(
+            armor_type=ArmorType.HELM,
+            name=piece_name,
+            rank=ArmorRank.MR,
+            slots=[1, 0, 0, 0],
+            buffs={"buff 1": 2},
+        ),
+    )
+
+
+@pytest.fixture
+def store():
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
+    with open_armor_set_store(TEST_DB_PATH, TEST_JSON_PATH) as store:
+        yield store
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
+
+
+def test_save_and_get(store: ArmorSetStore):
+    store.save(make_armor_set("set-a"))
+
+    armor_set = store.get("set-a")
+    assert armor_set.name == "set-a"
+    assert armor_set.helm.name == "Piece 1"
+    assert armor_set.get_buffs() == {"buff 1": 2}
+    assert "set-a" in store
+    assert len(store) == 1
+
+
+def test_get_missing(store: ArmorSetStore):
+    assert store.get("set-a") is None
+    assert "set-a" not in store
+
+
+def test_save_replaces_set(store: ArmorSetStore):
+    store.save(make_armor_set("set-a"))
+    store.save(make_armor_set("set-b"))
+    store.save(make_armor_set("set-a", "Piece 2"))
+
+    assert store.get("set-a").helm.name == "Piece 2"
+    assert store.get_names() == ["set-a", "set-b"]
+    assert [armor_set.name for armor_set in store.load_all()] == ["set-a", "set-b"]
+
+
+def test_saved_sets_persist(store: ArmorSetStore):
+    store.save(make_armor_set("set-a"))
+
+    with ArmorSetStore(TEST_DB_PATH) as other:
+        assert other.get_names() == ["set-a"]
+
+
+def test_migrate_json_once():
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
+    os.makedirs(TEST_FOLDER)
+    saved_sets = [
+        make_armor_set("set-a").to_dict(),
+        make_armor_set("set-b").to_dict(),
+        make_armor_set("set-a", "Piece 2").to_dict(),
+    ]
+    with open(TEST_JSON_PATH, "w") as file:
+        json.dump(saved_sets, file)
+
+    with open_armor_set_store(TEST_DB_PATH, TEST_JSON_PATH) as store:
+        assert store.get_names() == ["set-a", "set-b"]
+        assert store.get("set-a").helm.name == "Piece 1"
+
+    with open(TEST_JSON_PATH, "w") as file:
+        json.dump([make_armor_set("set-c").to_dict()], file)
+
+    with open_armor_set_store(TEST_DB_PATH, TEST_JSON_PATH) as store:
+        assert store.get_names() == ["set-a", "set-b"]
+
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
+
+
+def test_save_all(store: ArmorSetStore):
+    store.save(make_armor_set("set-b", "Piece 2"))
+    store.save_all([make_armor_set("set-a"), make_armor_set("set-b")])
+
+    assert store.get_names() == ["set-b", "set-a"]
+    assert store.get("set-b").helm.name == "Piece 1"
+
+
+@pytest.fixture
+def buffered_store():
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
+    store = open_armor_set_store(TEST_DB_PATH, TEST_JSON_PATH, batch_size=3)
+    yield store
+    store.close()
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
+
+
+def test_buffered_store_flushes_in_batches(buffered_store: BufferedArmorSetStore):
+    buffered_store.save(make_armor_set("set-a"))
+    buffered_store.save(make_armor_set("set-b"))
+
+    assert buffered_store.get_names() == ["set-a", "set-b"]
+    assert buffered_store.get("set-a").helm.name == "Piece 1"
+    assert buffered_store.get_pending_count() == 2
+    with ArmorSetStore(TEST_DB_PATH) as other:
+        assert other.get_names() == []
+
+    buffered_store.save(make_armor_set("set-c"))
+    assert buffered_store.get_pending_count() == 0
+    with ArmorSetStore(TEST_DB_PATH) as other:
+        assert other.get_names() == ["set-a", "set-b", "set-c"]
+
+
+def test_buffered_store_flushes_on_close():
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
+    with open_armor_set_store(TEST_DB_PATH, batch_size=10) as store:
+        store.save(make_armor_set("set-a"))
+        store.save(make_armor_set("set-a", "Piece 2"))
+
+    with ArmorSetStore(TEST_DB_PATH) as other:
+        assert other.get_names() == ["set-a"]
+        assert other.get("set-a").helm.name == "Piece 2"
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
+
+
+def test_buffered_store_keeps_loaded_sets(buffered_store: BufferedArmorSetStore):
+    with ArmorSetStore(TEST_DB_PATH) as other:
+        other.save_all([make_armor_set("set-a"), make_armor_set("set-b")])
+
+    armor_set = buffered_store.get("set-a")
+    assert buffered_store.get("set-a") is armor_set
+    assert buffered_store.load_all()[0] is armor_set
+    assert "set-b" in buffered_store
+    assert "set-c" not in buffered_store
+    assert len(buffered_store) == 2
+
+
+def test_find_similar_names(store: ArmorSetStore):
+    store.save_all(
+        [
+            make_armor_set("rathalos-build"),
+            make_armor_set("rathian-build"),
+            make_armor_set("odogaron"),
+        ]
+    )
+
+    assert store.find_similar_names("ratalos-build") == [
+        "rathalos-build",
+        "rathian-build",
+    ]
+    assert store.find_similar_names("ratalos-build", limit=1) == ["rathalos-build"]
+    assert store.find_similar_names("xyz") == []
+
+
+def test_find_similar_names_buffered(buffered_store: BufferedArmorSetStore):
+    buffered_store.save(make_armor_set("odogaron"))
+    buffered_store.save(make_armor_set("odogaron-2"))
+    buffered_store.flush()
+    buffered_store.save(make_armor_set("odogaron-3"))
+    buffered_store.save(make_armor_set("odogaron"))
+
+    assert buffered_store.find_similar_names("odogron", limit=5) == [
+        "odogaron",
+        "odogaron-2",
+        "odogaron-3",
+    ]
+    assert buffered_store.get_pending_count() == 2
+
+
+def test_migrate_name_trigrams():
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
+    os.makedirs(TEST_FOLDER)
+    connection = sqlite3.connect(TEST_DB_PATH)
+    connection.execute(
+        "CREATE TABLE armor_sets ("
+        "id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, data TEXT NOT NULL)"
+    )
+    connection.execute(
+        "INSERT INTO armor_sets (name, data) VALUES (?, ?)",
+        ("odogaron", json.dumps(make_armor_set("odogaron").to_dict())),
+    )
+    connection.execute("PRAGMA user_version = 1")
+    connection.commit()
+    connection.close()
+
+    with ArmorSetStore(TEST_DB_PATH) as store:
+        assert store.find_similar_names("odogron") == ["odogaron"]
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
@@ -0,0 +1,419 @@
+import itertools
+import random
+from collections import Counter
+
+import pytest
+
+from build_search import (ARMOR_TYPES, BuildRanking, normalize_name,
+                          search_armor_sets, search_pareto_armor_sets,
+                          search_ranked_armor_sets)
+
+
+def make_piece(skills):
+    return {"slots": [0, 0, 0, 0], "skills": skills}
+
+
+@pytest.fixture
+def armor_data():
+    return {
+        "low": {},
+        "high": {},
+        "master": {
+            "set-a": {
+                armor_type: make_piece({"Attack Boost": 2})
+                for armor_type in ARMOR_TYPES
+            },
+            "set-b": {
+                armor_type: make_piece({"Weakness Exploit": 1, "Attack Boost": 1})
+                for armor_type in ARMOR_TYPES
+            },
+            "set-c": {armor_type: make_piece({}) for armor_type in ARMOR_TYPES},
+        },
+    }
+
+
+def test_normalize_name():
+    assert normalize_name("Attack Boost") == "attack-boost"
+
+
+def test_search_armor_sets(armor_data):
+    results = search_armor_sets(
+        armor_data, "master", {"attack-boost": 5, "weakness-exploit": 2}
+    )
+
+    assert results
+    for armor_set in results:
+        buffs = armor_set.get_buffs()
+        assert buffs["Attack Boost"] >= 5
+        assert buffs["Weakness Exploit"] >= 2
+
+
+def test_search_armor_sets_leaves_unneeded_slots_free(armor_data):
+    results = search_armor_sets(armor_data, "master", {"attack-boost": 2})
+
+    assert results[0].get_piece_names() == {
+        "head": "set-a",
+        "chest": "-",
+        "gloves": "-",
+        "waist": "-",
+        "legs": "-",
+        "charm": "-",
+    }
+
+
+def test_search_armor_sets_limit(armor_data):
+    results = search_armor_sets(armor_data, "master", {"attack-boost": 4}, limit=3)
+    assert len(results) == 3
+    assert [armor_set.name for armor_set in results] == [
+        "search-1",
+        "search-2",
+        "search-3",
+    ]
+
+
+@pytest.mark.parametrize(
+    "targets",
+    [
+        {"attack-boost": 11},
+        {"weakness-exploit": 6},
+        {"attack-boost": 10, "weakness-exploit": 1},
+    ],
+)
+def test_search_armor_sets_unreachable(armor_data, targets):
+    assert search_armor_sets(armor_data, "master", targets) == []
+
+
+def test_search_armor_sets_unknown_skill(armor_data):
+    assert search_armor_sets(armor_data, "master", {"not-a-skill": 1}) == []
+
+
+def test_search_armor_sets_unknown_rank(armor_data):
+    assert search_armor_sets(armor_data, "not-a-rank", {"attack-boost": 1}) == []
+
+
+def test_search_armor_sets_workers(armor_data):
+    targets = {"attack-boost": 6, "weakness-exploit": 1}
+    expected = search_armor_sets(armor_data, "master", targets)
+    results = search_armor_sets(armor_data, "master", targets, workers=2)
+
+    assert [armor_set.get_piece_names() for armor_set in results] == [
+        armor_set.get_piece_names() for armor_set in expected
+    ]
+
+
+@pytest.fixture
+def charms():
+    return {
+        "attack-charm-i": {"skills": {"Attack Boost": 1}},
+        "attack-charm-iii": {"skills": {"Attack Boost": 3}},
+        "exploit-charm-i": {"skills": {"Weakness Exploit": 1}},
+    }
+
+
+def test_search_armor_sets_charm(armor_data, charms):
+    results = search_armor_sets(
+        armor_data, "master", {"attack-boost": 5}, charms=charms
+    )
+
+    assert results[0].get_piece_names() == {
+        "head": "set-a",
+        "chest": "-",
+        "gloves": "-",
+        "waist": "-",
+        "legs": "-",
+        "charm": "attack-charm-iii",
+    }
+    for armor_set in results:
+        assert armor_set.get_buffs()["Attack Boost"] >= 5
+
+
+def test_search_armor_sets_charm_alone(armor_data, charms):
+    results = search_armor_sets(
+        armor_data, "master", {"attack-boost": 3}, charms=charms
+    )
+
+    assert len(results) == 1
+    assert results[0].get_piece_names()["charm"] == "attack-charm-iii"
+    assert results[0].get_buffs() == {"Attack Boost": 3}
+
+
+def test_search_armor_sets_charm_reaches_more(armor_data, charms):
+    targets = {"attack-boost": 10, "weakness-exploit": 1}
+    assert search_armor_sets(armor_data, "master", targets) == []
+
+    results = search_armor_sets(armor_data, "master", targets, charms=charms)
+    assert results
+    for armor_set in results:
+        buffs = armor_set.get_buffs()
+        assert buffs["Attack Boost"] >= 10
+        assert buffs["Weakness Exploit"] >= 1
+
+
+def test_search_armor_sets_charm_workers(armor_data, charms):
+    targets = {"attack-boost": 8, "weakness-exploit": 2}
+    expected = search_armor_sets(armor_data, "master", targets, charms=charms)
+    results = search_armor_sets(armor_data, "master", targets, workers=2, charms=charms)
+
+    assert [armor_set.get_piece_names() for armor_set in results] == [
+        armor_set.get_piece_names() for armor_set in expected
+    ]
+
+
+def test_build_ranking():
+    ranking = BuildRanking(2)
+    assert ranking.get_min_score() is None
+    assert ranking.push(3, (1,))
+    assert ranking.push(5, (2,))
+    assert ranking.get_min_score() == 3
+    assert not ranking.push(3, (3,))
+    assert ranking.push(4, (4,))
+    assert not ranking.push(4, (5,))
+
+    assert len(ranking) == 2
+    assert ranking.get_builds() == [(5, (2,)), (4, (4,))]
+
+
+def test_build_ranking_invalid_size():
+    with pytest.raises(ValueError):
+        BuildRanking(0)
+
+
+def get_slot_capacity(armor_set):
+    return sum(
+        size * count
+        for size, count in enumerate(armor_set.get_decoration_slots(), start=1)
+    )
+
+
+def score_all_builds(armor_data, charms, targets, score):
+    """
+    Scores every build of the master rank that reaches the targets, including
+    the builds with pieces that are not needed for the targets. Builds that only
+    differ in the pieces without target skills or in the charm are ranked as one,
+    by the best of them.
+    """
+    master = armor_data["master"]
+    best_scores = {}
+    for sets in itertools.product([*master, None], repeat=len(ARMOR_TYPES)):
+        pieces = [
+            master[name][armor_type] if name is not None else None
+            for name, armor_type in zip(sets, ARMOR_TYPES)
+        ]
+        target_pieces = tuple(
+            name if piece and targets.keys() & piece["skills"].keys() else None
+            for name, piece in zip(sets, pieces)
+        )
+        pieces = [piece for piece in pieces if piece is not None]
+        for charm in [*charms.values(), None]:
+            levels = Counter()
+            for piece in pieces + ([charm] if charm else []):
+                levels.update(piece["skills"])
+            if any(levels[skill] < level for skill, level in targets.items()):
+                continue
+
+            if score == "skills":
+                build_score = sum(levels.values())
+            else:
+                build_score = sum(
+                    size * count
+                    for piece in pieces
+                    for size, count in enumerate(piece["slots"], start=1)
+                )
+            best_scores[target_pieces] = max(
+                best_scores.get(target_pieces, build_score), build_score
+            )
+    return sorted(best_scores.values(), reverse=True)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("score", ["skills", "slots"])
+def test_search_ranked_armor_sets(stat_armor_data, charms, score, workers):
+    stat_armor_data["master"]["set-b"]["gloves"]["slots"] = [1, 1, 0, 0]
+    targets = {"Attack Boost": 6, "Weakness Exploit": 1}
+    expected = score_all_builds(stat_armor_data, charms, targets, score)[:3]
+
+    best = []
+    results = search_ranked_armor_sets(
+        stat_armor_data,
+        "master",
+        targets,
+        score,
+        limit=3,
+        workers=workers,
+        charms=charms,
+        on_best=lambda score, armor_set: best.append(score),
+    )
+
+    assert [build_score for build_score, _ in results] == expected
+    get_score = {
+        "skills": lambda armor_set: sum(armor_set.get_buffs().values()),
+        "slots": get_slot_capacity,
+    }[score]
+    for build_score, armor_set in results:
+        assert get_score(armor_set) == build_score
+        assert armor_set.get_buffs()["Attack Boost"] >= 6
+    assert len({str(armor_set.get_piece_names()) for _, armor_set in results}) == 3
+    assert [armor_set.name for _, armor_set in results] == [
+        "search-1",
+        "search-2",
+        "search-3",
+    ]
+    assert best == sorted(best) and best[-1] == expected[0]
+
+
+def test_search_ranked_armor_sets_free_pieces(armor_data, charms):
+    results = search_ranked_armor_sets(
+        armor_data, "master", {"attack-boost": 5}, "free-pieces", limit=1, charms=charms
+    )
+
+    assert results[0][0] == 4
+    assert results[0][1].get_piece_names()["charm"] == "attack-charm-iii"
+
+
+def test_search_ranked_armor_sets_unknown_score(armor_data):
+    with pytest.raises(ValueError):
+        search_ranked_armor_sets(armor_data, "master", {"attack-boost": 2}, "luck")
+
+
+@pytest.fixture
+def stat_armor_data(armor_data):
+    master = armor_data["master"]
+    for armor_type in ARMOR_TYPES:
+        master["set-a"][armor_type].update(defense=10, resistances=[0, 0, -1, 0, 0])
+        master["set-b"][armor_type].update(defense=20, resistances=[0, 0, 0, 0, 0])
+        master["set-c"][armor_type].update(defense=15, resistances=[2, 0, 0, 0, 0])
+    master["set-c"]["head"]["slots"] = [0, 0, 1, 0]
+    return armor_data
+
+
+def dominates(first, second):
+    return all(a >= b for a, b in zip(first, second)) and first != second
+
+
+def test_search_pareto_armor_sets(stat_armor_data, charms):
+    count, results = search_pareto_armor_sets(
+        stat_armor_data,
+        "master",
+        {"attack-boost": 5, "weakness-exploit": 1},
+        ["fire"],
+        charms=charms,
+    )
+
+    assert count == len(results)
+    frontier = [tuple(objectives.values()) for objectives, _ in results]
+    assert frontier == sorted(frontier, reverse=True)
+    assert not any(
+        dominates(first, second) for first in frontier for second in frontier
+    )
+    assert list(results[0][0]) == ["levels", "defense", "fire", "slots"]
+    # Five set-b pieces and the attack charm reach every level with the most defense.
+    assert results[0][0] == {"levels": 6, "defense": 100, "fire": 0, "slots": 0}
+    assert {objectives["fire"] for objectives, _ in results} >= {10}
+
+    for objectives, armor_set in results:
+        buffs = armor_set.get_buffs()
+        levels = min(buffs.get("Attack Boost", 0), 5)
+        levels += min(buffs.get("Weakness Exploit", 0), 1)
+        assert objectives["levels"] == levels
+        assert objectives["slots"] == sum(
+            size * count
+            for size, count in enumerate(armor_set.get_decoration_slots(), start=1)
+        )
+
+
+def test_search_pareto_armor_sets_matches_all_builds(stat_armor_data):
+    targets = {"attack-boost": 4, "weakness-exploit": 2}
+    _, results = search_pareto_armor_sets(
+        stat_armor_data, "master", targets, ["fire", "ice"]
+    )
+
+    master = stat_armor_data["master"]
+    builds = []
+    for sets in itertools.product([*master, None], repeat=len(ARMOR_TYPES)):
+        pieces = [
+            master[name][armor_type]
+            for name, armor_type in zip(sets, ARMOR_TYPES)
+            if name is not None
+        ]
+        levels = {
+            skill: sum(piece["skills"].get(skill, 0) for piece in pieces)
+            for skill in ["Attack Boost", "Weakness Exploit"]
+        }
+        builds.append(
+            (
+                min(levels["Attack Boost"], 4) + min(levels["Weakness Exploit"], 2),
+                sum(piece["defense"] for piece in pieces),
+                sum(
+                    piece["resistances"][0] + piece["resistances"][2]
+                    for piece in pieces
+                ),
+                sum(
+                    size * count
+                    for piece in pieces
+                    for size, count in enumerate(piece["slots"], start=1)
+                ),
+            )
+        )
+    expected = {
+        build
+        for build in builds
+        if not any(dominates(other, build) for other in builds)
+    }
+
+    assert list(results[0][0]) == ["levels", "defense", "fire+ice", "slots"]
+    assert {tuple(objectives.values()) for objectives, _ in results} == expected
+
+
+def test_search_pareto_armor_sets_limit(stat_armor_data):
+    targets = {"attack-boost": 4, "weakness-exploit": 2}
+    count, results = search_pareto_armor_sets(
+        stat_armor_data, "master", targets, ["fire"]
+    )
+    limited_count, limited = search_pareto_armor_sets(
+        stat_armor_data, "master", targets, ["fire"], limit=2
+    )
+
+    assert count > 2 and limited_count == count
+    assert [objectives for objectives, _ in limited] == [
+        objectives for objectives, _ in results[:2]
+    ]
+    assert [armor_set.name for _, armor_set in limited] == ["search-1", "search-2"]
+
+
+@pytest.fixture
+def random_armor_data():
+    generator = random.Random(0)
+    skills = [f"Skill {i}" for i in range(20)]
+    return {
+        "master": {
+            f"set-{i}": {
+                armor_type: {
+                    "slots": [generator.randint(0, 1) for _ in range(4)],
+                    "skills": {
+                        skill: generator.randint(1, 3)
+                        for skill in generator.sample(skills, 2)
+                    },
+                    "defense": generator.randint(100, 200),
+                    "resistances": [generator.randint(-3, 3) for _ in range(5)],
+                }
+                for armor_type in ARMOR_TYPES
+            }
+            for i in range(40)
+        }
+    }
+
+
+def test_search_pareto_armor_sets_many_resistances(random_armor_data):
+    targets = {"Skill 0": 3, "Skill 1": 2, "Skill 2": 2}
+    count, results = search_pareto_armor_sets(
+        random_armor_data, "master", targets, ["fire", "water", "ice"], limit=10
+    )
+
+    assert count > len(results) == 10
+
+
+def test_search_pareto_armor_sets_unknown_resistance(stat_armor_data):
+    with pytest.raises(ValueError):
+        search_pareto_armor_sets(
+            stat_armor_data, "master", {"attack-boost": 2}, ["poison"]
+        )
@@ -0,0 +1,74 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from armor_set import ArmorPiece, ArmorRank, ArmorSet, ArmorType
+from compare import SetComparison, print_comparison
+
+
+def make_set(name, buffs, slots):
+    return ArmorSet(
+        name=name,
+        helm=ArmorPiece(
+            armor_type=ArmorType.HELM,
+            name="Piece",
+            rank=ArmorRank.MR,
+            slots=slots,
+            buffs=buffs,
+        ),
+    )
+
+
+@pytest.fixture
+def armor_sets():
+    return [
+        make_set("set-a", {"buff 1": 2}, [1, 0, 0, 0]),
+        make_set("set-b", {"buff 1": 1, "buff 2": 3}, [0, 0, 0, 1]),
+        make_set("set-c", {}, [0, 0, 0, 0]),
+    ]
+
+
+def test_set_comparison_to_dict(armor_sets):
+    assert SetComparison(armor_sets).to_dict() == {
+        "names": ["set-a", "set-b", "set-c"],
+        "skills": {"buff 1": [2, 1, 0], "buff 2": [0, 3, 0]},
+        "slots": [[1, 0, 0, 0], [0, 0, 0, 1], [0, 0, 0, 0]],
+    }
+
+
+def test_set_comparison(armor_sets):
+    comparison = SetComparison(armor_sets)
+
+    assert comparison.names == ["set-a", "set-b", "set-c"]
+    assert comparison.skills == ["buff 1", "buff 2"]
+    np.testing.assert_array_equal(comparison.skill_matrix, [[2, 0], [1, 3], [0, 0]])
+    np.testing.assert_array_equal(
+        comparison.slot_matrix, [[1, 0, 0, 0], [0, 0, 0, 1], [0, 0, 0, 0]]
+    )
+
+
+def test_pairwise_deltas(armor_sets):
+    pairs, skill_deltas, slot_deltas = SetComparison(armor_sets).pairwise_deltas()
+
+    np.testing.assert_array_equal(pairs, [[0, 1], [0, 2], [1, 2]])
+    np.testing.assert_array_equal(skill_deltas, [[-1, 3], [-2, 0], [-1, -3]])
+    np.testing.assert_array_equal(
+        slot_deltas, [[-1, 0, 0, 1], [-1, 0, 0, 0], [0, 0, 0, -1]]
+    )
+
+
+def test_set_comparison_calls_get_buffs_once(armor_sets):
+    with patch.object(
+        ArmorSet, "get_buffs", autospec=True, side_effect=ArmorSet.get_buffs
+    ) as get_buffs_mock:
+        SetComparison(armor_sets).pairwise_deltas()
+
+    assert get_buffs_mock.call_count == len(armor_sets)
+
+
+def test_print_comparison(armor_sets, capsys):
+    print_comparison(SetComparison(armor_sets), show_deltas=True)
+    output = capsys.readouterr().out
+    assert "set-b vs set-a" in output
+    assert "buff 2" in output
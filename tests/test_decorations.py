@@ -0,0 +1,83 @@
+import pytest
+
+from armor_set import ArmorPiece, ArmorRank, ArmorSet, ArmorType
+from decorations import (DecorationResult, DecorationSolver,
+                         fill_decoration_slots)
+
+
+@pytest.fixture
+def decorations():
+    return {
+        "attack-jewel-1": {"slot": 1, "skills": {"Attack Boost": 1}},
+        "expert-jewel-1": {"slot": 1, "skills": {"Critical Eye": 1}},
+        "attack-jewel-old": {"slot": 2, "skills": {"Attack Boost": 1}},
+        "attack-expert-jewel-4": {
+            "slot": 4,
+            "skills": {"Attack Boost": 1, "Critical Eye": 1},
+        },
+        "guard-jewel-2": {"slot": 2, "skills": {"Guard": 1}},
+    }
+
+
+def test_useful_decorations(decorations):
+    solver = DecorationSolver(decorations, ["attack-boost", "critical-eye"])
+    names = [decoration.name for decoration in solver.decorations]
+    # The guard jewel gives no target skill and the old attack jewel is dominated.
+    assert names == ["attack-jewel-1", "expert-jewel-1", "attack-expert-jewel-4"]
+
+
+def test_solve_larger_slot(decorations):
+    solver = DecorationSolver(decorations, ["attack-boost"])
+    result = solver.solve([0, 0, 1, 0], {"attack-boost": 2})
+    assert result == DecorationResult([(3, "attack-jewel-1")], {"attack-boost": 1})
+
+
+def test_solve_smallest_slot_first(decorations):
+    solver = DecorationSolver(decorations, ["attack-boost"])
+    result = solver.solve([1, 0, 0, 1], {"attack-boost": 1})
+    assert result == DecorationResult([(1, "attack-jewel-1")], {})
+
+
+def test_solve_best_coverage(decorations):
+    solver = DecorationSolver(decorations, ["attack-boost", "critical-eye"])
+    result = solver.solve([1, 0, 0, 1], {"attack-boost": 2, "critical-eye": 1})
+    assert sorted(result.decorations) == [
+        (1, "attack-jewel-1"),
+        (4, "attack-expert-jewel-4"),
+    ]
+    assert result.remaining == {}
+
+
+def test_solve_prefers_least_capacity(decorations):
+    solver = DecorationSolver(decorations, ["attack-boost", "critical-eye"])
+    result = solver.solve([2, 0, 0, 1], {"attack-boost": 1, "critical-eye": 1})
+    assert sorted(result.decorations) == [
+        (1, "attack-jewel-1"),
+        (1, "expert-jewel-1"),
+    ]
+
+
+def test_solve_no_deficit(decorations):
+    solver = DecorationSolver(decorations, ["attack-boost"])
+    assert solver.solve([3, 0, 0, 0], {"attack-boost": -1}) == DecorationResult([], {})
+
+
+def test_fill_decoration_slots(decorations):
+    armor_set = ArmorSet(
+        name="test-set",
+        helm=ArmorPiece(
+            armor_type=ArmorType.HELM,
+            name="Piece 1",
+            rank=ArmorRank.MR,
+            slots=[1, 1, 0, 0],
+            buffs={"Attack Boost": 1},
+        ),
+    )
+
+    result = fill_decoration_slots(armor_set, {"Attack Boost": 4}, decorations)
+
+    assert sorted(result.decorations) == [
+        (1, "attack-jewel-1"),
+        (2, "attack-jewel-1"),
+    ]
+    assert result.remaining == {"attack-boost": 1}
@@ -0,0 +1,58 @@
+from armor_data import ARMOR_ENDPOINT, REMOTE_ENDPOINTS
+from fetch import create_session, fetch_concurrently, get_json
+from tests.stub_server import StubServer
+
+
+def test_get_json():
+    with StubServer() as server, create_session() as session:
+        server.add_route("/skills", b'[{"name": "Attack Boost"}]')
+        assert get_json(session, f"{server.url}/skills") == [{"name": "Attack Boost"}]
+
+
+def test_get_json_failed_request():
+    with StubServer() as server, create_session(retries=0) as session:
+        server.add_route("/skills", b"", status=404)
+        assert get_json(session, f"{server.url}/skills") is None
+
+
+def test_get_json_invalid_json():
+    with StubServer() as server, create_session() as session:
+        server.add_route("/skills", b"[{")
+        assert get_json(session, f"{server.url}/skills") is None
+
+
+def test_get_json_retries():
+    with StubServer() as server, create_session(backoff=0) as session:
+        server.add_route("/skills", b"[]", failures=2)
+        assert get_json(session, f"{server.url}/skills") == []
+        assert len(server.requests) == 3
+
+
+def test_get_json_retries_exhausted():
+    with StubServer() as server, create_session(retries=1, backoff=0) as session:
+        server.add_route("/skills", b"[]", failures=5)
+        assert get_json(session, f"{server.url}/skills") is None
+        assert len(server.requests) == 2
+
+
+def test_fetch_concurrently():
+    endpoints = [ARMOR_ENDPOINT, *REMOTE_ENDPOINTS.values()]
+    with StubServer() as server, create_session() as session:
+        for endpoint in endpoints:
+            server.add_route(endpoint, f'["{endpoint}"]'.encode(), delay=0.3)
+
+        results = fetch_concurrently(
+            {
+                endpoint: lambda endpoint=endpoint: get_json(
+                    session, f"{server.url}{endpoint}"
+                )
+                for endpoint in endpoints
+            }
+        )
+
+    assert results == {endpoint: [endpoint] for endpoint in endpoints}
+    # All endpoints of a sync are requested at once with the default settings,
+    # so every request starts before the first one ends instead of waiting for
+    # a free thread.
+    assert len(server.spans) == len(endpoints)
+    assert max(start for start, _ in server.spans) < min(end for _, end in server.spans)
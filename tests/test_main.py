@@ -0,0 +1,194 @@
+import copy
+import json
+import os
+import shutil
+
+import pytest
+
+import main
+from armor_set_store import ArmorSetStore, BufferedArmorSetStore
+from build_search import ARMOR_TYPES
+from main import (ActionError, find_armor_set_name, get_armor_set, run_batch,
+                  run_shell_command)
+from name_index import build_name_indexes
+from session import Session
+
+TEST_FOLDER = "./test_main"
+TEST_DB_PATH = os.path.join(TEST_FOLDER, "armor_sets.db")
+TEST_COMMANDS_PATH = os.path.join(TEST_FOLDER, "commands.jsonl")
+
+ARMOR_DATA = {
+    "master": {
+        "set-a": {
+            armor_type: {"slots": [0, 0, 0, 0], "skills": {"Attack Boost": 1}}
+            for armor_type in ARMOR_TYPES
+        },
+    },
+}
+
+
+@pytest.fixture
+def session():
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
+    os.makedirs(TEST_FOLDER)
+    yield Session(BufferedArmorSetStore(TEST_DB_PATH, batch_size=0), ARMOR_DATA)
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
+
+
+def write_commands(commands):
+    with open(TEST_COMMANDS_PATH, "w") as file:
+        for command in commands:
+            file.write(f"{json.dumps(command)}\n")
+
+
+def test_run_batch(session: Session, capsys):
+    write_commands(
+        [
+            ["create", "-r", "master", "-n", "set-1", "--head", "set-a"],
+            "edit -n set-1 -r master -p legs --new-piece set-a",
+            ["create", "-r", "master", "-n", "set-2", "--chest", "set-a"],
+        ]
+    )
+    run_batch(TEST_COMMANDS_PATH, session, checkpoint=2)
+
+    assert "Ran 3 commands (0 failed)" in capsys.readouterr().out
+    with ArmorSetStore(TEST_DB_PATH) as store:
+        assert store.get_names() == ["set-1", "set-2"]
+        assert store.get("set-1").get_piece_names()["legs"] == "set-a"
+
+
+def test_create_existing_set(session: Session, capsys):
+    write_commands(
+        [
+            ["create", "-r", "master", "-n", "set-1", "--head", "set-a"],
+            ["create", "-r", "master", "-n", "set-1", "--chest", "set-a"],
+        ]
+    )
+    run_batch(TEST_COMMANDS_PATH, session)
+
+    assert "A set with the name set-1 already exists." in capsys.readouterr().out
+    with ArmorSetStore(TEST_DB_PATH) as store:
+        assert store.get_names() == ["set-1"]
+        assert store.get("set-1").get_piece_names()["head"] == "set-a"
+        assert store.get("set-1").get_piece_names()["chest"] == "-"
+
+
+def test_run_batch_reports_errors(session: Session, capsys):
+    write_commands(
+        [
+            ["edit", "-n", "set-1"],
+            {"action": "list"},
+            ["shell"],
+            ["create", "-r", "master", "-n", "set-1", "--head", "set-a"],
+        ]
+    )
+    with open(TEST_COMMANDS_PATH, "a") as file:
+        file.write("not json\n\n")
+    run_batch(TEST_COMMANDS_PATH, session)
+
+    output = capsys.readouterr().out
+    assert "Line 1: armor-build-tool: error: the following arguments are required" in (
+        output
+    )
+    assert "Line 2: Expected a list of arguments or a command string" in output
+    assert "Line 3: Can not run shell from a batch" in output
+    assert "Line 5: Invalid command" in output
+    assert "Ran 5 commands (4 failed)" in output
+    with ArmorSetStore(TEST_DB_PATH) as store:
+        assert store.get_names() == ["set-1"]
+
+
+def test_find_armor_set_name(session: Session, capsys):
+    session.name_indexes = build_name_indexes(ARMOR_DATA)
+
+    assert find_armor_set_name(session, "master", "set-a") == "set-a"
+    assert find_armor_set_name(session, "master", "Set A") == "set-a"
+    assert "Using armor set set-a for Set A." in capsys.readouterr().out
+    with pytest.raises(ActionError, match=r"Did you mean: set-a\?"):
+        find_armor_set_name(session, "master", "st-a")
+
+
+def test_get_armor_set_suggestions(session: Session):
+    write_commands([["create", "-r", "master", "-n", "my-set", "--head", "set-a"]])
+    run_batch(TEST_COMMANDS_PATH, session)
+
+    with ArmorSetStore(TEST_DB_PATH) as store:
+        with pytest.raises(ActionError, match=r"Did you mean: my-set\?"):
+            get_armor_set(store, "my-sett")
+
+
+def test_run_batch_counts_failed_actions(session: Session, capsys):
+    session.name_indexes = build_name_indexes(ARMOR_DATA)
+    write_commands(
+        [
+            ["create", "-r", "master", "-n", "set-1", "--head", "set-a"],
+            "list set -n nope",
+            "edit -n set-1 -r master -p head --new-piece zzz",
+            "search -r master -s unknown-skill=1",
+            "list set -n set-1",
+        ]
+    )
+    run_batch(TEST_COMMANDS_PATH, session, checkpoint=10)
+
+    output = capsys.readouterr().out
+    assert "Line 2: Could not find set with the name: nope" in output
+    assert "Line 3: Could not find armor set: zzz." in output
+    assert "Line 4: Could not find skill: unknown-skill" in output
+    assert "Ran 5 commands (3 failed)" in output
+
+
+def test_set_headers_are_not_markup(session: Session, capsys):
+    write_commands(
+        [
+            "search -r master -s attack-boost=2 -l 1",
+            "search -r master -s attack-boost=2 -l 1 --score slots",
+            ["create", "-r", "master", "-n", "my-set", "--head", "set-a"],
+            "compare my-set --panels",
+        ]
+    )
+    run_batch(TEST_COMMANDS_PATH, session)
+
+    output = capsys.readouterr().out
+    assert "\n[search-1]\n" in output
+    assert "[search-1] slots: 0" in output
+    assert "\n[my-set]\n" in output
+
+
+def test_search_pareto(session: Session, capsys):
+    write_commands(
+        [
+            "search -r master -s attack-boost=2 --pareto --resistances fire",
+            "search -r master -s attack-boost=2 --pareto --score skills",
+            "search -r master -s attack-boost=2 --pareto --resistances poison",
+        ]
+    )
+    run_batch(TEST_COMMANDS_PATH, session)
+
+    output = capsys.readouterr().out
+    assert "[search-1] levels: 2/2, defense: 0, fire: 0, slots: 0" in output
+    assert output.count("levels: ") == 1
+    assert "argument --score: not allowed with argument" in output
+    assert "Line 3: armor-build-tool: error: argument --resistances" in output
+    assert "Ran 3 commands (2 failed)" in output
+
+
+def test_shell_lists_set_with_missing_piece(session: Session, capsys):
+    armor_data = copy.deepcopy(ARMOR_DATA)
+    del armor_data["master"]["set-a"]["gloves"]
+    session = Session(session.armor_sets, armor_data)
+
+    assert run_shell_command("list piece -n set-a -r master -p all", session)
+
+    output = capsys.readouterr().out
+    assert "[gloves]" in output
+    assert "Could not find piece." in output
+    assert "Attack Boost" in output
+
+
+def test_shell_reports_unexpected_errors(session: Session, monkeypatch, capsys):
+    def fail(args, session):
+        raise RuntimeError("broken")
+
+    monkeypatch.setattr(main, "run_action", fail)
+    assert run_shell_command("list all-sets", session)
+    assert "RuntimeError: broken" in capsys.readouterr().out
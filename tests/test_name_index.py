@@ -0,0 +1,55 @@
+import pytest
+
+from name_index import (NameIndex, build_name_indexes, format_suggestions,
+                        get_trigrams)
+
+NAMES = ["kulu-ya-ku-alpha", "kulu-ya-ku-beta", "rathalos-alpha", "leather"]
+
+
+@pytest.fixture
+def index():
+    return NameIndex.build(NAMES)
+
+
+def test_get_trigrams():
+    assert get_trigrams("Ab c") == {"  a", " ab", "ab-", "b-c", "-c "}
+
+
+def test_search(index: NameIndex):
+    matches = index.search("kulu-ya-ku-alfa")
+
+    assert [match.name for match in matches] == [
+        "kulu-ya-ku-alpha",
+        "kulu-ya-ku-beta",
+    ]
+    assert matches[0].similarity > matches[1].similarity
+
+
+def test_search_limit_and_min_similarity(index: NameIndex):
+    assert index.suggest("kulu ya ku", limit=1) == ["kulu-ya-ku-beta"]
+    assert index.search("zzz") == []
+
+
+def test_resolve(index: NameIndex):
+    assert index.resolve("Rathalos Alpha") == "rathalos-alpha"
+    assert index.resolve("rathalos-alph") is None
+
+
+def test_to_dict(index: NameIndex):
+    loaded = NameIndex.from_dict(index.to_dict())
+    assert loaded.suggest("lether") == index.suggest("lether") == ["leather"]
+
+    with pytest.raises(ValueError):
+        NameIndex.from_dict({"names": NAMES})
+
+
+def test_build_name_indexes():
+    indexes = build_name_indexes({"low": {"leather": {}}, "master": {}})
+
+    assert len(indexes["low"]) == 1
+    assert len(indexes["master"]) == 0
+
+
+def test_format_suggestions():
+    assert format_suggestions([]) == ""
+    assert format_suggestions(["a", "b"]) == " Did you mean: a, b?"
@@ -0,0 +1,52 @@
+import io
+import json
+
+import pytest
+
+from output import RecordWriter
+
+RECORDS = [
+    {"name": "set-a", "skills": {"Attack Boost": 2}, "slots": [1, 0, 0, 0]},
+    {"name": "set\tb", "skills": {}, "slots": None},
+]
+
+
+def write_records(format, records):
+    file = io.StringIO()
+    with RecordWriter(format, file) as writer:
+        for record in records:
+            writer.write(record)
+    return file.getvalue()
+
+
+@pytest.mark.parametrize("records", [RECORDS, []])
+def test_record_writer_json(records):
+    assert json.loads(write_records("json", records)) == records
+
+
+def test_record_writer_jsonl():
+    lines = write_records("jsonl", RECORDS).splitlines()
+    assert [json.loads(line) for line in lines] == RECORDS
+
+
+def test_record_writer_tsv():
+    assert write_records("tsv", RECORDS).splitlines() == [
+        "name\tskills\tslots",
+        'set-a\t{"Attack Boost": 2}\t[1, 0, 0, 0]',
+        "set b\t{}\t",
+    ]
+
+
+def test_record_writer_buffers_writes():
+    file = io.StringIO()
+    writer = RecordWriter("jsonl", file)
+    writer.write(RECORDS[0])
+    assert file.getvalue() == ""
+
+    writer.close()
+    assert json.loads(file.getvalue()) == RECORDS[0]
+
+
+def test_record_writer_unknown_format():
+    with pytest.raises(ValueError):
+        RecordWriter("rich")
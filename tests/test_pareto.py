@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from pareto import pareto_filter
+
+
+def naive_pareto_filter(points):
+    frontier = []
+    for i, point in enumerate(points):
+        if any((point == points[j]).all() for j in frontier):
+            continue
+        if not any(
+            (other >= point).all() and (other > point).any() for other in points
+        ):
+            frontier.append(i)
+    return frontier
+
+
+def test_pareto_filter():
+    points = np.array([[1, 5], [3, 3], [2, 2], [5, 1], [3, 3], [0, 6], [1, 4]])
+    assert pareto_filter(points).tolist() == [0, 1, 3, 5]
+
+
+def test_pareto_filter_empty():
+    assert pareto_filter(np.zeros((0, 3), dtype=np.int64)).tolist() == []
+
+
+@pytest.mark.parametrize("columns", [1, 2, 4, 7])
+def test_pareto_filter_matches_pairwise(columns):
+    generator = np.random.default_rng(columns)
+    points = generator.integers(-5, 5, size=(600, columns))
+
+    frontier = pareto_filter(points)
+
+    assert sorted(frontier.tolist()) == naive_pareto_filter(points)
+    sums = points[frontier].sum(axis=1)
+    assert (np.diff(sums) <= 0).all()
@@ -0,0 +1,46 @@
+import pytest
+
+from parse_args import parse_args
+
+
+@pytest.mark.parametrize(
+    "argv, action, name",
+    [
+        (["decorate", "-n", "list", "-s", "guard=1"], "decorate", "list"),
+        (
+            ["edit", "-n", "search", "-r", "low", "-p", "head", "--new-piece", "x"],
+            "edit",
+            "search",
+        ),
+        (["list", "skill", "-n", "create"], "list", "create"),
+        (["--profile", "list", "set", "-n", "sync"], "list", "sync"),
+        (["--profile-trace", "create", "list", "set", "-n", "a"], "list", "a"),
+    ],
+)
+def test_parse_args_action_is_the_first_positional(argv, action, name):
+    args = parse_args(argv)
+    assert args.action == action
+    assert args.name == name
+
+
+def test_parse_args_search_option_named_like_an_action():
+    args = parse_args(["search", "-r", "master", "-s", "create=1"])
+    assert args.action == "search"
+    assert args.skills == {"create": 1}
+
+
+def test_parse_args_list_type_requires_name():
+    with pytest.raises(SystemExit):
+        parse_args(["list", "skill"])
+    assert parse_args(["list", "all-sets"]).name is None
+
+
+def test_parse_args_resistances_need_pareto(capsys):
+    with pytest.raises(SystemExit):
+        parse_args(["search", "-r", "master", "-s", "guard=1", "--resistances", "fire"])
+    assert "--resistances: only allowed with --pareto" in capsys.readouterr().err
+
+    args = parse_args(
+        ["search", "-r", "master", "-s", "guard=1", "--pareto", "--resistances", "fire"]
+    )
+    assert args.resistances == ["fire"]
@@ -0,0 +1,180 @@
+import asyncio
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from armor_set import ArmorPiece, ArmorSet
+from armor_set_store import ArmorSetStore
+from build_search import ARMOR_TYPES
+from server import ArmorServer, init_search_worker
+from session import Session
+
+TEST_FOLDER = "./test_server"
+TEST_DATA_PATH = os.path.join(TEST_FOLDER, "armor_data.json")
+TEST_DB_PATH = os.path.join(TEST_FOLDER, "armor_sets.db")
+TEST_CHARMS_PATH = os.path.join(TEST_FOLDER, "charms.json")
+
+
+def make_piece(skills):
+    return {"slots": [0, 0, 0, 0], "skills": skills}
+
+
+ARMOR_DATA = {
+    "master": {
+        "set-a": {
+            armor_type: make_piece({"Attack Boost": 2}) for armor_type in ARMOR_TYPES
+        },
+        "set-b": {
+            armor_type: make_piece({"Weakness Exploit": 1})
+            for armor_type in ARMOR_TYPES
+        },
+    },
+}
+
+
+@pytest.fixture
+def server():
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
+    os.makedirs(TEST_FOLDER)
+    with open(TEST_DATA_PATH, "w") as file:
+        json.dump(ARMOR_DATA, file)
+    with open(TEST_CHARMS_PATH, "w") as file:
+        json.dump({}, file)
+
+    store = ArmorSetStore(TEST_DB_PATH)
+    store.save(ArmorSet("set-1", ArmorPiece.new("head", "master", "set-a", ARMOR_DATA)))
+    executor = ThreadPoolExecutor(
+        1,
+        initializer=init_search_worker,
+        initargs=(TEST_DATA_PATH, TEST_CHARMS_PATH),
+    )
+    yield ArmorServer(Session(store, ARMOR_DATA), executor, batch_window=0.01)
+    executor.shutdown()
+    store.close()
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
+
+
+async def request(port, method, path, body=None):
+    content = json.dumps(body).encode() if body is not None else b""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nConnection: close\r\n"
+        f"Content-Length: {len(content)}\r\n\r\n".encode() + content
+    )
+    response = await reader.read()
+    writer.close()
+
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def run_requests(server: ArmorServer, *requests):
+    async def run():
+        async with await server.start("127.0.0.1", 0) as listener:
+            port = listener.sockets[0].getsockname()[1]
+            return await asyncio.gather(
+                *(request(port, *arguments) for arguments in requests)
+            )
+
+    return asyncio.run(run())
+
+
+def test_get_sets(server: ArmorServer):
+    names, armor_set, missing = run_requests(
+        server,
+        ("GET", "/sets"),
+        ("GET", "/sets/set-1"),
+        ("GET", "/sets/set-2"),
+    )
+
+    assert names == (200, ["set-1"])
+    assert armor_set[0] == 200
+    assert armor_set[1]["helm"]["name"] == "set-a"
+    assert missing == (404, {"error": "Could not find set with the name: set-2"})
+
+
+def test_get_pieces(server: ArmorServer):
+    [(status, pieces)] = run_requests(server, ("GET", "/pieces/master/set-b"))
+
+    assert status == 200
+    assert pieces["head"] == make_piece({"Weakness Exploit": 1})
+
+
+def test_compare(server: ArmorServer):
+    [(status, comparison)] = run_requests(server, ("GET", "/compare?names=set-1"))
+
+    assert status == 200
+    assert comparison["skills"] == {"Attack Boost": [2]}
+
+
+def test_search_batches_requests(server: ArmorServer):
+    search = {"rank": "master", "skills": {"attack-boost": 4}, "limit": 2}
+    other_search = {"rank": "master", "skills": {"weakness-exploit": 1}, "limit": 1}
+    results = run_requests(
+        server,
+        ("POST", "/search", search),
+        ("POST", "/search", {**search, "limit": 1}),
+        ("POST", "/search", other_search),
+    )
+
+    assert [status for status, _ in results] == [200, 200, 200]
+    assert [len(armor_sets) for _, armor_sets in results] == [2, 1, 1]
+    assert results[1][1][0] == results[0][1][0]
+    assert results[2][1][0]["helm"]["name"] == "set-b"
+    assert server.batcher.batches == 1
+
+
+def test_search_batcher_keeps_and_closes_tasks(server: ArmorServer):
+    batcher = server.batcher
+
+    async def run():
+        results = await batcher.search("master", {"attack-boost": 2}, 1)
+        assert len(results) == 1
+        # The done callback of the task runs in the next iteration of the loop.
+        await asyncio.sleep(0)
+        assert not batcher._tasks
+
+        batcher.batch_window = 10
+        search = asyncio.create_task(batcher.search("master", {"attack-boost": 2}, 1))
+        await asyncio.sleep(0.01)
+        assert len(batcher._tasks) == 1
+
+        await server.close()
+        assert not batcher._tasks
+        assert not batcher.running
+        with pytest.raises(asyncio.CancelledError):
+            await search
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize(
+    "body, status",
+    [
+        ({"rank": "low", "skills": {"attack-boost": 1}}, 404),
+        ({"rank": "master"}, 400),
+        ({"rank": "master", "skills": {"attack-boost": 1}, "limit": 0}, 400),
+        ({"rank": "master", "skills": {"unknown-skill": 1}}, 404),
+    ],
+)
+def test_search_invalid(server: ArmorServer, body, status):
+    [(response_status, response)] = run_requests(server, ("POST", "/search", body))
+
+    assert response_status == status
+    assert "error" in response
+
+
+def test_unknown_endpoint(server: ArmorServer):
+    assert run_requests(server, ("GET", "/armor")) == [
+        (404, {"error": "Unknown endpoint"})
+    ]
+
+
+def test_search_unknown_skill(server: ArmorServer):
+    body = {"rank": "master", "skills": {"attack-boost": 1, "unknown-skill": 1}}
+    assert run_requests(server, ("POST", "/search", body)) == [
+        (404, {"error": "Could not find skill: unknown-skill"})
+    ]
@@ -0,0 +1,78 @@
+import pytest
+
+from skill_index import SkillIndex, SkillPosting
+
+
+@pytest.fixture
+def skill_index():
+    armor_data = {
+        "high": {
+            "set-a": {"head": {"slots": [0, 0, 0, 0], "skills": {"Attack Boost": 1}}},
+        },
+        "master": {
+            "set-a": {
+                "head": {"slots": [0, 0, 0, 0], "skills": {"Attack Boost": 1}},
+                "legs": {"slots": [0, 0, 0, 0], "skills": {"Attack Boost": 3}},
+            },
+            "set-b": {
+                "head": {
+                    "slots": [0, 0, 0, 0],
+                    "skills": {"Attack Boost": 2, "Weakness Exploit": 1},
+                },
+            },
+        },
+    }
+    return SkillIndex.build(armor_data)
+
+
+def test_lookup(skill_index):
+    assert skill_index.lookup("Attack Boost") == [
+        SkillPosting("master", "set-a", "legs", 3),
+        SkillPosting("master", "set-b", "head", 2),
+        SkillPosting("high", "set-a", "head", 1),
+        SkillPosting("master", "set-a", "head", 1),
+    ]
+
+
+def test_lookup_normalized_name(skill_index):
+    assert skill_index.lookup("weakness-exploit") == [
+        SkillPosting("master", "set-b", "head", 1)
+    ]
+
+
+@pytest.mark.parametrize(
+    "rank, armor_type, min_level, expected",
+    [
+        ("high", None, 1, [SkillPosting("high", "set-a", "head", 1)]),
+        (
+            "master",
+            "head",
+            1,
+            [
+                SkillPosting("master", "set-b", "head", 2),
+                SkillPosting("master", "set-a", "head", 1),
+            ],
+        ),
+        (
+            None,
+            None,
+            2,
+            [
+                SkillPosting("master", "set-a", "legs", 3),
+                SkillPosting("master", "set-b", "head", 2),
+            ],
+        ),
+        ("low", None, 1, []),
+    ],
+)
+def test_lookup_filters(skill_index, rank, armor_type, min_level, expected):
+    assert skill_index.lookup("attack-boost", rank, armor_type, min_level) == expected
+
+
+def test_lookup_unknown_skill(skill_index):
+    assert "not-a-skill" not in skill_index
+    assert skill_index.lookup("not-a-skill") == []
+
+
+def test_get_skill_name(skill_index):
+    assert skill_index.get_skill_name("attack-boost") == "Attack Boost"
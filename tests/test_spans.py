@@ -0,0 +1,83 @@
+import json
+import os
+import pstats
+import shutil
+
+import pytest
+
+import spans
+from spans import profiled, span, start_profiler, stop_profiler
+
+TEST_FOLDER = "./test_spans"
+
+
+@pytest.fixture
+def folder():
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
+    os.makedirs(TEST_FOLDER)
+    yield TEST_FOLDER
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
+
+
+@profiled("load")
+def load(value: int) -> int:
+    with span("parse"):
+        return value * 2
+
+
+def test_span_without_profiler():
+    assert spans._profiler is None
+    with span("phase") as active_span:
+        pass
+    assert active_span is spans._NULL_SPAN
+    assert load(2) == 4
+
+
+def test_profiler_records_nested_spans():
+    profiler = start_profiler()
+    try:
+        with span("action"):
+            load(1)
+            load(2)
+    finally:
+        assert stop_profiler() is profiler
+
+    summary = [(record.path, count) for record, count in profiler.get_summary()]
+    assert summary == [
+        (("startup",), 1),
+        (("action",), 1),
+        (("action", "load"), 2),
+        (("action", "load", "parse"), 2),
+    ]
+    assert all(record.wall >= 0 for record in profiler.records)
+    lines = profiler.format_summary().splitlines()
+    assert lines[0].split() == ["span", "calls", "wall", "ms", "cpu", "ms", "blocks"]
+    assert lines[3].startswith("  load ")
+    assert spans._profiler is None
+
+
+def test_profiler_writes_trace_and_pstats(folder):
+    profiler = start_profiler(with_cprofile=True)
+    try:
+        load(3)
+    finally:
+        stop_profiler()
+
+    trace_path = os.path.join(folder, "trace.json")
+    profiler.write_trace(trace_path)
+    with open(trace_path) as file:
+        events = json.load(file)["traceEvents"]
+    assert [event["name"] for event in events] == ["startup", "parse", "load"]
+    assert all(event["ph"] == "X" for event in events)
+
+    pstats_path = os.path.join(folder, "profile.prof")
+    profiler.write_pstats(pstats_path)
+    functions = [function for _, _, function in pstats.Stats(pstats_path).stats]
+    assert "load" in functions
+
+
+def test_write_pstats_without_cprofile(folder):
+    profiler = start_profiler()
+    stop_profiler()
+    with pytest.raises(ValueError):
+        profiler.write_pstats(os.path.join(folder, "profile.prof"))